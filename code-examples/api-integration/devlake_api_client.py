@@ -5,62 +5,441 @@ DevLake API客户端示例
 """
 
 import requests
+import copy
 import json
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+import os
+import random
+import re
+import sys
+import threading
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterator, List, Optional, Tuple
 import time
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'database-access'))
+from qdev_metrics import MetricsRegistry, get_registry
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """熔断器打开期间直接拒绝请求"""
+
+class RetryPolicy:
+    """指数退避 + 抖动的重试策略"""
+    
+    # 默认只重试幂等方法
+    IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'])
+    
+    def __init__(self, max_retries: int = 3, backoff_factor: float = 0.5, max_backoff: float = 30,
+                 retry_statuses=(429, 502, 503, 504), max_retry_after: float = 120):
+        """
+        初始化重试策略
+        
+        Args:
+            max_retries: 最大重试次数（不含首次请求）
+            backoff_factor: 退避基数（秒），第n次重试的退避上限为 backoff_factor * 2**n
+            max_backoff: 单次退避上限（秒）
+            retry_statuses: 需要重试的HTTP状态码
+            max_retry_after: 服务端Retry-After的最大采纳值（秒）
+        """
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.retry_statuses = frozenset(retry_statuses)
+        self.max_retry_after = max_retry_after
+    
+    def is_retryable_method(self, method: str) -> bool:
+        return method.upper() in self.IDEMPOTENT_METHODS
+    
+    def get_delay(self, attempt: int, response: Optional[requests.Response] = None) -> float:
+        """
+        计算第attempt次重试前的等待时间
+        
+        优先采用响应中的Retry-After，否则使用带完全抖动的指数退避
+        """
+        retry_after = self._parse_retry_after(response)
+        if retry_after is not None:
+            return min(retry_after, self.max_retry_after)
+        
+        return random.uniform(0, min(self.max_backoff, self.backoff_factor * (2 ** attempt)))
+    
+    @staticmethod
+    def _parse_retry_after(response: Optional[requests.Response]) -> Optional[float]:
+        """解析Retry-After（秒数或HTTP日期）"""
+        if response is None:
+            return None
+        value = response.headers.get('Retry-After')
+        if not value:
+            return None
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            pass
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+        return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+class CircuitBreaker:
+    """
+    熔断器
+    
+    连续失败达到阈值后打开，打开期间请求立即失败；
+    经过recovery_timeout后进入半开状态放行一个探测请求，成功则关闭，失败则重新打开
+    """
+    
+    CLOSED = 'CLOSED'
+    OPEN = 'OPEN'
+    HALF_OPEN = 'HALF_OPEN'
+    
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30):
+        """
+        初始化熔断器
+        
+        Args:
+            failure_threshold: 连续失败多少次后打开
+            recovery_timeout: 打开后多久允许探测（秒）
+        """
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+    
+    def before_request(self) -> bool:
+        """
+        请求前检查，熔断中抛出CircuitOpenError
+        
+        Returns:
+            bool: 本次请求是否为半开状态的探测请求（结束时须调用 release_probe）
+        """
+        with self._lock:
+            if self.state == self.OPEN:
+                remaining = self.recovery_timeout - (time.monotonic() - self._opened_at)
+                if remaining > 0:
+                    raise CircuitOpenError(f"DevLake服务熔断中，{remaining:.1f}秒后重试")
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            
+            if self.state == self.HALF_OPEN:
+                if self._probe_in_flight:
+                    raise CircuitOpenError("DevLake服务熔断探测中")
+                self._probe_in_flight = True
+                return True
+            return False
+    
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+    
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+            self._probe_in_flight = False
+    
+    def release_probe(self):
+        """
+        探测请求结束时释放探测名额
+        
+        探测以 record_success / record_failure 以外的方式结束（例如抛出非网络异常）时，
+        熔断器保持半开，下一个请求重新探测，而不是一直拒绝
+        """
+        with self._lock:
+            self._probe_in_flight = False
+
+class ResponseCache:
+    """
+    读接口响应缓存
+    
+    按端点设置TTL，超出容量时按LRU淘汰；过期条目若带有ETag/Last-Modified，
+    会用条件请求重新验证，服务端返回304时直接续期
+    """
+    
+    # 端点前缀 -> TTL（秒），未列出的端点不缓存
+    DEFAULT_TTLS = {
+        '/version': 3600,
+        '/plugins/q_dev/connections': 60,
+        '/pipelines': 10,
+        '/store/onboard': 30
+    }
+    
+    def __init__(self, ttls: Optional[Dict[str, float]] = None, max_entries: int = 256):
+        """
+        初始化响应缓存
+        
+        Args:
+            ttls: 端点 -> TTL（秒），默认使用 DEFAULT_TTLS
+            max_entries: 最大缓存条目数
+        """
+        self.ttls = dict(self.DEFAULT_TTLS if ttls is None else ttls)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self._entries: 'OrderedDict[str, Dict]' = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+    
+    def ttl_for(self, endpoint: str) -> float:
+        """精确匹配端点的TTL，0表示不缓存"""
+        return self.ttls.get('/' + endpoint.lstrip('/'), 0)
+    
+    @staticmethod
+    def make_key(endpoint: str, params: Optional[Dict] = None) -> str:
+        key = '/' + endpoint.lstrip('/')
+        if params:
+            key += '?' + '&'.join(f"{k}={params[k]}" for k in sorted(params))
+        return key
+    
+    @property
+    def generation(self) -> int:
+        """缓存代数，每次 invalidate_all 加一；请求开始时记录，写入时代数已变化说明期间发生过写操作"""
+        with self._lock:
+            return self._generation
+    
+    def record(self, result: str):
+        """累加命中统计（result 为 hit / miss / revalidated）"""
+        with self._lock:
+            if result == 'hit':
+                self.hits += 1
+            elif result == 'miss':
+                self.misses += 1
+            else:
+                self.revalidations += 1
+    
+    def get(self, key: str) -> Optional[Dict]:
+        """返回缓存条目（可能已过期，由调用方判断），并标记为最近使用"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+    
+    def put(self, key: str, data, ttl: float, etag: Optional[str] = None,
+            last_modified: Optional[str] = None, generation: Optional[int] = None):
+        """
+        写入缓存条目
+        
+        Args:
+            generation: 请求开始时的缓存代数；期间缓存被清空过时不写入，避免写操作前发出的读请求
+                        在 invalidate_all 之后存入旧数据
+        """
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._entries[key] = {
+                'data': data,
+                'expires_at': time.monotonic() + ttl,
+                'etag': etag,
+                'last_modified': last_modified
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def refresh(self, key: str, ttl: float, generation: Optional[int] = None):
+        """304后续期（代数已变化时不续期）"""
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry['expires_at'] = time.monotonic() + ttl
+    
+    def invalidate_all(self):
+        """写操作后清空缓存，保证不会读到写之前的数据"""
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+
 class DevLakeAPIClient:
     """DevLake API客户端类"""
     
-    def __init__(self, base_url: str = "http://localhost:8080", timeout: int = 30):
+    def __init__(self, base_url: str = "http://localhost:8080", timeout: int = 30,
+                 retry_policy: Optional[RetryPolicy] = None,
+                 circuit_breaker: Optional[CircuitBreaker] = None,
+                 cache: Optional[ResponseCache] = None,
+                 metrics: Optional[MetricsRegistry] = None):
         """
         初始化API客户端
         
         Args:
             base_url: DevLake API基础URL
             timeout: 请求超时时间（秒）
+            retry_policy: 重试策略，默认 RetryPolicy()；传入 RetryPolicy(max_retries=0) 可关闭重试
+            circuit_breaker: 熔断器，默认 CircuitBreaker()
+            cache: 读接口响应缓存，默认不启用；传入 ResponseCache() 开启
+            metrics: 指标注册表（请求耗时、重试、熔断、缓存命中），默认为进程级注册表
         """
         self.base_url = base_url.rstrip('/')
         self.timeout = timeout
         self.session = requests.Session()
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        self.cache = cache
+        self.metrics = metrics or get_registry()
+    
+    @staticmethod
+    def _endpoint_label(endpoint: str) -> str:
+        """指标标签使用端点模板（数字ID替换为{id}），避免标签基数随ID增长"""
+        return re.sub(r'/\d+(?=/|$)', '/{id}', '/' + endpoint.lstrip('/'))
+    
+    def _record_request(self, method: str, endpoint: str, seconds: float, status, error: Optional[str] = None):
+        """记录单次HTTP请求（含每次重试）的耗时"""
+        labels = {'method': method.upper(), 'endpoint': endpoint, 'status': status or 'error'}
+        self.metrics.observe('qdev_http_request_duration_seconds', seconds, **labels)
+        self.metrics.emit({
+            'type': 'http',
+            'name': f"{labels['method']} {endpoint}",
+            'seconds': seconds,
+            'rows': None,
+            'bytes': None,
+            'labels': labels,
+            'error': error
+        })
         
-    def _make_request(self, method: str, endpoint: str, **kwargs) -> requests.Response:
+    def _make_request(self, method: str, endpoint: str, idempotent: Optional[bool] = None,
+                      **kwargs) -> requests.Response:
         """
         发送HTTP请求
         
+        连接错误、超时和可重试状态码（429/502/503/504）会按重试策略退避重试，
+        只有幂等请求才会重试；服务端错误和网络错误计入熔断器
+        
         Args:
             method: HTTP方法
             endpoint: API端点
+            idempotent: 是否可安全重试，默认按HTTP方法判断
             **kwargs: 其他请求参数
             
         Returns:
             requests.Response: HTTP响应对象
         """
         url = f"{self.base_url}/{endpoint.lstrip('/')}"
+        policy = self.retry_policy
+        can_retry = policy.is_retryable_method(method) if idempotent is None else idempotent
+        endpoint_label = self._endpoint_label(endpoint)
+        attempt = 0
         
-        try:
-            response = self.session.request(
-                method=method,
-                url=url,
-                timeout=self.timeout,
-                **kwargs
-            )
-            response.raise_for_status()
-            return response
-        except requests.exceptions.RequestException as e:
-            print(f"API请求失败: {e}")
-            raise
+        while True:
+            response = None
+            probe = False
+            try:
+                probe = self.circuit_breaker.before_request()
+                started = time.perf_counter()
+                try:
+                    response = self.session.request(
+                        method=method,
+                        url=url,
+                        timeout=self.timeout,
+                        **kwargs
+                    )
+                except requests.exceptions.RequestException as e:
+                    self._record_request(method, endpoint_label, time.perf_counter() - started, None,
+                                         type(e).__name__)
+                    raise
+                self._record_request(method, endpoint_label, time.perf_counter() - started,
+                                     response.status_code)
+                response.raise_for_status()
+                self.circuit_breaker.record_success()
+                if self.cache is not None and method.upper() not in ('GET', 'HEAD', 'OPTIONS'):
+                    self.cache.invalidate_all()
+                return response
+            except CircuitOpenError as e:
+                self.metrics.inc('qdev_http_circuit_open_total', endpoint=endpoint_label)
+                print(f"API请求失败: {e}")
+                raise
+            except requests.exceptions.RequestException as e:
+                status = response.status_code if response is not None else None
+                if status is None:
+                    server_side = isinstance(e, (requests.exceptions.ConnectionError,
+                                                 requests.exceptions.Timeout))
+                else:
+                    server_side = status >= 500 or status == 429
+                if server_side:
+                    self.circuit_breaker.record_failure()
+                elif status is not None:
+                    # 4xx为客户端错误，说明服务可用
+                    self.circuit_breaker.record_success()
+                # 没有响应的其他错误（无效URL、解码失败等）不能说明服务状态，不计入熔断器
+                
+                retryable = server_side and (status is None or status in policy.retry_statuses)
+                if not (can_retry and retryable and attempt < policy.max_retries):
+                    print(f"API请求失败: {e}")
+                    raise
+                
+                delay = policy.get_delay(attempt, response)
+                attempt += 1
+                self.metrics.inc('qdev_http_retries_total', method=method.upper(), endpoint=endpoint_label)
+                print(f"API请求失败，{delay:.1f}秒后第{attempt}次重试: {e}")
+                time.sleep(delay)
+            finally:
+                if probe:
+                    self.circuit_breaker.release_probe()
+    
+    def _get_json(self, endpoint: str, params: Optional[Dict] = None):
+        """
+        GET请求并解析JSON，启用缓存时优先返回未过期的缓存结果
+        
+        Args:
+            endpoint: API端点
+            params: 查询参数
+            
+        Returns:
+            解析后的JSON（缓存命中时为副本，调用方修改不会污染缓存）
+        """
+        cache = self.cache
+        ttl = cache.ttl_for(endpoint) if cache is not None else 0
+        if ttl <= 0:
+            return self._make_request('GET', endpoint, params=params).json()
+        
+        key = cache.make_key(endpoint, params)
+        generation = cache.generation
+        entry = cache.get(key)
+        if entry is not None and entry['expires_at'] > time.monotonic():
+            cache.record('hit')
+            self.metrics.inc('qdev_http_cache_total', result='hit')
+            return copy.deepcopy(entry['data'])
+        
+        headers = {}
+        if entry is not None:
+            if entry['etag']:
+                headers['If-None-Match'] = entry['etag']
+            if entry['last_modified']:
+                headers['If-Modified-Since'] = entry['last_modified']
+        
+        response = self._make_request('GET', endpoint, params=params, headers=headers or None)
+        if response.status_code == 304 and entry is not None:
+            cache.record('revalidated')
+            self.metrics.inc('qdev_http_cache_total', result='revalidated')
+            cache.refresh(key, ttl, generation)
+            return copy.deepcopy(entry['data'])
+        
+        cache.record('miss')
+        self.metrics.inc('qdev_http_cache_total', result='miss')
+        data = response.json()
+        cache.put(key, data, ttl, response.headers.get('ETag'), response.headers.get('Last-Modified'),
+                  generation)
+        return copy.deepcopy(data)
     
     def get_version(self) -> Dict:
         """获取DevLake版本信息"""
-        response = self._make_request('GET', '/version')
-        return response.json()
+        return self._get_json('/version')
     
     def get_q_dev_connections(self) -> List[Dict]:
         """获取Q Dev连接列表"""
-        response = self._make_request('GET', '/plugins/q_dev/connections')
-        return response.json()
+        return self._get_json('/plugins/q_dev/connections')
     
     def create_q_dev_connection(self, connection_data: Dict) -> Dict:
         """
@@ -87,13 +466,94 @@ class DevLakeAPIClient:
     
     def test_connection(self, connection_id: int) -> Dict:
         """测试连接"""
-        response = self._make_request('POST', f'/plugins/q_dev/connections/{connection_id}/test')
+        # 测试连接不产生副作用，可安全重试
+        response = self._make_request('POST', f'/plugins/q_dev/connections/{connection_id}/test', idempotent=True)
         return response.json()
     
     def get_pipelines(self) -> List[Dict]:
         """获取数据管道列表"""
-        response = self._make_request('GET', '/pipelines')
-        return response.json()
+        return self._get_json('/pipelines')
+    
+    def get_pipelines_page(self, page: int = 1, page_size: int = 100,
+                           status: Optional[str] = None, label: Optional[str] = None) -> Dict:
+        """
+        获取一页数据管道
+        
+        Args:
+            page: 页码（从1开始）
+            page_size: 每页数量
+            status: 按状态过滤（服务端过滤，如 TASK_RUNNING）
+            label: 按标签过滤（服务端过滤）
+            
+        Returns:
+            Dict: {'pipelines': [...], 'count': 总数, 'bare_list': 响应体是否为旧版本的直接列表}
+        """
+        params = {'page': page, 'pageSize': page_size}
+        if status:
+            params['status'] = status
+        if label:
+            params['label'] = label
+        
+        body = self._get_json('/pipelines', params=params)
+        # 兼容直接返回列表的旧版本（不支持分页，列表即全部管道）
+        if isinstance(body, list):
+            return {'pipelines': body, 'count': None, 'bare_list': True}
+        return {'pipelines': body.get('pipelines') or [], 'count': body.get('count'), 'bare_list': False}
+    
+    def iter_pipelines(self, page_size: int = 100, status: Optional[str] = None,
+                       label: Optional[str] = None, prefetch: bool = True) -> Iterator[Dict]:
+        """
+        逐条遍历数据管道（分页惰性加载）
+        
+        内存中最多只保留当前页、上一页的管道ID和预取的下一页，与管道总数无关；
+        prefetch=True 时在后台线程预取下一页，与调用方处理当前页重叠。
+        遍历期间新建管道使上一页的末尾顺延到本页时按上一页的ID去重；
+        服务端返回旧版本的直接列表时只有这一页；某一页相对上一页没有新的管道ID时停止，
+        服务端忽略分页参数时不会重复遍历
+        
+        Args:
+            page_size: 每页数量
+            status: 按状态过滤（服务端过滤）
+            label: 按标签过滤（服务端过滤）
+            prefetch: 是否后台预取下一页
+            
+        Yields:
+            Dict: 单个管道
+        """
+        def fetch(page_number: int) -> Dict:
+            return self.get_pipelines_page(page_number, page_size, status, label)
+        
+        executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+        try:
+            page = 1
+            current = fetch(page)
+            previous_ids = set()
+            yielded = 0
+            
+            while current['pipelines']:
+                items = current['pipelines']
+                new_items = [item for item in items if item.get('id') not in previous_ids]
+                if not new_items:
+                    break
+                previous_ids = {item.get('id') for item in items}
+                yielded += len(new_items)
+                count = current['count']
+                has_more = (not current['bare_list'] and len(items) >= page_size
+                            and (count is None or yielded < count))
+                
+                next_future = None
+                if has_more and executor is not None:
+                    next_future = executor.submit(fetch, page + 1)
+                
+                yield from new_items
+                
+                if not has_more:
+                    break
+                page += 1
+                current = next_future.result() if next_future is not None else fetch(page)
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
     
     def create_pipeline(self, pipeline_data: Dict) -> Dict:
         """
@@ -125,8 +585,7 @@ class DevLakeAPIClient:
     
     def get_store_onboard(self) -> Dict:
         """获取存储初始化状态"""
-        response = self._make_request('GET', '/store/onboard')
-        return response.json()
+        return self._get_json('/store/onboard')
 
 class QDevMetricsAPI:
     """Q Dev指标API封装类"""
@@ -140,6 +599,20 @@ class QDevMetricsAPI:
         """
         self.client = devlake_client
     
+    @staticmethod
+    def _build_connection_data(config: Dict) -> Dict:
+        """把用户配置转换为创建连接的请求体"""
+        return {
+            "name": config.get("name", "q_dev_connection"),
+            "accessKeyId": config["accessKeyId"],
+            "secretAccessKey": config["secretAccessKey"],
+            "region": config["region"],
+            "bucket": config["bucket"],
+            "identityStoreId": config.get("identityStoreId"),
+            "identityStoreRegion": config.get("identityStoreRegion", config["region"]),
+            "rateLimitPerHour": config.get("rateLimitPerHour", 20000)
+        }
+    
     def setup_q_dev_connection(self, config: Dict) -> Dict:
         """
         设置Q Dev连接
@@ -150,18 +623,154 @@ class QDevMetricsAPI:
         Returns:
             Dict: 连接信息
         """
-        connection_data = {
-            "name": config.get("name", "q_dev_connection"),
-            "accessKeyId": config["accessKeyId"],
-            "secretAccessKey": config["secretAccessKey"],
-            "region": config["region"],
-            "bucket": config["bucket"],
-            "identityStoreId": config.get("identityStoreId"),
-            "identityStoreRegion": config.get("identityStoreRegion", config["region"]),
-            "rateLimitPerHour": config.get("rateLimitPerHour", 20000)
-        }
+        return self.client.create_q_dev_connection(self._build_connection_data(config))
+    
+    def setup_q_dev_connections(self, configs: List[Dict], test: bool = True,
+                                max_workers: int = 8) -> List[Dict]:
+        """
+        批量设置Q Dev连接
+        
+        先一次性读取现有连接，名称或S3存储桶已存在的配置直接跳过；
+        同一批中名称或S3存储桶与前面的配置重复时不再创建，沿用前面配置的结果；
+        其余配置并发创建，随后并发测试（包括已存在的连接）
+        
+        Args:
+            configs: Q Dev连接配置列表
+            test: 是否测试连接
+            max_workers: 最大并发请求数
+            
+        Returns:
+            List[Dict]: 与configs一一对应的结果，status 为 created / exists / duplicate / failed
+        """
+        existing = self.client.get_q_dev_connections()
+        by_name = {conn.get('name'): conn for conn in existing if conn.get('name')}
+        by_bucket = {conn.get('bucket'): conn for conn in existing if conn.get('bucket')}
+        
+        results = []
+        to_create = []
+        duplicates = []
+        batch_by_name = {}
+        batch_by_bucket = {}
+        for config in configs:
+            name = config.get("name", "q_dev_connection")
+            bucket = config.get('bucket')
+            result = {'name': name, 'bucket': bucket, 'status': None,
+                      'connection': None, 'test_result': None, 'error': None}
+            original = batch_by_name.get(name) or batch_by_bucket.get(bucket)
+            match = by_name.get(name) or by_bucket.get(bucket)
+            if original is not None:
+                result['status'] = 'duplicate'
+                duplicates.append((result, original))
+            else:
+                batch_by_name[name] = result
+                if bucket:
+                    batch_by_bucket[bucket] = result
+                if match is not None:
+                    result['status'] = 'exists'
+                    result['connection'] = match
+                else:
+                    to_create.append((result, config))
+            results.append(result)
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(self.setup_q_dev_connection, config): result
+                       for result, config in to_create}
+            for future in as_completed(futures):
+                result = futures[future]
+                try:
+                    result['connection'] = future.result()
+                    result['status'] = 'created'
+                except Exception as e:
+                    result['status'] = 'failed'
+                    result['error'] = str(e)
+            
+            if test:
+                futures = {executor.submit(self.client.test_connection, result['connection']['id']): result
+                           for result in results if result['connection'] is not None}
+                for future in as_completed(futures):
+                    result = futures[future]
+                    try:
+                        result['test_result'] = future.result()
+                    except Exception as e:
+                        result['test_result'] = {'success': False, 'message': str(e)}
+        
+        for result, original in duplicates:
+            result['connection'] = original['connection']
+            result['test_result'] = original['test_result']
+            result['error'] = f"与同批配置 {original['name']} 重复"
+        
+        return results
+    
+    def create_multi_connection_pipeline(self, connection_ids: List[int],
+                                         pipeline_name: str = "Q Dev Metrics Collection",
+                                         connections_per_stage: int = 10) -> Dict:
+        """
+        为多个连接创建一个多阶段指标收集管道
+        
+        同一阶段内的任务并行执行，阶段之间顺序执行；
+        connections_per_stage 控制同时采集的连接数，避免同时打满S3和DevLake
+        
+        Args:
+            connection_ids: 连接ID列表
+            pipeline_name: 管道名称
+            connections_per_stage: 每个阶段包含的连接数
+            
+        Returns:
+            Dict: 管道信息
+        """
+        tasks = [
+            {
+                "plugin": "q_dev",
+                "connectionId": connection_id,
+                "scope": [
+                    {
+                        "name": "Q Dev User Metrics"
+                    }
+                ]
+            }
+            for connection_id in connection_ids
+        ]
+        plan = [tasks[i:i + connections_per_stage] for i in range(0, len(tasks), connections_per_stage)]
         
-        return self.client.create_q_dev_connection(connection_data)
+        return self.client.create_pipeline({"name": pipeline_name, "plan": plan})
+    
+    def provision_connections(self, configs: List[Dict], pipeline_name: str = "Q Dev Metrics Collection",
+                              run: bool = False, max_workers: int = 8,
+                              connections_per_stage: int = 10) -> Dict:
+        """
+        批量接入: 创建并测试连接，再为所有可用连接创建一个管道
+        
+        只有测试通过的连接会加入管道，测试失败的连接在结果中 in_pipeline 为 False；
+        同批重复的配置只加入一次
+        
+        Args:
+            configs: Q Dev连接配置列表
+            pipeline_name: 管道名称
+            run: 是否立即运行管道
+            max_workers: 最大并发请求数
+            connections_per_stage: 每个阶段包含的连接数
+            
+        Returns:
+            Dict: 每个连接的结果、管道信息以及运行结果
+        """
+        results = self.setup_q_dev_connections(configs, max_workers=max_workers)
+        connection_ids = []
+        for result in results:
+            test_result = result['test_result'] or {}
+            result['in_pipeline'] = (result['status'] in ('created', 'exists')
+                                     and bool(test_result.get('success'))
+                                     and result['connection']['id'] not in connection_ids)
+            if result['in_pipeline']:
+                connection_ids.append(result['connection']['id'])
+        
+        pipeline = None
+        run_result = None
+        if connection_ids:
+            pipeline = self.create_multi_connection_pipeline(connection_ids, pipeline_name, connections_per_stage)
+            if run:
+                run_result = self.client.run_pipeline(pipeline['id'])
+        
+        return {'connections': results, 'pipeline': pipeline, 'run_result': run_result}
     
     def create_metrics_pipeline(self, connection_id: int, pipeline_name: str = "Q Dev Metrics Collection") -> Dict:
         """
@@ -193,29 +802,113 @@ class QDevMetricsAPI:
         
         return self.client.create_pipeline(pipeline_data)
     
-    def wait_for_pipeline_completion(self, pipeline_id: int, max_wait_time: int = 1800) -> Dict:
+    # DevLake管道终态（兼容旧版本的无前缀状态）
+    TERMINAL_STATUSES = frozenset([
+        'TASK_COMPLETED', 'TASK_FAILED', 'TASK_CANCELLED', 'TASK_PARTIAL',
+        'COMPLETED', 'FAILED', 'CANCELLED'
+    ])
+    
+    def iter_pipeline_completions(self, pipeline_ids: List[int], max_wait_time: int = 1800,
+                                  initial_interval: float = 2, max_interval: float = 60,
+                                  backoff: float = 1.5) -> Iterator[Tuple[int, Dict]]:
         """
-        等待管道完成
+        在单个轮询循环中等待多个管道，每个管道一到达终态就立即产出
+        
+        每个管道独立调度下次轮询: 开始时快速轮询，任务进度没有变化时按backoff倍数放慢；
+        进度有推进时根据已完成任务的平均耗时估算剩余时间来安排下次轮询。
+        下次轮询不会晚于截止时间，截止时间到达后的那次轮询仍有管道未完成时才抛出 TimeoutError
         
         Args:
-            pipeline_id: 管道ID
+            pipeline_ids: 管道ID列表
             max_wait_time: 最大等待时间（秒）
+            initial_interval: 初始轮询间隔（秒）
+            max_interval: 最大轮询间隔（秒）
+            backoff: 无进度时的间隔放大倍数
             
-        Returns:
-            Dict: 最终管道状态
+        Yields:
+            Tuple[int, Dict]: (管道ID, 最终管道状态)
         """
-        start_time = time.time()
+        start_time = time.monotonic()
+        deadline = start_time + max_wait_time
+        # 管道ID -> 调度状态
+        pending = {
+            pipeline_id: {'next_poll': start_time, 'interval': initial_interval,
+                          'finished_tasks': None, 'progress_at': start_time}
+            for pipeline_id in pipeline_ids
+        }
         
-        while time.time() - start_time < max_wait_time:
-            status = self.client.get_pipeline_status(pipeline_id)
+        while pending:
+            now = time.monotonic()
+            # 最后一次轮询不早于截止时间，轮询前截止时间已到说明这一轮已轮询了全部未完成的管道
+            for pipeline_id in [pid for pid, state in pending.items() if state['next_poll'] <= now]:
+                state = pending[pipeline_id]
+                status = self.client.get_pipeline_status(pipeline_id)
+                
+                if status.get('status') in self.TERMINAL_STATUSES:
+                    del pending[pipeline_id]
+                    yield pipeline_id, status
+                    continue
+                
+                polled_at = time.monotonic()
+                finished = status.get('finishedTasks')
+                total = status.get('totalTasks')
+                
+                if finished is not None and state['finished_tasks'] is not None and finished > state['finished_tasks']:
+                    # 有进度: 按单个任务平均耗时估算剩余时间
+                    per_task = (polled_at - state['progress_at']) / (finished - state['finished_tasks'])
+                    remaining_tasks = max((total or finished + 1) - finished, 1)
+                    interval = per_task * remaining_tasks / 2
+                    state['progress_at'] = polled_at
+                else:
+                    interval = state['interval'] * backoff
+                
+                if finished is not None and state['finished_tasks'] is None:
+                    state['progress_at'] = polled_at
+                state['finished_tasks'] = finished
+                state['interval'] = min(max(interval, initial_interval), max_interval)
+                state['next_poll'] = min(polled_at + state['interval'], deadline)
+                
+                progress = f" ({finished}/{total})" if finished is not None and total else ""
+                print(f"管道{pipeline_id}运行中... 状态: {status.get('status', 'UNKNOWN')}{progress}")
             
-            if status.get('status') in ['COMPLETED', 'FAILED']:
-                return status
+            if not pending:
+                break
             
-            print(f"管道运行中... 状态: {status.get('status', 'UNKNOWN')}")
-            time.sleep(30)  # 等待30秒后再次检查
+            if now >= deadline:
+                raise TimeoutError(f"管道{sorted(pending)}在{max_wait_time}秒内未完成")
+            next_poll = min(state['next_poll'] for state in pending.values())
+            time.sleep(max(next_poll - time.monotonic(), 0))
+    
+    def wait_for_pipelines(self, pipeline_ids: List[int], max_wait_time: int = 1800,
+                           initial_interval: float = 2, max_interval: float = 60) -> Dict[int, Dict]:
+        """
+        并发等待多个管道完成
+        
+        Args:
+            pipeline_ids: 管道ID列表
+            max_wait_time: 最大等待时间（秒）
+            initial_interval: 初始轮询间隔（秒）
+            max_interval: 最大轮询间隔（秒）
+            
+        Returns:
+            Dict[int, Dict]: 管道ID -> 最终管道状态
+        """
+        return dict(self.iter_pipeline_completions(pipeline_ids, max_wait_time,
+                                                   initial_interval, max_interval))
+    
+    def wait_for_pipeline_completion(self, pipeline_id: int, max_wait_time: int = 1800) -> Dict:
+        """
+        等待管道完成（自适应轮询间隔）
         
-        raise TimeoutError(f"管道在{max_wait_time}秒内未完成")
+        Args:
+            pipeline_id: 管道ID
+            max_wait_time: 最大等待时间（秒）
+            
+        Returns:
+            Dict: 最终管道状态
+        """
+        for _, status in self.iter_pipeline_completions([pipeline_id], max_wait_time):
+            return status
 
 def main():
     """示例使用方法"""
@@ -272,16 +965,15 @@ def main():
         
         # 5. 检查管道
         print("5. 检查数据管道:")
-        pipelines = client.get_pipelines()
-        print(f"   找到 {len(pipelines)} 个管道")
-        
-        if pipelines:
-            for pipeline in pipelines:
-                print(f"   - 管道ID: {pipeline['id']}, 名称: {pipeline['name']}")
+        pipeline_count = 0
+        for pipeline in client.iter_pipelines():
+            pipeline_count += 1
+            print(f"   - 管道ID: {pipeline['id']}, 名称: {pipeline['name']}")
+        print(f"   找到 {pipeline_count} 个管道")
         print()
         
         # 6. 创建数据收集管道（如果需要）
-        if not pipelines:
+        if pipeline_count == 0:
             print("6. 创建数据收集管道:")
             pipeline = qdev_api.create_metrics_pipeline(connection_id)
             print(f"   管道已创建: ID={pipeline['id']}")
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+DevLake 异步API客户端
+基于asyncio + aiohttp，复用keep-alive连接池并限制单主机并发，
+批量测试连接、查询管道状态等扇出操作只需约一个往返时间
+"""
+
+import asyncio
+from typing import Any, Dict, Iterable, List, Optional
+
+try:
+    import aiohttp
+except ImportError:  # aiohttp为可选依赖，仅异步客户端需要
+    aiohttp = None
+
+
+class AsyncDevLakeAPIClient:
+    """DevLake 异步API客户端类（端点与 DevLakeAPIClient 保持一致）"""
+
+    def __init__(self, base_url: str = "http://localhost:8080", timeout: int = 30,
+                 pool_size: int = 100, per_host_limit: int = 20):
+        """
+        初始化异步API客户端
+
+        Args:
+            base_url: DevLake API基础URL
+            timeout: 请求超时时间（秒）
+            pool_size: 连接池最大连接数
+            per_host_limit: 单个主机的最大并发连接数
+        """
+        if aiohttp is None:
+            raise ImportError("异步API客户端需要安装aiohttp: pip install aiohttp")
+        self.base_url = base_url.rstrip('/')
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.pool_size = pool_size
+        self.per_host_limit = per_host_limit
+        self._session: Optional['aiohttp.ClientSession'] = None
+
+    async def __aenter__(self) -> 'AsyncDevLakeAPIClient':
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    def _get_session(self) -> 'aiohttp.ClientSession':
+        """延迟创建会话（必须在事件循环中调用）"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, limit_per_host=self.per_host_limit)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+        return self._session
+
+    async def close(self):
+        """关闭会话及连接池"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def _make_request(self, method: str, endpoint: str, **kwargs) -> Any:
+        """
+        发送HTTP请求
+
+        Args:
+            method: HTTP方法
+            endpoint: API端点
+            **kwargs: 其他请求参数
+
+        Returns:
+            Any: 解析后的JSON响应体
+        """
+        url = f"{self.base_url}/{endpoint.lstrip('/')}"
+
+        try:
+            async with self._get_session().request(method, url, **kwargs) as response:
+                response.raise_for_status()
+                return await response.json(content_type=None)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"API请求失败: {e}")
+            raise
+
+    async def get_version(self) -> Dict:
+        """获取DevLake版本信息"""
+        return await self._make_request('GET', '/version')
+
+    async def get_q_dev_connections(self) -> List[Dict]:
+        """获取Q Dev连接列表"""
+        return await self._make_request('GET', '/plugins/q_dev/connections')
+
+    async def create_q_dev_connection(self, connection_data: Dict) -> Dict:
+        """创建Q Dev连接"""
+        return await self._make_request('POST', '/plugins/q_dev/connections', json=connection_data)
+
+    async def get_connection_detail(self, connection_id: int) -> Dict:
+        """获取连接详细信息"""
+        return await self._make_request('GET', f'/plugins/q_dev/connections/{connection_id}')
+
+    async def test_connection(self, connection_id: int) -> Dict:
+        """测试连接"""
+        return await self._make_request('POST', f'/plugins/q_dev/connections/{connection_id}/test')
+
+    async def get_pipelines(self) -> List[Dict]:
+        """获取数据管道列表"""
+        return await self._make_request('GET', '/pipelines')
+
+    async def get_pipelines_page(self, page: int = 1, page_size: int = 100,
+                                 status: Optional[str] = None, label: Optional[str] = None) -> Dict:
+        """
+        获取一页数据管道（响应格式与 DevLakeAPIClient.get_pipelines_page 一致）
+
+        Returns:
+            Dict: {'pipelines': [...], 'count': 总数, 'bare_list': 响应体是否为旧版本的直接列表}
+        """
+        params = {'page': page, 'pageSize': page_size}
+        if status:
+            params['status'] = status
+        if label:
+            params['label'] = label
+
+        body = await self._make_request('GET', '/pipelines', params=params)
+        # 兼容直接返回列表的旧版本（不支持分页，列表即全部管道）
+        if isinstance(body, list):
+            return {'pipelines': body, 'count': None, 'bare_list': True}
+        return {'pipelines': body.get('pipelines') or [], 'count': body.get('count'), 'bare_list': False}
+
+    async def list_pipelines(self, page_size: int = 100, status: Optional[str] = None,
+                             label: Optional[str] = None) -> List[Dict]:
+        """
+        逐页读取全部数据管道
+
+        Args:
+            page_size: 每页数量
+            status: 按状态过滤（服务端过滤）
+            label: 按标签过滤（服务端过滤）
+
+        Returns:
+            List[Dict]: 全部管道
+        """
+        pipelines: List[Dict] = []
+        seen_ids = set()
+        page = 1
+        while True:
+            current = await self.get_pipelines_page(page, page_size, status, label)
+            new_items = [item for item in current['pipelines'] if item.get('id') not in seen_ids]
+            seen_ids.update(item.get('id') for item in new_items)
+            pipelines.extend(new_items)
+
+            count = current['count']
+            if (current['bare_list'] or not new_items or len(current['pipelines']) < page_size
+                    or (count is not None and len(pipelines) >= count)):
+                return pipelines
+            page += 1
+
+    async def create_pipeline(self, pipeline_data: Dict) -> Dict:
+        """创建数据管道"""
+        return await self._make_request('POST', '/pipelines', json=pipeline_data)
+
+    async def get_pipeline_status(self, pipeline_id: int) -> Dict:
+        """获取管道运行状态"""
+        return await self._make_request('GET', f'/pipelines/{pipeline_id}')
+
+    async def run_pipeline(self, pipeline_id: int) -> Dict:
+        """运行数据管道"""
+        return await self._make_request('POST', f'/pipelines/{pipeline_id}/run')
+
+    async def get_store_onboard(self) -> Dict:
+        """获取存储初始化状态"""
+        return await self._make_request('GET', '/store/onboard')
+
+    async def _gather_by_id(self, coroutine_factory, ids: Iterable[int]) -> Dict[int, Any]:
+        """并发执行并按ID返回结果；单个失败不影响其他请求，失败项的值为异常对象"""
+        ids = list(ids)
+        results = await asyncio.gather(*(coroutine_factory(i) for i in ids), return_exceptions=True)
+        return dict(zip(ids, results))
+
+    async def test_connections(self, connection_ids: Iterable[int]) -> Dict[int, Any]:
+        """
+        并发测试多个连接
+
+        Args:
+            connection_ids: 连接ID列表
+
+        Returns:
+            Dict[int, Any]: 连接ID -> 测试结果或异常
+        """
+        return await self._gather_by_id(self.test_connection, connection_ids)
+
+    async def get_pipeline_statuses(self, pipeline_ids: Iterable[int]) -> Dict[int, Any]:
+        """
+        并发查询多个管道状态
+
+        Args:
+            pipeline_ids: 管道ID列表
+
+        Returns:
+            Dict[int, Any]: 管道ID -> 管道状态或异常
+        """
+        return await self._gather_by_id(self.get_pipeline_status, pipeline_ids)
+
+
+async def main():
+    """示例使用方法"""
+    print("=== DevLake 异步API客户端示例 ===\n")
+
+    async with AsyncDevLakeAPIClient("http://<EC2-PUBLIC-IP>:8080") as client:
+        try:
+            connections = await client.get_q_dev_connections()
+            print(f"找到 {len(connections)} 个Q Dev连接")
+
+            # 并发测试所有连接
+            results = await client.test_connections(conn['id'] for conn in connections)
+            for connection_id, result in results.items():
+                if isinstance(result, Exception):
+                    print(f"   - 连接ID: {connection_id}, 测试失败: {result}")
+                else:
+                    print(f"   - 连接ID: {connection_id}, 测试结果: {result}")
+
+            # 并发查询所有管道状态
+            pipelines = await client.list_pipelines()
+            statuses = await client.get_pipeline_statuses(p['id'] for p in pipelines)
+            for pipeline_id, status in statuses.items():
+                if not isinstance(status, Exception):
+                    print(f"   - 管道ID: {pipeline_id}, 状态: {status.get('status', 'UNKNOWN')}")
+
+        except Exception as e:
+            print(f"执行错误: {e}")
+            return False
+
+    return True
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,17 @@
+import os
+import sys
+
+import pytest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TESTS_DIR, '..'))
+sys.path.insert(0, os.path.join(TESTS_DIR, '..', '..', 'benchmarks'))
+
+from mock_devlake_server import MockDevLakeServer, MockDevLakeState
+
+
+@pytest.fixture
+def server():
+    """每个测试独立的DevLake模拟服务（随机端口）"""
+    with MockDevLakeServer(state=MockDevLakeState(pipelines=5, connections=2)) as mock:
+        yield mock
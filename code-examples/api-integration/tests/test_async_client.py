@@ -0,0 +1,128 @@
+"""AsyncDevLakeAPIClient 分页与并发扇出（使用 benchmarks/mock_devlake_server.py 模拟服务）"""
+
+import asyncio
+import threading
+
+import pytest
+
+aiohttp = pytest.importorskip('aiohttp')
+
+from devlake_async_client import AsyncDevLakeAPIClient
+from mock_devlake_server import MockDevLakeHandler, MockDevLakeServer, MockDevLakeState
+
+
+def run(client, coroutine_function, *args, **kwargs):
+    """在新事件循环中执行客户端方法，结束后关闭会话"""
+    async def main():
+        async with client:
+            return await coroutine_function(*args, **kwargs)
+
+    return asyncio.run(main())
+
+
+def list_requests(server):
+    return [request for request in server.requests if request == ('GET', '/pipelines')]
+
+
+# ---- list_pipelines ----
+
+def test_list_pipelines_reads_every_page(server):
+    client = AsyncDevLakeAPIClient(server.url)
+    pipelines = run(client, client.list_pipelines, page_size=2)
+
+    assert [pipeline['id'] for pipeline in pipelines] == [5, 4, 3, 2, 1]
+    assert len(list_requests(server)) == 3
+
+
+def test_list_pipelines_exact_multiple_of_page_size_stops_on_count():
+    with MockDevLakeServer(state=MockDevLakeState(pipelines=10)) as server:
+        client = AsyncDevLakeAPIClient(server.url)
+        assert len(run(client, client.list_pipelines, page_size=5)) == 10
+        assert len(list_requests(server)) == 2
+
+
+def test_list_pipelines_bare_list_is_the_only_page(monkeypatch):
+    # 旧版本DevLake: 返回直接列表并忽略分页参数
+    def list_pipelines(self, query, body):
+        return 200, self.server.state.list_pipelines(None, None, None, None)[0]
+
+    monkeypatch.setattr(MockDevLakeHandler, 'list_pipelines', list_pipelines)
+    with MockDevLakeServer(state=MockDevLakeState(pipelines=12)) as server:
+        client = AsyncDevLakeAPIClient(server.url)
+        pipelines = run(client, client.list_pipelines, page_size=5)
+
+        assert [pipeline['id'] for pipeline in pipelines] == list(range(12, 0, -1))
+        assert len(list_requests(server)) == 1
+
+
+def test_list_pipelines_stops_when_server_ignores_paging(monkeypatch):
+    # 新格式响应但忽略分页参数、不返回count: 第二页没有新ID时停止
+    def list_pipelines(self, query, body):
+        return 200, {'pipelines': self.server.state.list_pipelines(None, None, None, None)[0]}
+
+    monkeypatch.setattr(MockDevLakeHandler, 'list_pipelines', list_pipelines)
+    with MockDevLakeServer(state=MockDevLakeState(pipelines=6)) as server:
+        client = AsyncDevLakeAPIClient(server.url)
+        pipelines = run(client, client.list_pipelines, page_size=5)
+
+        assert [pipeline['id'] for pipeline in pipelines] == list(range(6, 0, -1))
+        assert len(list_requests(server)) == 2
+
+
+def test_list_pipelines_passes_filters(server):
+    client = AsyncDevLakeAPIClient(server.url)
+    pipelines = run(client, client.list_pipelines, page_size=2, status='TASK_COMPLETED')
+
+    expected = [p['id'] for p in server.state.list_pipelines(None, None, 'TASK_COMPLETED')[0]]
+    assert [pipeline['id'] for pipeline in pipelines] == expected
+
+
+# ---- 并发扇出 ----
+
+def test_test_connections_returns_result_or_exception_per_id(server):
+    client = AsyncDevLakeAPIClient(server.url)
+    results = run(client, client.test_connections, [1, 2, 99])
+
+    assert list(results) == [1, 2, 99]
+    assert results[1] == results[2] == {'success': True, 'message': 'success'}
+    assert isinstance(results[99], aiohttp.ClientResponseError)
+    assert results[99].status == 404
+
+
+def test_get_pipeline_statuses_fans_out_one_request_per_id(server):
+    client = AsyncDevLakeAPIClient(server.url)
+    statuses = run(client, client.get_pipeline_statuses, range(1, 6))
+
+    assert {pipeline_id: status['id'] for pipeline_id, status in statuses.items()} == {i: i for i in range(1, 6)}
+    assert sorted(path for method, path in server.requests) == [f'/pipelines/{i}' for i in range(1, 6)]
+
+
+@pytest.fixture
+def in_flight(monkeypatch):
+    """记录模拟服务同时处理中的请求数的最大值"""
+    lock = threading.Lock()
+    state = {'current': 0, 'max': 0}
+    dispatch = MockDevLakeHandler._dispatch
+
+    def counting_dispatch(self, method):
+        with lock:
+            state['current'] += 1
+            state['max'] = max(state['max'], state['current'])
+        try:
+            dispatch(self, method)
+        finally:
+            with lock:
+                state['current'] -= 1
+
+    monkeypatch.setattr(MockDevLakeHandler, '_dispatch', counting_dispatch)
+    return state
+
+
+@pytest.mark.parametrize('per_host_limit', [1, 3])
+def test_fan_out_is_capped_by_per_host_limit(in_flight, per_host_limit):
+    with MockDevLakeServer(state=MockDevLakeState(pipelines=12), latency=0.05) as server:
+        client = AsyncDevLakeAPIClient(server.url, per_host_limit=per_host_limit)
+        statuses = run(client, client.get_pipeline_statuses, range(1, 13))
+
+    assert not any(isinstance(status, Exception) for status in statuses.values())
+    assert in_flight['max'] == per_host_limit
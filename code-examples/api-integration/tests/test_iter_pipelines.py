@@ -0,0 +1,69 @@
+"""DevLakeAPIClient.iter_pipelines 分页遍历（使用 benchmarks/mock_devlake_server.py 模拟服务）"""
+
+import pytest
+
+from devlake_api_client import DevLakeAPIClient
+from mock_devlake_server import MockDevLakeHandler, MockDevLakeServer, MockDevLakeState
+
+
+@pytest.mark.parametrize('prefetch', [True, False])
+def test_iterates_all_pages(prefetch):
+    with MockDevLakeServer(state=MockDevLakeState(pipelines=23)) as server:
+        client = DevLakeAPIClient(server.url)
+        ids = [pipeline['id'] for pipeline in client.iter_pipelines(page_size=5, prefetch=prefetch)]
+
+    assert ids == list(range(23, 0, -1))
+
+
+def test_exact_multiple_of_page_size_stops_on_count():
+    with MockDevLakeServer(state=MockDevLakeState(pipelines=10)) as server:
+        client = DevLakeAPIClient(server.url)
+        assert len(list(client.iter_pipelines(page_size=5, prefetch=False))) == 10
+        assert len(server.requests) == 2
+
+
+@pytest.fixture
+def legacy_server(monkeypatch):
+    """旧版本DevLake: 返回直接列表并忽略分页参数"""
+    def list_pipelines(self, query, body):
+        return 200, self.server.state.list_pipelines(None, None, None, None)[0]
+
+    monkeypatch.setattr(MockDevLakeHandler, 'list_pipelines', list_pipelines)
+    with MockDevLakeServer(state=MockDevLakeState(pipelines=12)) as server:
+        yield server
+
+
+@pytest.mark.parametrize('prefetch', [True, False])
+def test_bare_list_is_the_only_page(legacy_server, prefetch):
+    client = DevLakeAPIClient(legacy_server.url)
+    ids = [pipeline['id'] for pipeline in client.iter_pipelines(page_size=5, prefetch=prefetch)]
+
+    assert ids == list(range(12, 0, -1))
+    assert legacy_server.requests == [('GET', '/pipelines')]
+
+
+def test_stops_when_server_ignores_paging(monkeypatch):
+    # 新格式响应但忽略分页参数、不返回count: 第二页没有新ID时停止
+    def list_pipelines(self, query, body):
+        return 200, {'pipelines': self.server.state.list_pipelines(None, None, None, None)[0]}
+
+    monkeypatch.setattr(MockDevLakeHandler, 'list_pipelines', list_pipelines)
+    with MockDevLakeServer(state=MockDevLakeState(pipelines=6)) as server:
+        client = DevLakeAPIClient(server.url)
+        ids = [pipeline['id'] for pipeline in client.iter_pipelines(page_size=5, prefetch=False)]
+
+    assert ids == list(range(6, 0, -1))
+    assert len(server.requests) == 2
+
+
+def test_pipeline_created_between_pages_is_not_repeated():
+    # 新管道排在最前，上一页的最后一条顺延到下一页开头
+    with MockDevLakeServer(state=MockDevLakeState(pipelines=10)) as server:
+        client = DevLakeAPIClient(server.url)
+        ids = []
+        for pipeline in client.iter_pipelines(page_size=5, prefetch=False):
+            ids.append(pipeline['id'])
+            if len(ids) == 5:
+                server.state.create_pipeline({'name': 'created-while-iterating'})
+
+    assert ids == list(range(10, 0, -1))
@@ -0,0 +1,73 @@
+"""QDevMetricsAPI.iter_pipeline_completions 的截止时间（使用 benchmarks/mock_devlake_server.py 模拟服务）"""
+
+import time
+import types
+
+import pytest
+
+import devlake_api_client
+import mock_devlake_server
+from devlake_api_client import DevLakeAPIClient, QDevMetricsAPI
+from mock_devlake_server import MockDevLakeServer, MockDevLakeState
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """客户端和模拟服务共用的虚拟时钟: sleep 直接推进时钟"""
+    now = [0.0]
+
+    def sleep(seconds):
+        now[0] += seconds
+
+    fake_time = types.SimpleNamespace(sleep=sleep, monotonic=lambda: now[0], perf_counter=time.perf_counter)
+    monkeypatch.setattr(devlake_api_client, 'time', fake_time)
+    monkeypatch.setattr(mock_devlake_server, 'time', fake_time)
+    return now
+
+
+def start_pipeline(server, tasks):
+    """新建并运行一个有 tasks 个任务的管道"""
+    pipeline = server.state.create_pipeline({'plan': [[{'plugin': 'q_dev'}] * tasks]})
+    server.state.run_pipeline(pipeline['id'])
+    return pipeline['id']
+
+
+def poll_times(server, clock, pipeline_id):
+    """包装 get_pipeline，记录每次轮询时的虚拟时间"""
+    times = []
+    get_pipeline = server.state.get_pipeline
+
+    def recording_get_pipeline(requested_id):
+        if requested_id == pipeline_id:
+            times.append(clock[0])
+        return get_pipeline(requested_id)
+
+    server.state.get_pipeline = recording_get_pipeline
+    return times
+
+
+def test_last_poll_is_clamped_to_deadline(clock):
+    # 2个任务各1秒，2秒时完成；按1.5秒间隔轮询的下一次本应在3秒，截止时间2.5秒时仍要轮询一次
+    with MockDevLakeServer(state=MockDevLakeState(task_seconds=1.0)) as server:
+        pipeline_id = start_pipeline(server, tasks=2)
+        times = poll_times(server, clock, pipeline_id)
+        api = QDevMetricsAPI(DevLakeAPIClient(server.url))
+
+        completions = list(api.iter_pipeline_completions([pipeline_id], max_wait_time=2.5,
+                                                         initial_interval=1.5, max_interval=1.5))
+
+    assert [(pid, status['status']) for pid, status in completions] == [(pipeline_id, 'TASK_COMPLETED')]
+    assert times == [0.0, 1.5, 2.5]
+
+
+def test_timeout_after_poll_at_deadline(clock):
+    with MockDevLakeServer(state=MockDevLakeState(task_seconds=10.0)) as server:
+        pipeline_id = start_pipeline(server, tasks=2)
+        times = poll_times(server, clock, pipeline_id)
+        api = QDevMetricsAPI(DevLakeAPIClient(server.url))
+
+        with pytest.raises(TimeoutError):
+            list(api.iter_pipeline_completions([pipeline_id], max_wait_time=2.5,
+                                               initial_interval=1.5, max_interval=1.5))
+
+    assert times == [0.0, 1.5, 2.5]
@@ -0,0 +1,62 @@
+"""DevLakeAPIClient 响应缓存（使用 benchmarks/mock_devlake_server.py 模拟服务）"""
+
+import threading
+
+from devlake_api_client import DevLakeAPIClient, ResponseCache
+
+
+def test_get_is_served_from_cache_until_write(server):
+    cache = ResponseCache()
+    client = DevLakeAPIClient(server.url, cache=cache)
+
+    first = client.get_q_dev_connections()
+    assert client.get_q_dev_connections() == first
+    assert server.requests == [('GET', '/plugins/q_dev/connections')]
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    client.create_q_dev_connection({'name': 'new', 'bucket': 'b'})
+    assert len(client.get_q_dev_connections()) == len(first) + 1
+    assert cache.misses == 2
+
+
+def test_read_started_before_write_does_not_store_stale_body():
+    cache = ResponseCache()
+    generation = cache.generation
+
+    # 读请求进行中发生了写操作
+    cache.invalidate_all()
+    cache.put('/pipelines', ['stale'], 60, generation=generation)
+    assert cache.get('/pipelines') is None
+
+    cache.put('/pipelines', ['fresh'], 60, generation=cache.generation)
+    assert cache.get('/pipelines')['data'] == ['fresh']
+
+
+def test_revalidation_after_write_does_not_extend_entry():
+    cache = ResponseCache()
+    cache.put('/version', {'v': 1}, 0)
+    generation = cache.generation
+    expires_at = cache.get('/version')['expires_at']
+
+    cache._generation += 1
+    cache.refresh('/version', 60, generation)
+    assert cache.get('/version')['expires_at'] == expires_at
+
+
+def test_counters_are_exact_under_concurrency(server):
+    cache = ResponseCache()
+    client = DevLakeAPIClient(server.url, cache=cache)
+    client.get_version()
+
+    def worker():
+        for _ in range(200):
+            client.get_version()
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert cache.misses == 1
+    assert cache.hits == 8 * 200
@@ -0,0 +1,261 @@
+"""DevLakeAPIClient 重试策略与熔断器（使用 benchmarks/mock_devlake_server.py 模拟服务）"""
+
+import random
+import threading
+import time
+import types
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+import requests
+
+import devlake_api_client
+from devlake_api_client import CircuitBreaker, CircuitOpenError, DevLakeAPIClient, RetryPolicy
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """记录客户端的退避等待而不真正等待"""
+    recorded = []
+    fake_time = types.SimpleNamespace(sleep=recorded.append, perf_counter=time.perf_counter,
+                                      monotonic=time.monotonic)
+    monkeypatch.setattr(devlake_api_client, 'time', fake_time)
+    return recorded
+
+
+def make_client(server, max_retries=3, timeout=5, breaker=None, **policy):
+    return DevLakeAPIClient(server.url, timeout=timeout,
+                            retry_policy=RetryPolicy(max_retries=max_retries, **policy),
+                            circuit_breaker=breaker or CircuitBreaker(failure_threshold=100))
+
+
+# ---- 重试 ----
+
+@pytest.mark.parametrize('status', [502, 503])
+def test_get_retries_on_gateway_errors(server, sleeps, status):
+    server.inject_faults({'status': status}, {'status': status})
+    client = make_client(server)
+
+    assert client.get_version() == {'version': 'v1.0.0-mock'}
+    assert server.requests == [('GET', '/version')] * 3
+    assert len(sleeps) == 2
+
+
+def test_get_retries_on_timeout(server):
+    server.inject_faults({'delay': 1.0})
+    client = make_client(server, timeout=0.3, backoff_factor=0.01)
+
+    assert client.get_version() == {'version': 'v1.0.0-mock'}
+    assert len(server.requests) == 2
+
+
+def test_gives_up_after_max_retries(server, sleeps):
+    server.inject_faults(*[{'status': 503}] * 3)
+    client = make_client(server, max_retries=2)
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        client.get_version()
+    assert len(server.requests) == 3
+    assert len(sleeps) == 2
+
+
+def test_client_errors_are_not_retried(server, sleeps):
+    client = make_client(server)
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        client.get_pipeline_status(999)
+    assert len(server.requests) == 1
+    assert sleeps == []
+
+
+def test_non_idempotent_post_is_not_retried(server, sleeps):
+    server.inject_faults({'status': 503})
+    client = make_client(server)
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        client.create_pipeline({'name': 'p', 'plan': []})
+    assert server.requests == [('POST', '/pipelines')]
+    assert sleeps == []
+    # 服务端没有重复创建
+    assert len(server.state.pipelines) == 5
+
+
+def test_post_marked_idempotent_is_retried(server, sleeps):
+    server.inject_faults({'status': 503})
+    client = make_client(server)
+
+    assert client.test_connection(1)['success'] is True
+    assert server.requests == [('POST', '/plugins/q_dev/connections/1/test')] * 2
+
+
+def test_retry_after_seconds(server, sleeps):
+    server.inject_faults({'status': 503, 'headers': {'Retry-After': '7'}})
+    client = make_client(server)
+
+    client.get_version()
+    assert sleeps == [7.0]
+
+
+def test_retry_after_http_date(server, sleeps):
+    retry_at = datetime.now(timezone.utc) + timedelta(seconds=5)
+    server.inject_faults({'status': 429, 'headers': {'Retry-After': format_datetime(retry_at, usegmt=True)}})
+    client = make_client(server)
+
+    client.get_version()
+    assert len(sleeps) == 1
+    # HTTP日期精确到秒
+    assert 3.0 <= sleeps[0] <= 5.0
+
+
+def test_retry_after_is_capped(server, sleeps):
+    server.inject_faults({'status': 503, 'headers': {'Retry-After': '3600'}})
+    client = make_client(server, max_retry_after=10)
+
+    client.get_version()
+    assert sleeps == [10]
+
+
+def test_backoff_with_full_jitter_stays_within_bounds():
+    policy = RetryPolicy(backoff_factor=0.5, max_backoff=4)
+    random.seed(1)
+    for attempt in range(8):
+        ceiling = min(4, 0.5 * 2 ** attempt)
+        delays = [policy.get_delay(attempt) for _ in range(500)]
+        assert all(0 <= delay <= ceiling for delay in delays)
+        # 完全抖动: 等待时间分布在整个区间内，而不是集中在上限
+        assert min(delays) < ceiling * 0.1
+        assert max(delays) > ceiling * 0.9
+
+
+def test_backoff_is_used_without_retry_after(server, sleeps):
+    server.inject_faults({'status': 503}, {'status': 503}, {'status': 503})
+    client = make_client(server, backoff_factor=0.5, max_backoff=1.5)
+
+    client.get_version()
+    assert [delay <= ceiling for delay, ceiling in zip(sleeps, [0.5, 1.0, 1.5])] == [True] * 3
+
+
+# ---- 熔断器 ----
+
+def open_breaker(server, client, failures):
+    server.inject_faults(*[{'status': 503}] * failures)
+    for _ in range(failures):
+        with pytest.raises(requests.exceptions.HTTPError):
+            client.get_version()
+
+
+def test_breaker_opens_after_threshold_and_rejects_without_calling_server(server, sleeps):
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=60)
+    client = make_client(server, max_retries=0, breaker=breaker)
+
+    open_breaker(server, client, 2)
+    assert breaker.state == CircuitBreaker.OPEN
+
+    with pytest.raises(CircuitOpenError):
+        client.get_version()
+    assert len(server.requests) == 2
+
+
+def test_breaker_counts_only_consecutive_failures(server, sleeps):
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=60)
+    client = make_client(server, max_retries=0, breaker=breaker)
+
+    open_breaker(server, client, 1)
+    client.get_version()
+    open_breaker(server, client, 1)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_error_without_response_does_not_reset_failures(server, sleeps):
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=60)
+    client = make_client(server, max_retries=0, breaker=breaker)
+
+    open_breaker(server, client, 1)
+
+    # 既不是连接错误/超时也没有HTTP状态码的 RequestException，不能当作服务可用
+    def broken_hook(response, *args, **kwargs):
+        raise requests.exceptions.ContentDecodingError('broken response body')
+
+    client.session.hooks['response'].append(broken_hook)
+    with pytest.raises(requests.exceptions.ContentDecodingError):
+        client.get_version()
+    client.session.hooks['response'].remove(broken_hook)
+
+    open_breaker(server, client, 1)
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_half_open_allows_single_probe_then_closes(server, sleeps):
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0.2)
+    client = make_client(server, max_retries=0, breaker=breaker)
+
+    open_breaker(server, client, 1)
+    time.sleep(0.25)
+
+    # 探测请求在服务端停留期间，其他请求直接被拒绝
+    server.inject_faults({'delay': 0.5})
+    probe_result = {}
+    probe = threading.Thread(target=lambda: probe_result.update(client.get_version()))
+    probe.start()
+    deadline = time.monotonic() + 2
+    while len(server.requests) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+    with pytest.raises(CircuitOpenError):
+        client.get_version()
+    assert len(server.requests) == 2
+
+    probe.join()
+    assert probe_result == {'version': 'v1.0.0-mock'}
+    assert breaker.state == CircuitBreaker.CLOSED
+    client.get_version()
+    assert len(server.requests) == 3
+
+
+def test_failed_probe_reopens_breaker(server, sleeps):
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0.2)
+    client = make_client(server, max_retries=0, breaker=breaker)
+
+    open_breaker(server, client, 1)
+    time.sleep(0.25)
+
+    open_breaker(server, client, 1)
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        client.get_version()
+    assert len(server.requests) == 2
+
+
+def test_probe_raising_unexpected_error_releases_probe(server, sleeps):
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0.2)
+    client = make_client(server, max_retries=0, breaker=breaker)
+
+    open_breaker(server, client, 1)
+    time.sleep(0.25)
+
+    # 探测请求在响应钩子中抛出非 requests 异常，不经过 record_success / record_failure
+    def broken_hook(response, *args, **kwargs):
+        raise ValueError('broken response hook')
+
+    client.session.hooks['response'].append(broken_hook)
+    with pytest.raises(ValueError):
+        client.get_version()
+    client.session.hooks['response'].remove(broken_hook)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+    # 探测名额已释放，下一个请求重新探测并关闭熔断器
+    assert client.get_version() == {'version': 'v1.0.0-mock'}
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert len(server.requests) == 3
+
+
+def test_open_breaker_stops_retries(server, sleeps):
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=60)
+    server.inject_faults(*[{'status': 503}] * 5)
+    client = make_client(server, max_retries=5, breaker=breaker)
+
+    with pytest.raises(CircuitOpenError):
+        client.get_version()
+    assert len(server.requests) == 2
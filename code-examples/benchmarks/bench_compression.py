@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+导出文件压缩基准测试
+用 QDevJSONExporter.save_to_file 写出合成的用户日常数据，比较各压缩算法/级别的文件大小和吞吐量
+
+用法:
+    python bench_compression.py --rows 200000 --output compression_results.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data-export'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'database-access'))
+from json_exporter import QDevJSONExporter
+from qdev_compression import zstandard
+from synthetic_data import generate_user_daily_rows
+
+CODECS = [
+    (None, None),
+    ('gzip', 1),
+    ('gzip', 6),
+    ('gzip', 9),
+    ('zstd', 1),
+    ('zstd', 3),
+    ('zstd', 10)
+]
+
+
+def run(rows: int, pretty: bool = True):
+    """运行基准测试，返回各压缩配置的结果"""
+    exporter = QDevJSONExporter()
+    data = list(generate_user_daily_rows(rows))
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for compression, level in CODECS:
+            if compression == 'zstd' and zstandard is None:
+                print(f"跳过 zstd-{level}: 未安装zstandard")
+                continue
+
+            start = time.perf_counter()
+            filename = exporter.save_to_file(data, os.path.join(tmp_dir, 'daily_data.json'), pretty=pretty,
+                                             compression=compression, compression_level=level)
+            elapsed = time.perf_counter() - start
+            size = os.path.getsize(filename)
+            os.remove(filename)
+
+            results.append({
+                'codec': compression or 'none',
+                'level': level,
+                'bytes': size,
+                'seconds': round(elapsed, 3),
+                'rows_per_second': round(rows / elapsed)
+            })
+
+    uncompressed = results[0]['bytes']
+    for result in results:
+        result['ratio'] = round(uncompressed / result['bytes'], 2)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='导出文件压缩基准测试')
+    parser.add_argument('--rows', type=int, default=200000, help='合成日常数据行数')
+    parser.add_argument('--compact', action='store_true', help='不缩进（pretty=False）')
+    parser.add_argument('--output', help='结果JSON文件路径')
+    args = parser.parse_args()
+
+    results = run(args.rows, pretty=not args.compact)
+
+    print(f"{'codec':<8}{'level':>6}{'size(MB)':>12}{'ratio':>8}{'seconds':>10}{'rows/s':>12}")
+    for result in results:
+        print(f"{result['codec']:<8}{str(result['level'] or '-'):>6}{result['bytes'] / 1e6:>12.2f}"
+              f"{result['ratio']:>8}{result['seconds']:>10}{result['rows_per_second']:>12}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'rows': args.rows, 'pretty': not args.compact, 'results': results}, f, indent=2)
+        print(f"\n结果已保存到: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+JSON序列化后端基准测试
+在合成的用户日常数据（默认100万行，紧凑行形式，与导出器内部一致）上比较各序列化后端的耗时，
+并校验各后端输出在语义上一致
+
+用法:
+    python bench_serializers.py --rows 1000000 --output serializer_results.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'database-access'))
+from qdev_records import UserDailyRecord
+from qdev_serializer import SERIALIZERS, get_serializer, orjson
+from synthetic_data import generate_user_daily_rows
+
+VERIFY_ROWS = 10000
+
+
+def run(rows: int):
+    """运行基准测试，返回各后端在缩进/紧凑两种格式下的结果"""
+    print(f"生成 {rows} 行合成数据...")
+    data = {
+        'export_info': {'rows': rows},
+        'user_daily_data': [UserDailyRecord.from_dict(row) for row in generate_user_daily_rows(rows)]
+    }
+    names = [name for name in SERIALIZERS if name != 'orjson' or orjson is not None]
+    if orjson is None:
+        print("未安装orjson，只测试标准库后端")
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        filename = os.path.join(tmp_dir, 'daily_data.json')
+        for pretty in (True, False):
+            for name in names:
+                serializer = get_serializer(name)
+                start = time.perf_counter()
+                with open(filename, 'w', encoding='utf-8') as f:
+                    serializer.dump(data, f, pretty)
+                elapsed = time.perf_counter() - start
+                results.append({
+                    'serializer': name,
+                    'pretty': pretty,
+                    'bytes': os.path.getsize(filename),
+                    'seconds': round(elapsed, 3),
+                    'rows_per_second': round(rows / elapsed)
+                })
+
+    # 语义一致性校验（抽取前VERIFY_ROWS行）
+    sample = {'user_daily_data': data['user_daily_data'][:VERIFY_ROWS]}
+    decoded = [json.loads(get_serializer(name).dumps(sample)) for name in names]
+    identical = all(value == decoded[0] for value in decoded)
+    return results, identical
+
+
+def main():
+    parser = argparse.ArgumentParser(description='JSON序列化后端基准测试')
+    parser.add_argument('--rows', type=int, default=1000000, help='合成日常数据行数')
+    parser.add_argument('--output', help='结果JSON文件路径')
+    args = parser.parse_args()
+
+    results, identical = run(args.rows)
+
+    print(f"{'serializer':<12}{'pretty':>8}{'size(MB)':>12}{'seconds':>10}{'rows/s':>12}")
+    for result in results:
+        print(f"{result['serializer']:<12}{str(result['pretty']):>8}{result['bytes'] / 1e6:>12.2f}"
+              f"{result['seconds']:>10}{result['rows_per_second']:>12}")
+    print(f"\n输出语义一致: {identical}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'rows': args.rows, 'semantically_identical': identical, 'results': results}, f, indent=2)
+        print(f"结果已保存到: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
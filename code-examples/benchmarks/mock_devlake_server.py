@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+DevLake API模拟服务
+实现 DevLakeAPIClient / AsyncDevLakeAPIClient 使用的 /version、/pipelines、/plugins/q_dev/... 等端点，
+可配置响应延迟和故障率，也可按顺序注入指定的故障（状态码、响应头、延迟），
+供没有DevLake环境时的基准测试、联调和客户端测试使用
+
+用法:
+    python mock_devlake_server.py --port 8080 --pipelines 1000 --connections 20 --latency 0.02
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+PIPELINE_STATUSES = ('TASK_COMPLETED', 'TASK_COMPLETED', 'TASK_COMPLETED', 'TASK_FAILED', 'TASK_PARTIAL')
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+
+
+class MockDevLakeState:
+    """模拟服务的内存数据（连接、管道），多线程安全"""
+
+    def __init__(self, pipelines: int = 100, connections: int = 5, tasks_per_pipeline: int = 4,
+                 task_seconds: float = 0.5, seed: int = 42):
+        """
+        初始化模拟数据
+
+        Args:
+            pipelines: 预置的历史管道数（均为终态）
+            connections: 预置的Q Dev连接数
+            tasks_per_pipeline: 新建管道的任务数
+            task_seconds: 新建管道运行后每个任务的耗时（秒），用于模拟管道进度
+            seed: 随机种子
+        """
+        rng = random.Random(seed)
+        self.tasks_per_pipeline = tasks_per_pipeline
+        self.task_seconds = task_seconds
+        self._lock = threading.Lock()
+
+        self.connections: Dict[int, Dict] = {}
+        for connection_id in range(1, connections + 1):
+            self.connections[connection_id] = {
+                'id': connection_id,
+                'name': f"q_dev_connection_{connection_id}",
+                'region': 'us-east-1',
+                'bucket': f"qdev-metrics-{connection_id}",
+                'identityStoreId': f"d-{connection_id:010d}",
+                'identityStoreRegion': 'us-east-1',
+                'rateLimitPerHour': 20000
+            }
+
+        self.pipelines: Dict[int, Dict] = {}
+        started = datetime(2024, 1, 1)
+        for pipeline_id in range(1, pipelines + 1):
+            begin = started + timedelta(hours=pipeline_id)
+            self.pipelines[pipeline_id] = {
+                'id': pipeline_id,
+                'name': f"Q Dev Metrics Collection #{pipeline_id}",
+                'status': rng.choice(PIPELINE_STATUSES),
+                'totalTasks': tasks_per_pipeline,
+                'finishedTasks': tasks_per_pipeline,
+                'beganAt': begin.isoformat() + 'Z',
+                'finishedAt': (begin + timedelta(minutes=rng.randint(1, 30))).isoformat() + 'Z',
+                'labels': ['q_dev'],
+                'plan': [[{'plugin': 'q_dev', 'connectionId': rng.randint(1, max(connections, 1))}]]
+            }
+        # 新建管道的运行开始时间: 管道ID -> time.monotonic()
+        self._running: Dict[int, float] = {}
+
+    def list_connections(self) -> List[Dict]:
+        with self._lock:
+            return list(self.connections.values())
+
+    def create_connection(self, data: Dict) -> Dict:
+        with self._lock:
+            connection_id = max(self.connections, default=0) + 1
+            connection = {key: value for key, value in data.items() if key != 'secretAccessKey'}
+            connection['id'] = connection_id
+            self.connections[connection_id] = connection
+            return connection
+
+    def get_connection(self, connection_id: int) -> Optional[Dict]:
+        with self._lock:
+            return self.connections.get(connection_id)
+
+    def list_pipelines(self, page: Optional[int], page_size: Optional[int],
+                       status: Optional[str] = None, label: Optional[str] = None) -> Tuple[List[Dict], int]:
+        """按ID倒序分页（与DevLake一致，最新的管道在前）"""
+        with self._lock:
+            pipelines = [self._refresh(pipeline) for pipeline in
+                         sorted(self.pipelines.values(), key=lambda p: p['id'], reverse=True)]
+        if status:
+            pipelines = [p for p in pipelines if p['status'] == status]
+        if label:
+            pipelines = [p for p in pipelines if label in p.get('labels', [])]
+        if page is None or page_size is None:
+            return pipelines, len(pipelines)
+        offset = (page - 1) * page_size
+        return pipelines[offset:offset + page_size], len(pipelines)
+
+    def create_pipeline(self, data: Dict) -> Dict:
+        with self._lock:
+            pipeline_id = max(self.pipelines, default=0) + 1
+            plan = data.get('plan') or []
+            total = sum(len(stage) for stage in plan) or self.tasks_per_pipeline
+            pipeline = {
+                'id': pipeline_id,
+                'name': data.get('name', f"pipeline-{pipeline_id}"),
+                'status': 'TASK_CREATED',
+                'totalTasks': total,
+                'finishedTasks': 0,
+                'beganAt': None,
+                'finishedAt': None,
+                'labels': data.get('labels', []),
+                'plan': plan
+            }
+            self.pipelines[pipeline_id] = pipeline
+            return dict(pipeline)
+
+    def run_pipeline(self, pipeline_id: int) -> Optional[Dict]:
+        with self._lock:
+            pipeline = self.pipelines.get(pipeline_id)
+            if pipeline is None:
+                return None
+            self._running[pipeline_id] = time.monotonic()
+            pipeline.update({'status': 'TASK_RUNNING', 'beganAt': _now_iso()})
+            return dict(pipeline)
+
+    def get_pipeline(self, pipeline_id: int) -> Optional[Dict]:
+        with self._lock:
+            pipeline = self.pipelines.get(pipeline_id)
+            return self._refresh(pipeline) if pipeline is not None else None
+
+    def _refresh(self, pipeline: Dict) -> Dict:
+        """按运行时长推进新建管道的进度（需持有锁），返回副本"""
+        started = self._running.get(pipeline['id'])
+        if started is not None and pipeline['status'] == 'TASK_RUNNING':
+            finished = int((time.monotonic() - started) / self.task_seconds) if self.task_seconds > 0 \
+                else pipeline['totalTasks']
+            pipeline['finishedTasks'] = min(finished, pipeline['totalTasks'])
+            if pipeline['finishedTasks'] >= pipeline['totalTasks']:
+                pipeline.update({'status': 'TASK_COMPLETED', 'finishedAt': _now_iso()})
+                del self._running[pipeline['id']]
+        return dict(pipeline)
+
+
+class MockDevLakeHandler(BaseHTTPRequestHandler):
+    """请求处理器；state、latency、failure_rate 由 MockDevLakeServer 设置在server上"""
+
+    protocol_version = 'HTTP/1.1'
+    # 响应头和响应体分两次写出，不关闭Nagle算法时keep-alive请求会额外等待约40ms（延迟确认）
+    disable_nagle_algorithm = True
+
+    ROUTES = [
+        ('GET', re.compile(r'^/version$'), 'version'),
+        ('GET', re.compile(r'^/store/onboard$'), 'store_onboard'),
+        ('GET', re.compile(r'^/plugins/q_dev/connections$'), 'list_connections'),
+        ('POST', re.compile(r'^/plugins/q_dev/connections$'), 'create_connection'),
+        ('GET', re.compile(r'^/plugins/q_dev/connections/(\d+)$'), 'get_connection'),
+        ('POST', re.compile(r'^/plugins/q_dev/connections/(\d+)/test$'), 'test_connection'),
+        ('GET', re.compile(r'^/pipelines$'), 'list_pipelines'),
+        ('POST', re.compile(r'^/pipelines$'), 'create_pipeline'),
+        ('GET', re.compile(r'^/pipelines/(\d+)$'), 'get_pipeline'),
+        ('POST', re.compile(r'^/pipelines/(\d+)/run$'), 'run_pipeline')
+    ]
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def _dispatch(self, method: str):
+        url = urlparse(self.path)
+        length = int(self.headers.get('Content-Length') or 0)
+        body = json.loads(self.rfile.read(length) or b'null') if length else None
+
+        fault = self.server.next_fault(method, url.path)
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        if fault is not None:
+            if fault.get('delay'):
+                time.sleep(fault['delay'])
+            if fault.get('status'):
+                self._send(fault['status'], {'message': 'injected failure'}, headers=fault.get('headers'))
+                return
+        if self.server.failure_rate and random.random() < self.server.failure_rate:
+            self._send(503, {'message': 'mock failure'})
+            return
+
+        for route_method, pattern, handler_name in self.ROUTES:
+            match = pattern.match(url.path)
+            if match and route_method == method:
+                args = [int(group) for group in match.groups()]
+                status, payload = getattr(self, handler_name)(parse_qs(url.query), body, *args)
+                self._send(status, payload, cacheable=(method == 'GET'))
+                return
+        self._send(404, {'message': f"not found: {method} {url.path}"})
+
+    def _send(self, status: int, payload, cacheable: bool = False, headers: Optional[Dict[str, str]] = None):
+        data = json.dumps(payload).encode('utf-8')
+        etag = None
+        if cacheable and status == 200:
+            etag = '"' + hashlib.md5(data).hexdigest() + '"'
+            if self.headers.get('If-None-Match') == etag:
+                status, data = 304, b''
+
+        self.send_response(status)
+        if etag:
+            self.send_header('ETag', etag)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if data:
+            self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    # ---- 端点 ----
+
+    def version(self, query, body):
+        return 200, {'version': 'v1.0.0-mock'}
+
+    def store_onboard(self, query, body):
+        return 200, {'step': 4, 'done': True}
+
+    def list_connections(self, query, body):
+        return 200, self.server.state.list_connections()
+
+    def create_connection(self, query, body):
+        return 200, self.server.state.create_connection(body or {})
+
+    def get_connection(self, query, body, connection_id):
+        connection = self.server.state.get_connection(connection_id)
+        return (200, connection) if connection else (404, {'message': 'connection not found'})
+
+    def test_connection(self, query, body, connection_id):
+        if self.server.state.get_connection(connection_id) is None:
+            return 404, {'message': 'connection not found'}
+        return 200, {'success': True, 'message': 'success'}
+
+    def list_pipelines(self, query, body):
+        def first(name):
+            values = query.get(name)
+            return values[0] if values else None
+
+        page = int(first('page')) if first('page') else None
+        page_size = int(first('pageSize')) if first('pageSize') else None
+        pipelines, count = self.server.state.list_pipelines(page, page_size, first('status'), first('label'))
+        return 200, {'pipelines': pipelines, 'count': count}
+
+    def create_pipeline(self, query, body):
+        return 200, self.server.state.create_pipeline(body or {})
+
+    def get_pipeline(self, query, body, pipeline_id):
+        pipeline = self.server.state.get_pipeline(pipeline_id)
+        return (200, pipeline) if pipeline else (404, {'message': 'pipeline not found'})
+
+    def run_pipeline(self, query, body, pipeline_id):
+        pipeline = self.server.state.run_pipeline(pipeline_id)
+        return (200, pipeline) if pipeline else (404, {'message': 'pipeline not found'})
+
+
+class _MockHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # 默认监听队列只有5，并发扇出（异步客户端、线程池）时新连接会因SYN重传额外等待1秒
+    request_queue_size = 128
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.faults: deque = deque()
+        self.requests: List[Tuple[str, str]] = []
+        self._faults_lock = threading.Lock()
+
+    def next_fault(self, method: str, path: str) -> Optional[Dict]:
+        """记录请求，并取出下一个注入的故障（没有时为None）"""
+        with self._faults_lock:
+            self.requests.append((method, path))
+            return self.faults.popleft() if self.faults else None
+
+
+class MockDevLakeServer:
+    """在后台线程运行的模拟服务（可作为上下文管理器使用）"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, state: Optional[MockDevLakeState] = None,
+                 latency: float = 0.0, failure_rate: float = 0.0):
+        """
+        初始化模拟服务
+
+        Args:
+            host: 监听地址
+            port: 监听端口，0为随机端口
+            state: 模拟数据，默认 MockDevLakeState()
+            latency: 每个请求的固定延迟（秒），模拟网络往返
+            failure_rate: 返回503的概率，用于测试重试和熔断
+        """
+        self.httpd = _MockHTTPServer((host, port), MockDevLakeHandler)
+        self.httpd.state = state or MockDevLakeState()
+        self.httpd.latency = latency
+        self.httpd.failure_rate = failure_rate
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def state(self) -> MockDevLakeState:
+        return self.httpd.state
+
+    def inject_faults(self, *faults: Dict):
+        """
+        按顺序为接下来的请求注入故障，每个请求消耗一个
+
+        Args:
+            *faults: {'status': 状态码, 'headers': 响应头} 直接返回错误响应；
+                     {'delay': 秒数} 延迟后正常处理（可与status组合）
+        """
+        with self.httpd._faults_lock:
+            self.httpd.faults.extend(faults)
+
+    @property
+    def requests(self) -> List[Tuple[str, str]]:
+        """已收到的请求 (方法, 路径)"""
+        with self.httpd._faults_lock:
+            return list(self.httpd.requests)
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'MockDevLakeServer':
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> 'MockDevLakeServer':
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='DevLake API模拟服务')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--pipelines', type=int, default=100, help='预置管道数')
+    parser.add_argument('--connections', type=int, default=5, help='预置Q Dev连接数')
+    parser.add_argument('--latency', type=float, default=0.0, help='每个请求的延迟（秒）')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='返回503的概率')
+    args = parser.parse_args()
+
+    state = MockDevLakeState(pipelines=args.pipelines, connections=args.connections)
+    server = MockDevLakeServer(args.host, args.port, state, args.latency, args.failure_rate)
+    print(f"DevLake模拟服务运行在 {server.url}（Ctrl+C 退出）")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Q Dev合成数据生成器
+生成与 _tool_q_dev_user_data / _tool_q_dev_user_metrics 结构一致的数据，供基准测试使用；
+也可以直接写入本地MySQL，作为没有DevLake环境时的数据源
+
+用法（写入本地MySQL，N个用户 × D天）:
+    docker run -d --name qdev-mysql -p 3306:3306 -e MYSQL_ROOT_PASSWORD=root \\
+        -e MYSQL_DATABASE=lake -e MYSQL_USER=merico -e MYSQL_PASSWORD=merico mysql:8
+    python synthetic_data.py --users 500 --days 90 --connections 1 --reset
+"""
+
+import argparse
+import random
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+# 与DevLake工具表一致的列，只有自增主键和连接ID主键，不带额外的二级索引
+USER_DATA_DDL = """
+CREATE TABLE IF NOT EXISTS _tool_q_dev_user_data (
+    id BIGINT UNSIGNED NOT NULL AUTO_INCREMENT,
+    connection_id BIGINT UNSIGNED NOT NULL,
+    user_id VARCHAR(255) NOT NULL,
+    display_name VARCHAR(255),
+    date DATE NOT NULL,
+    inline_suggestions_count INT NOT NULL DEFAULT 0,
+    inline_acceptance_count INT NOT NULL DEFAULT 0,
+    inline_ai_code_lines INT NOT NULL DEFAULT 0,
+    chat_messages_sent INT NOT NULL DEFAULT 0,
+    chat_messages_interacted INT NOT NULL DEFAULT 0,
+    code_fix_generation_event_count INT NOT NULL DEFAULT 0,
+    test_generation_event_count INT NOT NULL DEFAULT 0,
+    doc_generation_event_count INT NOT NULL DEFAULT 0,
+    transformation_event_count INT NOT NULL DEFAULT 0,
+    created_at DATETIME(3),
+    updated_at DATETIME(3),
+    PRIMARY KEY (connection_id, id)
+)"""
+
+USER_METRICS_DDL = """
+CREATE TABLE IF NOT EXISTS _tool_q_dev_user_metrics (
+    connection_id BIGINT UNSIGNED NOT NULL,
+    user_id VARCHAR(255) NOT NULL,
+    display_name VARCHAR(255),
+    first_date DATE,
+    last_date DATE,
+    total_days INT,
+    total_inline_suggestions_count INT,
+    total_inline_acceptance_count INT,
+    acceptance_rate DOUBLE,
+    total_inline_ai_code_lines INT,
+    avg_inline_suggestions_count DOUBLE,
+    avg_inline_acceptance_count DOUBLE,
+    total_code_review_findings_count INT,
+    created_at DATETIME(3),
+    updated_at DATETIME(3),
+    PRIMARY KEY (connection_id, user_id)
+)"""
+
+USER_DATA_COLUMNS = (
+    'connection_id', 'user_id', 'display_name', 'date', 'inline_suggestions_count',
+    'inline_acceptance_count', 'inline_ai_code_lines', 'chat_messages_sent', 'chat_messages_interacted',
+    'code_fix_generation_event_count', 'test_generation_event_count', 'doc_generation_event_count',
+    'transformation_event_count', 'created_at', 'updated_at'
+)
+
+USER_METRICS_COLUMNS = (
+    'connection_id', 'user_id', 'display_name', 'first_date', 'last_date', 'total_days',
+    'total_inline_suggestions_count', 'total_inline_acceptance_count', 'acceptance_rate',
+    'total_inline_ai_code_lines', 'avg_inline_suggestions_count', 'avg_inline_acceptance_count',
+    'total_code_review_findings_count', 'created_at', 'updated_at'
+)
+
+
+def generate_user_daily_rows(rows: int, users: int = 500, end_date: Optional[date] = None,
+                             seed: int = 42, normalized: bool = True) -> Iterator[Dict]:
+    """
+    生成用户日常数据行（按日期倒序、用户ID排序，与导出查询一致）
+
+    Args:
+        rows: 行数
+        users: 用户数（每天每个用户一行）
+        end_date: 最后一天，默认为今天
+        seed: 随机种子
+        normalized: True时created_at为ISO字符串（与导出结果一致），False时为datetime（与数据库返回一致）
+
+    Returns:
+        Iterator[Dict]: 日常数据行
+    """
+    rng = random.Random(seed)
+    end_date = end_date or date.today()
+    user_ids = [f"user-{i:05d}" for i in range(users)]
+
+    for i in range(rows):
+        day = end_date - timedelta(days=i // users)
+        user_id = user_ids[i % users]
+        suggestions = rng.randint(0, 200)
+        created_at = datetime.combine(day, datetime.min.time()) + timedelta(hours=26, seconds=rng.randint(0, 3599))
+        yield {
+            'user_id': user_id,
+            'display_name': f"Developer {user_id[5:]}",
+            'date': day,
+            'inline_suggestions_count': suggestions,
+            'inline_acceptance_count': rng.randint(0, suggestions),
+            'inline_ai_code_lines': rng.randint(0, 500),
+            'chat_messages_sent': rng.randint(0, 40),
+            'chat_messages_interacted': rng.randint(0, 20),
+            'code_fix_generation_event_count': rng.randint(0, 5),
+            'test_generation_event_count': rng.randint(0, 5),
+            'doc_generation_event_count': rng.randint(0, 3),
+            'transformation_event_count': rng.randint(0, 1),
+            'created_at': created_at.isoformat() if normalized else created_at
+        }
+
+
+def generate_user_metrics_rows(daily_rows: Iterable[Dict], seed: int = 42) -> List[Dict]:
+    """
+    由日常数据汇总出用户聚合指标行（与DevLake的汇总口径一致: 接受率 = 接受数 / 建议数）
+
+    Args:
+        daily_rows: generate_user_daily_rows(..., normalized=False) 生成的日常数据
+        seed: 随机种子（代码审查发现数为随机值）
+
+    Returns:
+        List[Dict]: 按用户ID排序的聚合指标行
+    """
+    rng = random.Random(seed)
+    by_user: Dict[str, Dict] = {}
+    for row in daily_rows:
+        totals = by_user.get(row['user_id'])
+        if totals is None:
+            totals = by_user[row['user_id']] = {
+                'user_id': row['user_id'], 'display_name': row['display_name'],
+                'first_date': row['date'], 'last_date': row['date'], 'total_days': 0,
+                'total_inline_suggestions_count': 0, 'total_inline_acceptance_count': 0,
+                'total_inline_ai_code_lines': 0, 'updated_at': row['created_at']
+            }
+        totals['first_date'] = min(totals['first_date'], row['date'])
+        totals['last_date'] = max(totals['last_date'], row['date'])
+        totals['total_days'] += 1
+        totals['total_inline_suggestions_count'] += row['inline_suggestions_count']
+        totals['total_inline_acceptance_count'] += row['inline_acceptance_count']
+        totals['total_inline_ai_code_lines'] += row['inline_ai_code_lines']
+        totals['updated_at'] = max(totals['updated_at'], row['created_at'])
+
+    rows = []
+    for user_id in sorted(by_user):
+        totals = by_user[user_id]
+        suggestions = totals['total_inline_suggestions_count']
+        acceptances = totals['total_inline_acceptance_count']
+        days = totals['total_days']
+        totals.update({
+            'acceptance_rate': acceptances / suggestions if suggestions else 0.0,
+            'avg_inline_suggestions_count': suggestions / days,
+            'avg_inline_acceptance_count': acceptances / days,
+            'total_code_review_findings_count': rng.randint(0, 50),
+            'created_at': datetime.combine(totals['first_date'], datetime.min.time()) + timedelta(days=1)
+        })
+        rows.append(totals)
+    return rows
+
+
+def _insert_rows(cursor, table: str, columns: Sequence[str], rows: Iterable[Dict],
+                 connection_id: int, batch_size: int) -> int:
+    """分批写入（mysql-connector会把executemany的INSERT改写为多行INSERT）"""
+    query = (f"INSERT INTO {table} ({', '.join(columns)}) "
+             f"VALUES ({', '.join(['%s'] * len(columns))})")
+    total = 0
+    batch = []
+    for row in rows:
+        values = dict(row, connection_id=connection_id)
+        values.setdefault('updated_at', values['created_at'])
+        batch.append(tuple(values[column] for column in columns))
+        if len(batch) >= batch_size:
+            cursor.executemany(query, batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        cursor.executemany(query, batch)
+        total += len(batch)
+    return total
+
+
+def load_mysql(config: Dict, users: int = 500, days: int = 90, connection_ids: Sequence[int] = (1,),
+               end_date: Optional[date] = None, seed: int = 42, reset: bool = False,
+               batch_size: int = 5000) -> Dict[int, Dict[str, int]]:
+    """
+    在MySQL（或兼容数据库）中建表并写入合成数据
+
+    每个连接写入 users × days 行日常数据以及对应的 users 行聚合指标；
+    不同连接使用不同的随机种子
+
+    Args:
+        config: mysql.connector.connect 连接参数
+        users: 每个连接的用户数
+        days: 天数（截止到end_date）
+        connection_ids: 写入的连接ID
+        end_date: 最后一天，默认为今天
+        seed: 随机种子
+        reset: 是否先删除已有的两张表
+        batch_size: 每批写入行数
+
+    Returns:
+        Dict[int, Dict[str, int]]: 连接ID -> {'user_data': 行数, 'user_metrics': 行数}
+    """
+    import mysql.connector
+
+    connection = mysql.connector.connect(**config)
+    try:
+        cursor = connection.cursor()
+        if reset:
+            cursor.execute("DROP TABLE IF EXISTS _tool_q_dev_user_data")
+            cursor.execute("DROP TABLE IF EXISTS _tool_q_dev_user_metrics")
+        cursor.execute(USER_DATA_DDL)
+        cursor.execute(USER_METRICS_DDL)
+
+        loaded = {}
+        for index, connection_id in enumerate(connection_ids):
+            cursor.execute("DELETE FROM _tool_q_dev_user_data WHERE connection_id = %s", (connection_id,))
+            cursor.execute("DELETE FROM _tool_q_dev_user_metrics WHERE connection_id = %s", (connection_id,))
+
+            daily_rows = list(generate_user_daily_rows(users * days, users, end_date,
+                                                       seed + index, normalized=False))
+            print(f"连接 {connection_id}: 写入 {len(daily_rows)} 行日常数据...")
+            data_count = _insert_rows(cursor, '_tool_q_dev_user_data', USER_DATA_COLUMNS,
+                                      daily_rows, connection_id, batch_size)
+            metrics_count = _insert_rows(cursor, '_tool_q_dev_user_metrics', USER_METRICS_COLUMNS,
+                                         generate_user_metrics_rows(daily_rows, seed + index),
+                                         connection_id, batch_size)
+            connection.commit()
+            loaded[connection_id] = {'user_data': data_count, 'user_metrics': metrics_count}
+        cursor.close()
+        return loaded
+    finally:
+        connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='向本地MySQL写入Q Dev合成数据')
+    parser.add_argument('--users', type=int, default=500, help='每个连接的用户数')
+    parser.add_argument('--days', type=int, default=90, help='天数')
+    parser.add_argument('--connections', type=int, default=1, help='连接数（连接ID从1开始）')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子')
+    parser.add_argument('--reset', action='store_true', help='先删除已有的表')
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=3306)
+    parser.add_argument('--user', default='merico')
+    parser.add_argument('--password', default='merico')
+    parser.add_argument('--database', default='lake')
+    args = parser.parse_args()
+
+    config = {'host': args.host, 'port': args.port, 'user': args.user,
+              'password': args.password, 'database': args.database}
+    loaded = load_mysql(config, args.users, args.days, range(1, args.connections + 1),
+                        seed=args.seed, reset=args.reset)
+    for connection_id, counts in loaded.items():
+        print(f"连接 {connection_id}: 日常数据 {counts['user_data']} 行，聚合指标 {counts['user_metrics']} 行")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,18 +4,78 @@ Q Dev指标数据JSON导出器
 支持多种导出格式和自定义查询
 """
 
-import mysql.connector
 import json
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Iterator, Callable, Tuple, Sequence
+from concurrent.futures import ThreadPoolExecutor
 import os
+import sys
+
+# 与 database-access/qdev_database_demo.py 共享连接池
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'database-access'))
+from qdev_db_pool import get_pool
+from qdev_watermark import (WatermarkStore, USER_METRICS_KEY, USER_DAILY_DATA_KEY, drop_seen_rows,
+                            watermark_from_rows)
+from qdev_normalize import normalize_rows, build_column_plan, apply_column_plan
+from qdev_arrow import user_metrics_schema, user_daily_data_schema, write_rows_to_parquet
+from qdev_partitions import PARTITION_GRANULARITIES, PartitionManifest, date_partitions
+from qdev_compression import output_filename, open_output
+from qdev_metrics import MetricsRegistry, instrumented
+from qdev_pagination import DAILY_DATA_ORDER, KeysetOrder, metric_order, paginate_query
+from qdev_records import UserMetricsRecord, UserDailyRecord, fetch_records, records_to_dicts
+from qdev_serializer import get_serializer
+from qdev_rollup import QDevRollupStore
+from qdev_aggregates import (aggregate_user_metrics, compute_daily_trends, compute_user_rankings,
+                             merge_daily_trends)
+from qdev_rankings import (RankingSpec, USER_METRICS_RANKINGS, DAILY_WINDOW_RANKINGS, DAILY_SUM_COLUMNS,
+                           rank_rows, rank_daily_windows, merge_rankings)
+
+
+class _SinglePassDailyRecord(UserDailyRecord):
+    """单次扫描读取的日常数据行，附带数据库计算的范围标记（不属于输出字段）"""
+    
+    __slots__ = ('_in_daily_range', '_in_trend_window')
+
 
 class QDevJSONExporter:
     """Q Dev指标JSON导出器"""
     
+    # _tool_q_dev_user_data 导出列
+    USER_DAILY_DATA_COLUMNS = """
+            user_id,
+            display_name,
+            date,
+            inline_suggestions_count,
+            inline_acceptance_count,
+            inline_ai_code_lines,
+            chat_messages_sent,
+            chat_messages_interacted,
+            code_fix_generation_event_count,
+            test_generation_event_count,
+            doc_generation_event_count,
+            transformation_event_count,
+            created_at"""
+    
+    # 增量读取时额外选择 updated_at（水位线列）
+    USER_DAILY_CHANGE_COLUMNS = USER_DAILY_DATA_COLUMNS + """,
+            updated_at"""
+    
     def __init__(self, host: str = 'localhost', port: int = 3306, 
-                 user: str = 'merico', password: str = 'merico', database: str = 'lake'):
-        """初始化导出器"""
+                 user: str = 'merico', password: str = 'merico', database: str = 'lake',
+                 pool_size: int = 5, pool_max_idle_time: float = 300,
+                 rollup_store: Optional[QDevRollupStore] = None,
+                 serializer: Optional[str] = 'auto',
+                 metrics: Optional[MetricsRegistry] = None):
+        """
+        初始化导出器
+        
+        Args:
+            rollup_store: 本地汇总库；设置后日常趋势和排行榜从本地查询，只向MySQL增量同步
+                          （源库删除的行需另行定期调用 rollup_store.reconcile 清理）
+            serializer: JSON序列化后端 'auto'（有orjson时使用orjson）、'orjson' 或 'json'
+            metrics: 指标注册表（各阶段耗时、行数、字节数），默认与连接池共用进程级注册表；
+                     连接、查询执行和取数阶段始终记录在连接池的注册表中
+        """
         self.config = {
             'host': host,
             'port': port,
@@ -23,13 +83,35 @@ class QDevJSONExporter:
             'password': password,
             'database': database
         }
+        self.pool = get_pool(self.config, pool_size=pool_size, max_idle_time=pool_max_idle_time)
+        self.rollup_store = rollup_store
+        self.serializer = get_serializer(serializer)
+        self.metrics = metrics or self.pool.metrics
     
     def get_connection(self):
-        """获取数据库连接"""
-        return mysql.connector.connect(**self.config)
+        """从共享连接池获取数据库连接（close()即归还）"""
+        return self.pool.get_connection()
     
-    def export_user_metrics_summary(self, connection_id: int = 1) -> List[Dict]:
-        """导出用户指标汇总数据"""
+    def _normalize(self, rows: List, description=None, float_digits: Optional[int] = None) -> List:
+        """normalize_rows 并计入 normalize 阶段耗时"""
+        with self.metrics.phase('normalize') as current:
+            current.rows = len(rows)
+            return normalize_rows(rows, description, float_digits)
+    
+    def _fetch_user_metrics_rows(self, connection_id: int = 1,
+                                 updated_since: Optional[str] = None,
+                                 order_by: str = 'total_inline_suggestions_count',
+                                 after: Optional[Sequence] = None,
+                                 limit: Optional[int] = None) -> List[UserMetricsRecord]:
+        """
+        读取用户指标汇总原始行（紧凑行，未做类型转换）
+        
+        Args:
+            updated_since: 增量读取的时间水位线
+            order_by: 倒序排序的指标列（同值按user_id）
+            after: 键集分页的上一页最后排序键值
+            limit: 最多读取的行数
+        """
         query = """
         SELECT 
             user_id,
@@ -48,44 +130,55 @@ class QDevJSONExporter:
             updated_at
         FROM _tool_q_dev_user_metrics
         WHERE connection_id = %s
-        ORDER BY total_inline_suggestions_count DESC
         """
         
+        params = [connection_id]
+        
+        if updated_since:
+            query += " AND updated_at >= %s"
+            params.append(updated_since)
+        
+        query, params = paginate_query(query, params, metric_order(order_by), after, limit)
+        
         conn = self.get_connection()
         try:
-            cursor = conn.cursor(dictionary=True)
-            cursor.execute(query, [connection_id])
-            results = cursor.fetchall()
-            
-            # 转换datetime对象为字符串
-            for result in results:
-                for key, value in result.items():
-                    if isinstance(value, datetime):
-                        result[key] = value.isoformat()
-            
-            return results
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            return fetch_records(cursor, UserMetricsRecord)
         finally:
             conn.close()
     
-    def export_user_daily_data(self, connection_id: int = 1, 
-                              start_date: Optional[str] = None,
-                              end_date: Optional[str] = None) -> List[Dict]:
-        """导出用户日常数据"""
-        query = """
-        SELECT 
-            user_id,
-            display_name,
-            date,
-            inline_suggestions_count,
-            inline_acceptance_count,
-            inline_ai_code_lines,
-            chat_messages_sent,
-            chat_messages_interacted,
-            code_fix_generation_event_count,
-            test_generation_event_count,
-            doc_generation_event_count,
-            transformation_event_count,
-            created_at
+    @instrumented()
+    def export_user_metrics_summary(self, connection_id: int = 1) -> List[Dict]:
+        """导出用户指标汇总数据"""
+        return records_to_dicts(self.export_user_metrics_records(connection_id))
+    
+    @instrumented()
+    def export_user_metrics_records(self, connection_id: int = 1) -> List[UserMetricsRecord]:
+        """导出用户指标汇总数据（紧凑行，可按字典方式读取，save_to_file写出时转换为字典）"""
+        results = self._fetch_user_metrics_rows(connection_id)
+        
+        # 转换datetime对象为字符串
+        return self._normalize(results)
+    
+    def _build_user_daily_data_query(self, connection_id: int = 1,
+                                     start_date: Optional[str] = None,
+                                     end_date: Optional[str] = None,
+                                     after: Optional[Sequence] = None,
+                                     limit: Optional[int] = None,
+                                     updated_since: Optional[str] = None,
+                                     columns: Optional[str] = None):
+        """
+        构建用户日常数据查询语句及参数（按 date DESC, user_id 排序）
+        
+        Args:
+            updated_since: 增量读取的时间水位线（新增或重新采集更新的行）
+            after: 键集分页的上一页最后 (date, user_id)
+            limit: 最多读取的行数
+            columns: 查询的列，默认为 USER_DAILY_DATA_COLUMNS
+        """
+        query = f"""
+        SELECT {columns or self.USER_DAILY_DATA_COLUMNS}
         FROM _tool_q_dev_user_data
         WHERE connection_id = %s
         """
@@ -99,25 +192,434 @@ class QDevJSONExporter:
         if end_date:
             query += " AND date <= %s"
             params.append(end_date)
-            
-        query += " ORDER BY date DESC, user_id"
+        
+        if updated_since:
+            query += " AND updated_at >= %s"
+            params.append(updated_since)
+        
+        return paginate_query(query, params, DAILY_DATA_ORDER, after, limit)
+    
+    @instrumented()
+    def export_user_daily_data(self, connection_id: int = 1, 
+                              start_date: Optional[str] = None,
+                              end_date: Optional[str] = None) -> List[Dict]:
+        """导出用户日常数据"""
+        return records_to_dicts(self.export_user_daily_records(connection_id, start_date, end_date))
+    
+    @instrumented()
+    def export_user_daily_records(self, connection_id: int = 1,
+                                  start_date: Optional[str] = None,
+                                  end_date: Optional[str] = None) -> List[UserDailyRecord]:
+        """导出用户日常数据（紧凑行，可按字典方式读取，save_to_file写出时转换为字典）"""
+        query, params = self._build_user_daily_data_query(connection_id, start_date, end_date)
         
         conn = self.get_connection()
         try:
-            cursor = conn.cursor(dictionary=True)
+            cursor = conn.cursor()
             cursor.execute(query, params)
-            results = cursor.fetchall()
+            results = fetch_records(cursor, UserDailyRecord)
             
             # 转换datetime对象为字符串
-            for result in results:
-                for key, value in result.items():
-                    if isinstance(value, datetime):
-                        result[key] = value.isoformat()
+            return self._normalize(results, cursor.description)
+        finally:
+            conn.close()
+    
+    def _page_result(self, rows: List, page_size: int, order: KeysetOrder, scope: Tuple,
+                     description=None) -> Dict:
+        """多读的一行用于判断是否还有下一页；游标取自类型转换前的排序键值"""
+        next_cursor = None
+        if len(rows) > page_size:
+            del rows[page_size:]
+            next_cursor = order.encode_cursor(rows[-1], scope)
+        return {'rows': records_to_dicts(self._normalize(rows, description)), 'next_cursor': next_cursor}
+    
+    @instrumented()
+    def export_user_daily_data_page(self, connection_id: int = 1,
+                                    start_date: Optional[str] = None,
+                                    end_date: Optional[str] = None,
+                                    page_size: int = 1000,
+                                    cursor: Optional[str] = None) -> Dict:
+        """
+        分页导出用户日常数据（键集分页，按 date DESC, user_id）
+        
+        每页从上一页最后的 (date, user_id) 之后开始读取，不使用OFFSET；
+        有 (connection_id, date DESC, user_id) 索引时每页都是索引范围扫描，与页码无关。
+        排序方向混合，全升序的 (connection_id, date, user_id) 索引不能按序读取，每页仍要文件排序
+        
+        Args:
+            connection_id: 连接ID
+            start_date: 开始日期
+            end_date: 结束日期
+            page_size: 每页行数
+            cursor: 上一页返回的 next_cursor，None表示第一页
             
-            return results
+        Returns:
+            Dict: {'rows': 紧凑行列表, 'next_cursor': 下一页游标（最后一页为None）}
+        """
+        scope = (connection_id, start_date, end_date)
+        after = DAILY_DATA_ORDER.decode_cursor(cursor, scope) if cursor else None
+        query, params = self._build_user_daily_data_query(connection_id, start_date, end_date,
+                                                          after=after, limit=page_size + 1)
+        
+        conn = self.get_connection()
+        try:
+            db_cursor = conn.cursor()
+            db_cursor.execute(query, params)
+            rows = fetch_records(db_cursor, UserDailyRecord)
+            return self._page_result(rows, page_size, DAILY_DATA_ORDER, scope, db_cursor.description)
+        finally:
+            conn.close()
+    
+    @instrumented()
+    def export_user_metrics_page(self, connection_id: int = 1,
+                                 order_by: str = 'total_inline_suggestions_count',
+                                 page_size: int = 100,
+                                 cursor: Optional[str] = None) -> Dict:
+        """
+        分页导出用户指标汇总（键集分页，按指标倒序，同值按user_id）
+        
+        每页按索引范围扫描需要 (connection_id, <order_by> DESC, user_id) 索引
+        
+        Args:
+            connection_id: 连接ID
+            order_by: 排序指标（见 qdev_pagination.METRIC_ORDER_COLUMNS）
+            page_size: 每页行数
+            cursor: 上一页返回的 next_cursor，None表示第一页
+            
+        Returns:
+            Dict: {'rows': 紧凑行列表, 'next_cursor': 下一页游标（最后一页为None）}
+        """
+        order = metric_order(order_by)
+        scope = (connection_id,)
+        after = order.decode_cursor(cursor, scope) if cursor else None
+        rows = self._fetch_user_metrics_rows(connection_id, order_by=order_by, after=after, limit=page_size + 1)
+        return self._page_result(rows, page_size, order, scope)
+    
+    def _iter_user_daily_batches(self, connection_id: int = 1,
+                                 start_date: Optional[str] = None,
+                                 end_date: Optional[str] = None,
+                                 batch_size: int = 1000,
+                                 keyset: bool = False) -> Iterator[Tuple[List[Dict], Any]]:
+        """
+        按批次读取日常数据原始行，产出 (行列表, cursor.description)
+        
+        默认在一个非缓冲游标上fetchmany；keyset=True 时每批是一次独立的键集分页查询，
+        批次之间归还连接，不会长时间占用连接和一致性读视图
+        """
+        if keyset:
+            yield from self._iter_user_daily_keyset_batches(connection_id, start_date, end_date, batch_size)
+            return
+        
+        query, params = self._build_user_daily_data_query(connection_id, start_date, end_date)
+        
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor(dictionary=True, buffered=False)
+            try:
+                cursor.execute(query, params)
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    yield rows, cursor.description
+            finally:
+                cursor.close()
+        finally:
+            conn.close()
+    
+    def _iter_user_daily_keyset_batches(self, connection_id: int = 1,
+                                        start_date: Optional[str] = None,
+                                        end_date: Optional[str] = None,
+                                        batch_size: int = 1000) -> Iterator[Tuple[List[Dict], Any]]:
+        """键集分页逐页读取日常数据原始行"""
+        after = None
+        while True:
+            query, params = self._build_user_daily_data_query(connection_id, start_date, end_date,
+                                                              after=after, limit=batch_size)
+            conn = self.get_connection()
+            try:
+                cursor = conn.cursor(dictionary=True)
+                cursor.execute(query, params)
+                rows = cursor.fetchall()
+                description = cursor.description
+                cursor.close()
+            finally:
+                conn.close()
+            
+            if rows:
+                yield rows, description
+            if len(rows) < batch_size:
+                break
+            after = DAILY_DATA_ORDER.key_of(rows[-1])
+    
+    def _iter_user_daily_rows(self, connection_id: int = 1,
+                              start_date: Optional[str] = None,
+                              end_date: Optional[str] = None,
+                              batch_size: int = 1000) -> Iterator[Dict]:
+        """逐行读取日常数据原始行（未做类型转换）"""
+        for rows, _ in self._iter_user_daily_batches(connection_id, start_date, end_date, batch_size):
+            yield from rows
+    
+    def iter_user_daily_data(self, connection_id: int = 1,
+                             start_date: Optional[str] = None,
+                             end_date: Optional[str] = None,
+                             batch_size: int = 1000,
+                             keyset: bool = False) -> Iterator[Dict]:
+        """
+        流式读取用户日常数据
+        
+        使用非缓冲游标按批次fetchmany，内存占用只与batch_size相关，与总行数无关
+        
+        Args:
+            connection_id: 连接ID
+            start_date: 开始日期
+            end_date: 结束日期
+            batch_size: 每批读取的行数
+            keyset: 是否改为逐页键集分页查询（每页一次短查询，需要
+                    (connection_id, date DESC, user_id) 索引，见 export_user_daily_data_page）
+            
+        Yields:
+            Dict: 单行日常数据
+        """
+        plan = None
+        for rows, description in self._iter_user_daily_batches(connection_id, start_date, end_date,
+                                                               batch_size, keyset):
+            # 列转换计划只在第一批时确定一次
+            if plan is None:
+                plan = build_column_plan(rows, description)
+            yield from apply_column_plan(rows, plan)
+    
+    def iter_user_daily_changes(self, connection_id: int = 1,
+                                updated_since: Optional[str] = None,
+                                batch_size: int = 5000) -> Iterator[List[UserDailyRecord]]:
+        """
+        按批次读取新增或更新的用户日常数据（紧凑行，未做类型转换，包含 updated_at）
+        
+        每批是一次独立的键集分页查询，批次之间归还连接，内存只与batch_size相关；
+        供本地汇总库等增量同步使用
+        
+        Args:
+            connection_id: 连接ID
+            updated_since: 只读取 updated_at 不早于该时间戳的行，None表示全部
+            batch_size: 每批行数
+            
+        Yields:
+            List[UserDailyRecord]: 一批原始行
+        """
+        after = None
+        while True:
+            query, params = self._build_user_daily_data_query(connection_id, after=after, limit=batch_size,
+                                                              updated_since=updated_since,
+                                                              columns=self.USER_DAILY_CHANGE_COLUMNS)
+            conn = self.get_connection()
+            try:
+                cursor = conn.cursor()
+                cursor.execute(query, params)
+                rows = fetch_records(cursor, UserDailyRecord)
+            finally:
+                conn.close()
+            
+            if rows:
+                yield rows
+            if len(rows) < batch_size:
+                break
+            after = DAILY_DATA_ORDER.key_of(rows[-1])
+    
+    def iter_user_metrics_changes(self, connection_id: int = 1,
+                                  updated_since: Optional[str] = None,
+                                  batch_size: int = 5000) -> Iterator[List[UserMetricsRecord]]:
+        """
+        按批次读取新增或更新的用户指标汇总（紧凑行，未做类型转换），分页方式同 iter_user_daily_changes
+        
+        Args:
+            connection_id: 连接ID
+            updated_since: 只读取 updated_at 不早于该时间戳的行，None表示全部
+            batch_size: 每批行数
+            
+        Yields:
+            List[UserMetricsRecord]: 一批原始行
+        """
+        order = metric_order()
+        after = None
+        while True:
+            rows = self._fetch_user_metrics_rows(connection_id, updated_since=updated_since,
+                                                 after=after, limit=batch_size)
+            if rows:
+                yield rows
+            if len(rows) < batch_size:
+                break
+            after = order.key_of(rows[-1])
+    
+    @instrumented()
+    def stream_user_daily_data_to_file(self, filename: str, connection_id: int = 1,
+                                       start_date: Optional[str] = None,
+                                       end_date: Optional[str] = None,
+                                       batch_size: int = 1000,
+                                       output_format: str = 'json',
+                                       pretty: bool = True,
+                                       compression: Optional[str] = None,
+                                       compression_level: Optional[int] = None,
+                                       keyset: bool = False) -> Dict[str, Any]:
+        """
+        流式导出用户日常数据到文件
+        
+        逐行序列化写入，峰值内存保持恒定。json格式的输出与
+        save_to_file(export_user_daily_data(...)) 的结果逐字节一致
+        
+        Args:
+            filename: 输出文件路径
+            connection_id: 连接ID
+            start_date: 开始日期
+            end_date: 结束日期
+            batch_size: 每批读取的行数
+            output_format: 'json'（JSON数组）或 'ndjson'（每行一个JSON对象）
+            pretty: json格式下是否缩进美化
+            compression: None、'gzip' 或 'zstd'（自动补全扩展名）
+            compression_level: 压缩级别
+            keyset: 是否按键集分页逐页读取（见 iter_user_daily_data）
+            
+        Returns:
+            Dict: 包含文件路径、导出行数和文件字节数
+        """
+        if output_format not in ('json', 'ndjson'):
+            raise ValueError(f"不支持的输出格式: {output_format}")
+        
+        filename = output_filename(filename, compression)
+        
+        os.makedirs(os.path.dirname(filename) if os.path.dirname(filename) else '.', exist_ok=True)
+        
+        rows = self.iter_user_daily_data(connection_id, start_date, end_date, batch_size, keyset)
+        row_count = 0
+        
+        with open_output(filename, compression, compression_level) as f:
+            if output_format == 'ndjson':
+                for row in rows:
+                    f.write(self.serializer.dumps(row))
+                    f.write('\n')
+                    row_count += 1
+            else:
+                for row in rows:
+                    if pretty:
+                        # 与json.dump(list, indent=2)的数组元素缩进保持一致
+                        item = self.serializer.dumps(row, pretty=True)
+                        f.write('[\n  ' if row_count == 0 else ',\n  ')
+                        f.write(item.replace('\n', '\n  '))
+                    else:
+                        item = self.serializer.dumps(row)
+                        f.write('[' if row_count == 0 else ', ')
+                        f.write(item)
+                    row_count += 1
+                
+                if row_count == 0:
+                    f.write('[]')
+                else:
+                    f.write('\n]' if pretty else ']')
+        
+        return {'filename': filename, 'rows': row_count, 'bytes': os.path.getsize(filename)}
+    
+    def _user_daily_date_range(self, connection_id: int = 1) -> Tuple[Optional[Any], Optional[Any]]:
+        """用户日常数据的最早和最晚日期"""
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT MIN(date), MAX(date) FROM _tool_q_dev_user_data WHERE connection_id = %s",
+                [connection_id]
+            )
+            row = cursor.fetchone()
+            return (row[0], row[1]) if row else (None, None)
         finally:
             conn.close()
     
+    @instrumented()
+    def export_user_daily_data_partitioned(self, output_dir: str, connection_id: int = 1,
+                                           start_date: Optional[str] = None,
+                                           end_date: Optional[str] = None,
+                                           partition: str = 'month',
+                                           max_workers: int = 4,
+                                           output_format: str = 'ndjson',
+                                           batch_size: int = 1000,
+                                           resume: bool = True) -> Dict[str, Any]:
+        """
+        按日期分区并行导出用户日常数据，支持断点续传
+        
+        日期范围按日/周/月切分，每个分区流式写入单独的文件（先写临时文件，完成后原子替换），
+        写完后记入 output_dir/manifest.json。中断后以相同参数重新运行时跳过已完成的分区
+        
+        Args:
+            output_dir: 输出目录（分区文件和清单文件）
+            connection_id: 连接ID
+            start_date: 开始日期，默认为数据中的最早日期
+            end_date: 结束日期，默认为数据中的最晚日期
+            partition: 分区粒度 'day'、'week' 或 'month'
+            max_workers: 同时导出的分区数（不超过连接池大小）
+            output_format: 'ndjson' 或 'json'，见 stream_user_daily_data_to_file
+            batch_size: 每批读取的行数
+            resume: 是否从已有清单继续；False时清除清单重新导出
+            
+        Returns:
+            Dict: 清单路径、各分区文件、本次导出/跳过的分区数和总行数
+        """
+        if partition not in PARTITION_GRANULARITIES:
+            raise ValueError(f"不支持的分区粒度: {partition}")
+        
+        os.makedirs(output_dir, exist_ok=True)
+        manifest = PartitionManifest(os.path.join(output_dir, 'manifest.json'))
+        if not resume:
+            manifest.reset()
+        
+        # 未指定范围时沿用清单中的范围，保证续传时分区不变
+        previous = manifest.get_params()
+        if previous and previous['connection_id'] == connection_id:
+            start_date = start_date or previous['start_date']
+            end_date = end_date or previous['end_date']
+        if start_date is None or end_date is None:
+            min_date, max_date = self._user_daily_date_range(connection_id)
+            start_date = start_date or min_date
+            end_date = end_date or max_date
+        
+        if start_date is None or end_date is None:
+            print("没有日常数据需要导出")
+            return {'manifest': manifest.path, 'files': {}, 'exported': 0, 'skipped': 0, 'rows': 0}
+        
+        partitions = date_partitions(start_date, end_date, partition)
+        manifest.start({
+            'connection_id': connection_id,
+            'start_date': partitions[0][1].isoformat(),
+            'end_date': partitions[-1][2].isoformat(),
+            'partition': partition,
+            'output_format': output_format
+        })
+        
+        completed = manifest.completed()
+        pending = [p for p in partitions if p[0] not in completed]
+        extension = 'ndjson' if output_format == 'ndjson' else 'json'
+        
+        def export_partition(label, partition_start, partition_end):
+            filename = os.path.join(output_dir, f"daily_data_{connection_id}_{label}.{extension}")
+            result = self.stream_user_daily_data_to_file(
+                f"{filename}.tmp", connection_id, partition_start.isoformat(), partition_end.isoformat(),
+                batch_size=batch_size, output_format=output_format
+            )
+            os.replace(f"{filename}.tmp", filename)
+            manifest.mark_completed(label, filename, result['rows'], partition_start, partition_end)
+            return result['rows']
+        
+        max_workers = self._pool_workers(max_workers)
+        print(f"分区导出用户日常数据: 共 {len(partitions)} 个分区，"
+              f"跳过已完成 {len(partitions) - len(pending)} 个 (max_workers={max_workers})...")
+        self._run_concurrently({p[0]: (lambda p=p: export_partition(*p)) for p in pending}, max_workers)
+        
+        completed = manifest.completed()
+        return {
+            'manifest': manifest.path,
+            'files': {label: completed[label]['filename'] for label, _, _ in partitions},
+            'exported': len(pending),
+            'skipped': len(partitions) - len(pending),
+            'rows': sum(completed[label]['rows'] for label, _, _ in partitions)
+        }
+    
+    @instrumented()
     def export_aggregated_metrics(self, connection_id: int = 1) -> Dict:
         """导出聚合指标"""
         query = """
@@ -141,18 +643,19 @@ class QDevJSONExporter:
             result = cursor.fetchone()
             
             # 转换datetime对象为字符串
-            for key, value in result.items():
-                if isinstance(value, datetime):
-                    result[key] = value.isoformat()
-                elif isinstance(value, float):
-                    result[key] = round(value, 2)
+            self._normalize([result], cursor.description, float_digits=2)
             
             return result
         finally:
             conn.close()
     
+    @instrumented()
     def export_daily_trends(self, connection_id: int = 1, days: int = 30) -> List[Dict]:
         """导出日常趋势数据"""
+        if self.rollup_store is not None:
+            self.rollup_store.sync(self, connection_id)
+            return self.rollup_store.daily_trends(connection_id, days)
+        
         query = """
         SELECT 
             date,
@@ -178,72 +681,230 @@ class QDevJSONExporter:
             results = cursor.fetchall()
             
             # 转换数据类型
-            for result in results:
-                for key, value in result.items():
-                    if isinstance(value, datetime):
-                        result[key] = value.isoformat()
-                    elif isinstance(value, float):
-                        result[key] = round(value, 4)
-            
-            return results
+            return self._normalize(results, cursor.description, float_digits=4)
         finally:
             conn.close()
     
-    def export_user_rankings(self, connection_id: int = 1, limit: int = 10) -> Dict:
-        """导出用户排行榜"""
-        rankings = {}
+    @instrumented()
+    def export_user_rankings(self, connection_id: int = 1, limit: int = 10,
+                             rankings: Optional[Sequence[RankingSpec]] = None) -> Dict:
+        """
+        导出用户排行榜
         
-        # 建议数排行
-        query_suggestions = """
-        SELECT user_id, display_name, total_inline_suggestions_count
-        FROM _tool_q_dev_user_metrics
+        只读取一次用户指标表，所有排行榜在同一次遍历中用容量为limit的堆完成选择
+        
+        Args:
+            connection_id: 连接ID
+            limit: 每个排行榜的人数
+            rankings: 排行榜定义，默认为建议数、接受率、AI代码行数三个排行榜
+            
+        Returns:
+            Dict: 排行榜名称 -> 排名列表
+        """
+        if self.rollup_store is not None and rankings is None:
+            self.rollup_store.sync(self, connection_id)
+            return self.rollup_store.user_rankings(connection_id, limit)
+        
+        metrics_rows = self._fetch_user_metrics_rows(connection_id)
+        return rank_rows(metrics_rows, rankings or USER_METRICS_RANKINGS, limit)
+    
+    @instrumented()
+    def export_window_rankings(self, connection_id: int = 1,
+                               windows: Sequence[int] = (7, 30, 90),
+                               limit: int = 10,
+                               rankings: Optional[Sequence[RankingSpec]] = None,
+                               batch_size: int = 5000) -> Dict:
+        """
+        导出按时间窗口（最近7/30/90天等）汇总的用户排行榜
+        
+        只扫描一次最大窗口内的日常数据，行按批次流式读取，
+        每个窗口按用户累加后分别做Top-N选择
+        
+        Args:
+            connection_id: 连接ID
+            windows: 窗口天数
+            limit: 每个排行榜的人数
+            rankings: 排行榜定义，默认见 DAILY_WINDOW_RANKINGS
+            batch_size: 每批读取的行数
+            
+        Returns:
+            Dict: 'last_{N}_days' -> 排行榜名称 -> 排名列表
+        """
+        columns = ', '.join(('user_id', 'display_name') + DAILY_SUM_COLUMNS)
+        # 距今天数由数据库计算，与 DATE_SUB(CURDATE(), INTERVAL N DAY) 的过滤语义一致
+        query = f"""
+        SELECT {columns}, DATEDIFF(CURDATE(), date) as _age_days
+        FROM _tool_q_dev_user_data
         WHERE connection_id = %s
-        ORDER BY total_inline_suggestions_count DESC
-        LIMIT %s
+          AND date >= DATE_SUB(CURDATE(), INTERVAL %s DAY)
         """
         
-        # 接受率排行
-        query_acceptance = """
-        SELECT user_id, display_name, acceptance_rate, total_inline_acceptance_count
-        FROM _tool_q_dev_user_metrics
-        WHERE connection_id = %s AND total_inline_suggestions_count > 0
-        ORDER BY acceptance_rate DESC, total_inline_acceptance_count DESC
-        LIMIT %s
+        def iter_rows():
+            conn = self.get_connection()
+            try:
+                cursor = conn.cursor(dictionary=True, buffered=False)
+                try:
+                    cursor.execute(query, [connection_id, max(windows)])
+                    while True:
+                        rows = cursor.fetchmany(batch_size)
+                        if not rows:
+                            break
+                        yield from rows
+                finally:
+                    cursor.close()
+            finally:
+                conn.close()
+        
+        return rank_daily_windows(iter_rows(), windows, rankings or DAILY_WINDOW_RANKINGS, limit)
+    
+    def _fetch_daily_rows_single_pass(self, connection_id: int = 1,
+                                      start_date: Optional[str] = None,
+                                      end_date: Optional[str] = None,
+                                      trend_days: int = 30) -> List['_SinglePassDailyRecord']:
         """
+        一次扫描读取日常数据与趋势窗口所需的全部行
         
-        # AI代码行数排行
-        query_ai_lines = """
-        SELECT user_id, display_name, total_inline_ai_code_lines
-        FROM _tool_q_dev_user_metrics
+        每行附带由数据库计算的两个标记列，保证与单独查询时的过滤语义一致:
+        _in_daily_range（落在start_date/end_date范围内）和
+        _in_trend_window（落在最近trend_days天内）
+        """
+        range_conditions = []
+        range_params = []
+        
+        if start_date:
+            range_conditions.append("date >= %s")
+            range_params.append(start_date)
+        
+        if end_date:
+            range_conditions.append("date <= %s")
+            range_params.append(end_date)
+        
+        in_range = " AND ".join(range_conditions) if range_conditions else "TRUE"
+        in_window = "date >= DATE_SUB(CURDATE(), INTERVAL %s DAY)"
+        
+        query = f"""
+        SELECT {self.USER_DAILY_DATA_COLUMNS},
+            ({in_range}) AS _in_daily_range,
+            ({in_window}) AS _in_trend_window
+        FROM _tool_q_dev_user_data
         WHERE connection_id = %s
-        ORDER BY total_inline_ai_code_lines DESC
-        LIMIT %s
+          AND (({in_range}) OR {in_window})
+        ORDER BY date DESC, user_id
         """
+        params = (range_params + [trend_days] + [connection_id]
+                  + range_params + [trend_days])
         
         conn = self.get_connection()
         try:
-            cursor = conn.cursor(dictionary=True)
-            
-            # 建议数排行
-            cursor.execute(query_suggestions, [connection_id, limit])
-            rankings['top_suggestions'] = cursor.fetchall()
-            
-            # 接受率排行
-            cursor.execute(query_acceptance, [connection_id, limit])
-            rankings['top_acceptance_rate'] = cursor.fetchall()
-            
-            # AI代码行数排行
-            cursor.execute(query_ai_lines, [connection_id, limit])
-            rankings['top_ai_code_lines'] = cursor.fetchall()
-            
-            return rankings
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            return fetch_records(cursor, _SinglePassDailyRecord)
         finally:
             conn.close()
     
+    def _pool_workers(self, max_workers: int) -> int:
+        """
+        把并发数限制在连接池大小以内
+        
+        每个并发任务同时占用一个连接；线程数超过连接池大小时，多出的任务借出连接会在
+        checkout_timeout 后超时失败
+        """
+        return max(1, min(max_workers, getattr(self.pool, 'pool_size', max_workers)))
+    
+    def _run_concurrently(self, tasks: Dict[str, Callable[[], Any]], max_workers: int) -> Dict[str, Any]:
+        """
+        在线程池中并发执行相互独立的子导出
+        
+        每个任务各自从连接池借出连接，并发数不超过连接池大小；任一任务失败时抛出其异常
+        
+        Args:
+            tasks: 任务名 -> 无参可调用对象
+            max_workers: 最大并发数
+            
+        Returns:
+            Dict: 任务名 -> 结果
+        """
+        with ThreadPoolExecutor(max_workers=self._pool_workers(max_workers)) as executor:
+            futures = {name: executor.submit(task) for name, task in tasks.items()}
+            return {name: future.result() for name, future in futures.items()}
+    
+    def _export_complete_dataset_single_pass(self, export_data: Dict, connection_id: int,
+                                             start_date: Optional[str],
+                                             end_date: Optional[str],
+                                             parallel: bool = False,
+                                             max_workers: int = 2) -> Dict:
+        """每张表只读取一次，在内存中计算聚合指标、日常趋势和排行榜"""
+        if parallel:
+            print("并行读取用户指标表和用户日常数据表...")
+            results = self._run_concurrently({
+                'metrics_rows': lambda: self._fetch_user_metrics_rows(connection_id),
+                'daily_rows': lambda: self._fetch_daily_rows_single_pass(connection_id, start_date, end_date)
+            }, max_workers)
+            metrics_rows = results['metrics_rows']
+            daily_rows = results['daily_rows']
+        else:
+            print("读取用户指标表...")
+            metrics_rows = self._fetch_user_metrics_rows(connection_id)
+            
+            print("读取用户日常数据表...")
+            daily_rows = self._fetch_daily_rows_single_pass(connection_id, start_date, end_date)
+        
+        # 聚合与排行在原始值上计算，之后再做与单独导出时相同的类型转换
+        aggregated = aggregate_user_metrics(metrics_rows)
+        self._normalize([aggregated], float_digits=2)
+        
+        rankings = compute_user_rankings(metrics_rows)
+        
+        trends = compute_daily_trends(row for row in daily_rows if row._in_trend_window)
+        self._normalize(trends, float_digits=4)
+        
+        # 标记列不属于输出字段，只需按标记筛选
+        user_daily_data = [row for row in daily_rows if row._in_daily_range]
+        
+        self._normalize(metrics_rows)
+        self._normalize(user_daily_data)
+        
+        export_data['user_metrics_summary'] = metrics_rows
+        export_data['user_daily_data'] = user_daily_data
+        export_data['aggregated_metrics'] = aggregated
+        export_data['daily_trends'] = trends
+        export_data['user_rankings'] = rankings
+        return export_data
+    
+    @instrumented()
     def export_complete_dataset(self, connection_id: int = 1, 
                                start_date: Optional[str] = None,
-                               end_date: Optional[str] = None) -> Dict:
-        """导出完整数据集"""
+                               end_date: Optional[str] = None,
+                               single_pass: bool = False,
+                               parallel: bool = False,
+                               max_workers: int = 5) -> Dict:
+        """
+        导出完整数据集
+        
+        Args:
+            connection_id: 连接ID
+            start_date: 开始日期
+            end_date: 结束日期
+            single_pass: 每张表只查询一次，聚合、趋势和排行在内存中计算（输出与逐项查询一致）
+            parallel: 并发执行相互独立的子导出，总耗时接近最慢的单个查询
+            max_workers: 并发模式下的最大线程数（不超过连接池大小）
+            
+        Returns:
+            Dict: 完整数据集（用户指标和日常数据为字典列表）
+        """
+        export_data = self._build_complete_dataset(connection_id, start_date, end_date,
+                                                   single_pass, parallel, max_workers)
+        for key in ('user_metrics_summary', 'user_daily_data'):
+            export_data[key] = records_to_dicts(export_data[key])
+        return export_data
+    
+    def _build_complete_dataset(self, connection_id: int = 1,
+                                start_date: Optional[str] = None,
+                                end_date: Optional[str] = None,
+                                single_pass: bool = False,
+                                parallel: bool = False,
+                                max_workers: int = 5) -> Dict:
+        """构建完整数据集（参数同 export_complete_dataset），用户指标和日常数据保持紧凑行，供直接写文件的导出使用"""
         export_data = {
             'export_info': {
                 'timestamp': datetime.now().isoformat(),
@@ -254,20 +915,33 @@ class QDevJSONExporter:
             }
         }
         
-        print("导出用户指标汇总...")
-        export_data['user_metrics_summary'] = self.export_user_metrics_summary(connection_id)
-        
-        print("导出用户日常数据...")
-        export_data['user_daily_data'] = self.export_user_daily_data(connection_id, start_date, end_date)
-        
-        print("导出聚合指标...")
-        export_data['aggregated_metrics'] = self.export_aggregated_metrics(connection_id)
-        
-        print("导出日常趋势...")
-        export_data['daily_trends'] = self.export_daily_trends(connection_id)
-        
-        print("导出用户排行榜...")
-        export_data['user_rankings'] = self.export_user_rankings(connection_id)
+        if single_pass:
+            self._export_complete_dataset_single_pass(export_data, connection_id, start_date, end_date,
+                                                      parallel, max_workers)
+        elif parallel:
+            print("并行导出用户指标汇总、日常数据、聚合指标、日常趋势和用户排行榜...")
+            export_data.update(self._run_concurrently({
+                'user_metrics_summary': lambda: self.export_user_metrics_records(connection_id),
+                'user_daily_data': lambda: self.export_user_daily_records(connection_id, start_date, end_date),
+                'aggregated_metrics': lambda: self.export_aggregated_metrics(connection_id),
+                'daily_trends': lambda: self.export_daily_trends(connection_id),
+                'user_rankings': lambda: self.export_user_rankings(connection_id)
+            }, max_workers))
+        else:
+            print("导出用户指标汇总...")
+            export_data['user_metrics_summary'] = self.export_user_metrics_records(connection_id)
+            
+            print("导出用户日常数据...")
+            export_data['user_daily_data'] = self.export_user_daily_records(connection_id, start_date, end_date)
+            
+            print("导出聚合指标...")
+            export_data['aggregated_metrics'] = self.export_aggregated_metrics(connection_id)
+            
+            print("导出日常趋势...")
+            export_data['daily_trends'] = self.export_daily_trends(connection_id)
+            
+            print("导出用户排行榜...")
+            export_data['user_rankings'] = self.export_user_rankings(connection_id)
         
         # 添加统计信息
         export_data['statistics'] = {
@@ -278,61 +952,386 @@ class QDevJSONExporter:
         
         return export_data
     
-    def save_to_file(self, data: Dict, filename: str, pretty: bool = True) -> str:
-        """保存数据到JSON文件"""
+    def save_to_file(self, data: Dict, filename: str, pretty: bool = True,
+                     compression: Optional[str] = None,
+                     compression_level: Optional[int] = None) -> str:
+        """
+        保存数据到JSON文件
+        
+        Args:
+            data: 要保存的数据
+            filename: 文件路径（压缩时自动补全 .gz / .zst 扩展名）
+            pretty: 是否缩进美化
+            compression: None、'gzip' 或 'zstd'；序列化时边写边压缩
+            compression_level: 压缩级别，None为算法默认值
+            
+        Returns:
+            str: 实际写入的文件路径
+        """
+        filename = output_filename(filename, compression)
+        
         # 确保目录存在
         os.makedirs(os.path.dirname(filename) if os.path.dirname(filename) else '.', exist_ok=True)
         
-        with open(filename, 'w', encoding='utf-8') as f:
-            if pretty:
-                json.dump(data, f, indent=2, ensure_ascii=False, default=str)
-            else:
-                json.dump(data, f, ensure_ascii=False, default=str)
+        with self.metrics.phase('write') as current:
+            with open_output(filename, compression, compression_level) as f:
+                self.serializer.dump(data, f, pretty)
+            current.bytes = os.path.getsize(filename)
         
         return filename
     
+    @instrumented()
+    def export_to_parquet(self, connection_id: int = 1,
+                          output_dir: str = 'qdev_exports',
+                          start_date: Optional[str] = None,
+                          end_date: Optional[str] = None,
+                          compression: str = 'zstd',
+                          compression_level: Optional[int] = None,
+                          row_group_size: int = 100000) -> Dict[str, str]:
+        """
+        导出用户指标汇总和日常数据为Parquet文件（需要pyarrow）
+        
+        列保持原始类型（日期、整数、浮点、时间戳），日常数据按行组流式写入
+        
+        Args:
+            connection_id: 连接ID
+            output_dir: 输出目录
+            start_date: 日常数据开始日期
+            end_date: 日常数据结束日期
+            compression: 压缩算法（zstd、snappy、gzip、none等）
+            compression_level: 压缩级别
+            row_group_size: 每个行组的行数
+            
+        Returns:
+            Dict[str, str]: 文件类型 -> 文件路径
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        files = {}
+        
+        print("导出用户指标汇总 (Parquet)...")
+        files['user_metrics'] = f"{output_dir}/user_metrics_{timestamp}.parquet"
+        write_rows_to_parquet(
+            self._fetch_user_metrics_rows(connection_id),
+            files['user_metrics'],
+            user_metrics_schema(),
+            compression, compression_level, row_group_size
+        )
+        
+        print("导出用户日常数据 (Parquet)...")
+        files['daily_data'] = f"{output_dir}/daily_data_{timestamp}.parquet"
+        write_rows_to_parquet(
+            self._iter_user_daily_rows(connection_id, start_date, end_date),
+            files['daily_data'],
+            user_daily_data_schema(),
+            compression, compression_level, row_group_size
+        )
+        
+        return files
+    
+    @instrumented()
     def export_to_multiple_files(self, connection_id: int = 1, 
-                                output_dir: str = 'qdev_exports') -> Dict[str, str]:
-        """导出到多个文件"""
+                                output_dir: str = 'qdev_exports',
+                                single_pass: bool = False,
+                                parallel: bool = False,
+                                max_workers: int = 5,
+                                compression: Optional[str] = None,
+                                compression_level: Optional[int] = None) -> Dict[str, str]:
+        """
+        导出到多个文件
+        
+        用户指标、日常数据和聚合指标文件直接复用完整数据集中已计算的结果，不再重复查询；
+        完整数据集本身已包含全部日常数据，只需要日常数据文件时应使用 stream_user_daily_data_to_file
+        
+        Args:
+            connection_id: 连接ID
+            output_dir: 输出目录
+            single_pass: 参见 export_complete_dataset
+            parallel: 参见 export_complete_dataset
+            max_workers: 参见 export_complete_dataset
+            compression: 参见 save_to_file
+            compression_level: 参见 save_to_file
+            
+        Returns:
+            Dict[str, str]: 文件类型 -> 文件路径
+        """
         # 创建输出目录
         os.makedirs(output_dir, exist_ok=True)
         
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         files = {}
         
+        print("导出完整数据集...")
+        complete_data = self._build_complete_dataset(connection_id, single_pass=single_pass,
+                                                     parallel=parallel, max_workers=max_workers)
+        
         # 导出用户指标汇总
-        print("导出用户指标汇总...")
-        user_metrics = self.export_user_metrics_summary(connection_id)
         files['user_metrics'] = self.save_to_file(
-            user_metrics, 
-            f"{output_dir}/user_metrics_{timestamp}.json"
+            complete_data['user_metrics_summary'], 
+            f"{output_dir}/user_metrics_{timestamp}.json",
+            compression=compression, compression_level=compression_level
         )
         
         # 导出用户日常数据
-        print("导出用户日常数据...")
-        daily_data = self.export_user_daily_data(connection_id)
         files['daily_data'] = self.save_to_file(
-            daily_data,
-            f"{output_dir}/daily_data_{timestamp}.json"
+            complete_data['user_daily_data'],
+            f"{output_dir}/daily_data_{timestamp}.json",
+            compression=compression, compression_level=compression_level
         )
         
         # 导出聚合指标
-        print("导出聚合指标...")
-        aggregated = self.export_aggregated_metrics(connection_id)
         files['aggregated'] = self.save_to_file(
-            aggregated,
-            f"{output_dir}/aggregated_metrics_{timestamp}.json"
+            complete_data['aggregated_metrics'],
+            f"{output_dir}/aggregated_metrics_{timestamp}.json",
+            compression=compression, compression_level=compression_level
         )
         
         # 导出完整数据集
-        print("导出完整数据集...")
-        complete_data = self.export_complete_dataset(connection_id)
         files['complete'] = self.save_to_file(
             complete_data,
-            f"{output_dir}/complete_dataset_{timestamp}.json"
+            f"{output_dir}/complete_dataset_{timestamp}.json",
+            compression=compression, compression_level=compression_level
         )
         
         return files
+    
+    def discover_connection_ids(self, api_client=None) -> List[int]:
+        """
+        获取需要导出的Q Dev连接ID
+        
+        Args:
+            api_client: 可选的 DevLakeAPIClient，提供时通过 /plugins/q_dev/connections 获取，
+                        否则从数据湖中有用户指标的连接读取
+            
+        Returns:
+            List[int]: 按ID排序的连接ID
+        """
+        if api_client is not None:
+            return sorted(conn['id'] for conn in api_client.get_q_dev_connections())
+        
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT DISTINCT connection_id FROM _tool_q_dev_user_metrics ORDER BY connection_id")
+            return [row[0] for row in cursor.fetchall()]
+        finally:
+            conn.close()
+    
+    def _export_connection_for_org(self, connection_id: int, output_dir: str, timestamp: str,
+                                   start_date: Optional[str], end_date: Optional[str]) -> Dict:
+        """导出单个连接的完整数据集，只返回组织汇总需要的部分（日常数据写出后即释放）"""
+        data = self._build_complete_dataset(connection_id, start_date, end_date, single_pass=True)
+        filename = self.save_to_file(
+            data, f"{output_dir}/connection_{connection_id}/complete_dataset_{timestamp}.json"
+        )
+        return {
+            'filename': filename,
+            'user_metrics_summary': data['user_metrics_summary'],
+            'daily_trends': data['daily_trends'],
+            'user_rankings': data['user_rankings'],
+            'statistics': data['statistics']
+        }
+    
+    @instrumented()
+    def export_all_connections(self, output_dir: str = 'qdev_exports',
+                               connection_ids: Optional[List[int]] = None,
+                               api_client=None,
+                               start_date: Optional[str] = None,
+                               end_date: Optional[str] = None,
+                               max_workers: int = 4) -> Dict[str, Any]:
+        """
+        并行导出多个连接（每个AWS账号一个连接）并生成组织级汇总
+        
+        每个连接按单次扫描模式导出到 output_dir/connection_{id}/，
+        单个连接失败不影响其他连接；组织汇总写入 output_dir/org_rollup_{timestamp}.json:
+        聚合指标在所有连接的用户指标上重新计算，排行榜由各连接Top-N合并得到，
+        日常趋势按日期相加（不同连接的用户视为不同用户）
+        
+        Args:
+            output_dir: 输出目录
+            connection_ids: 连接ID列表，默认自动发现（见 discover_connection_ids）
+            api_client: 自动发现时使用的 DevLakeAPIClient
+            start_date: 日常数据开始日期
+            end_date: 日常数据结束日期
+            max_workers: 同时导出的连接数（不超过连接池大小）
+            
+        Returns:
+            Dict: 各连接的输出文件、失败的连接及组织汇总文件
+        """
+        if connection_ids is None:
+            connection_ids = self.discover_connection_ids(api_client)
+        
+        os.makedirs(output_dir, exist_ok=True)
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        
+        max_workers = self._pool_workers(max_workers)
+        print(f"并行导出 {len(connection_ids)} 个连接 (max_workers={max_workers})...")
+        results = {}
+        failed = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                connection_id: executor.submit(self._export_connection_for_org, connection_id,
+                                               output_dir, timestamp, start_date, end_date)
+                for connection_id in connection_ids
+            }
+            for connection_id, future in futures.items():
+                try:
+                    results[connection_id] = future.result()
+                except Exception as e:
+                    print(f"连接 {connection_id} 导出失败: {e}")
+                    failed[connection_id] = str(e)
+        
+        all_metrics_rows = [row for result in results.values() for row in result['user_metrics_summary']]
+        aggregated = aggregate_user_metrics(all_metrics_rows)
+        self._normalize([aggregated], float_digits=2)
+        
+        org_rollup = {
+            'export_info': {
+                'timestamp': datetime.now().isoformat(),
+                'connection_ids': list(results),
+                'failed_connection_ids': list(failed),
+                'start_date': start_date,
+                'end_date': end_date,
+                'exporter_version': '1.0.0'
+            },
+            'aggregated_metrics': aggregated,
+            'daily_trends': merge_daily_trends(result['daily_trends'] for result in results.values()),
+            'user_rankings': merge_rankings({connection_id: result['user_rankings']
+                                             for connection_id, result in results.items()}),
+            'connections': {connection_id: result['statistics'] for connection_id, result in results.items()}
+        }
+        
+        return {
+            'connections': {connection_id: result['filename'] for connection_id, result in results.items()},
+            'failed': failed,
+            'org_rollup': self.save_to_file(org_rollup, f"{output_dir}/org_rollup_{timestamp}.json")
+        }
+    
+    def _fetch_user_daily_rows(self, connection_id: int = 1,
+                               updated_since: Optional[str] = None) -> List[UserDailyRecord]:
+        """读取用户日常数据原始行（紧凑行，未做类型转换，包含 updated_at）"""
+        query, params = self._build_user_daily_data_query(connection_id, updated_since=updated_since,
+                                                          columns=self.USER_DAILY_CHANGE_COLUMNS)
+        
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            return fetch_records(cursor, UserDailyRecord)
+        finally:
+            conn.close()
+    
+    @instrumented()
+    def export_incremental(self, connection_id: int = 1,
+                           output_dir: str = 'qdev_exports',
+                           state_file: Optional[str] = None,
+                           merge_snapshot: bool = False) -> Dict[str, Any]:
+        """
+        基于水位线的增量导出
+        
+        只读取 _tool_q_dev_user_metrics.updated_at / _tool_q_dev_user_data.updated_at 不早于上次水位线（>=）的行，
+        上次已在水位线时间戳导出过的行按主键去重，之后才提交的同一时间戳的行不会丢失；
+        日常数据被DevLake重新采集时 updated_at 会更新，因此也会进入增量。默认写出增量文件；merge_snapshot=True 时合并进
+        该连接的快照文件（按 user_id / (user_id, date) 覆盖旧行）。
+        文件写入成功后才推进水位线，失败的运行下次会重新读取同一批变更
+        
+        Args:
+            connection_id: 连接ID
+            output_dir: 输出目录
+            state_file: 水位线文件路径，默认为 output_dir/.qdev_watermarks.json
+            merge_snapshot: 是否合并到快照文件而不是写增量文件
+            
+        Returns:
+            Dict: 输出文件路径、变更行数和新水位线
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        store = WatermarkStore(state_file or os.path.join(output_dir, '.qdev_watermarks.json'))
+        
+        snapshot_file = os.path.join(output_dir, f"snapshot_connection_{connection_id}.json")
+        
+        if merge_snapshot and not os.path.exists(snapshot_file):
+            # 快照尚不存在时先做一次全量导出作为基线
+            metrics_since = daily_since = None
+        else:
+            metrics_since = store.get(connection_id, '_tool_q_dev_user_metrics')
+            daily_since = store.get(connection_id, '_tool_q_dev_user_data')
+        
+        print(f"读取变更的用户指标 (updated_at >= {metrics_since})...")
+        metrics_rows = self._fetch_user_metrics_rows(connection_id, updated_since=metrics_since)
+        if metrics_since is not None:
+            metrics_rows = drop_seen_rows(metrics_rows, 'updated_at', metrics_since,
+                                          store.get_boundary_keys(connection_id, '_tool_q_dev_user_metrics'),
+                                          USER_METRICS_KEY)
+        
+        print(f"读取变更的日常数据 (updated_at >= {daily_since})...")
+        daily_rows = self._fetch_user_daily_rows(connection_id, updated_since=daily_since)
+        if daily_since is not None:
+            daily_rows = drop_seen_rows(daily_rows, 'updated_at', daily_since,
+                                        store.get_boundary_keys(connection_id, '_tool_q_dev_user_data'),
+                                        USER_DAILY_DATA_KEY)
+        
+        # 在转换为字符串之前记录新水位线及边界行主键
+        metrics_watermark = watermark_from_rows(metrics_rows, 'updated_at', USER_METRICS_KEY)
+        daily_watermark = watermark_from_rows(daily_rows, 'updated_at', USER_DAILY_DATA_KEY)
+        
+        self._normalize(metrics_rows)
+        self._normalize(daily_rows)
+        
+        if merge_snapshot:
+            filename = snapshot_file
+            snapshot = {'user_metrics_summary': [], 'user_daily_data': []}
+            if os.path.exists(filename):
+                with open(filename, 'r', encoding='utf-8') as f:
+                    snapshot = json.load(f)
+            
+            metrics_by_user = {row['user_id']: row for row in snapshot['user_metrics_summary']}
+            metrics_by_user.update((row['user_id'], row) for row in metrics_rows)
+            daily_by_key = {(row['user_id'], str(row['date'])): row for row in snapshot['user_daily_data']}
+            daily_by_key.update(((row['user_id'], str(row['date'])), row) for row in daily_rows)
+            
+            # 保持与全量导出相同的排序
+            merged_metrics = sorted(metrics_by_user.values(), key=lambda r: r['user_id'])
+            merged_metrics.sort(key=lambda r: r.get('total_inline_suggestions_count') or 0, reverse=True)
+            merged_daily = sorted(daily_by_key.values(), key=lambda r: r['user_id'])
+            merged_daily.sort(key=lambda r: str(r['date']), reverse=True)
+            
+            data = {
+                'export_info': {
+                    'timestamp': datetime.now().isoformat(),
+                    'connection_id': connection_id,
+                    'mode': 'snapshot'
+                },
+                'user_metrics_summary': merged_metrics,
+                'user_daily_data': merged_daily
+            }
+        else:
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            filename = os.path.join(output_dir, f"delta_connection_{connection_id}_{timestamp}.json")
+            data = {
+                'export_info': {
+                    'timestamp': datetime.now().isoformat(),
+                    'connection_id': connection_id,
+                    'mode': 'delta',
+                    'user_metrics_updated_since': metrics_since,
+                    'user_daily_data_updated_since': daily_since
+                },
+                'user_metrics_summary': metrics_rows,
+                'user_daily_data': daily_rows
+            }
+        
+        self.save_to_file(data, filename)
+        
+        store.set(connection_id, '_tool_q_dev_user_metrics', *metrics_watermark)
+        store.set(connection_id, '_tool_q_dev_user_data', *daily_watermark)
+        
+        return {
+            'filename': filename,
+            'changed_user_metrics': len(metrics_rows),
+            'changed_daily_records': len(daily_rows),
+            'user_metrics_watermark': store.get(connection_id, '_tool_q_dev_user_metrics'),
+            'user_daily_data_watermark': store.get(connection_id, '_tool_q_dev_user_data')
+        }
 
 def main():
     """示例使用方法"""
@@ -359,7 +1358,7 @@ def main():
         
         # 2. 导出到多个文件
         print("2. 导出到多个文件:")
-        files = exporter.export_to_multiple_files()
+        files = exporter.export_to_multiple_files(parallel=True)
         
         print("   导出的文件:")
         for file_type, filepath in files.items():
@@ -380,7 +1379,40 @@ def main():
         recent_filename = f"qdev_recent_7days_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
         exporter.save_to_file(recent_data, recent_filename)
         print(f"   最近7天数据已导出到: {recent_filename}")
+        print()
+
+        # 4. 按时间窗口的排行榜（一次扫描得到7/30/90天全部排行榜）
+        print("4. 最近7/30/90天用户排行榜:")
+        window_rankings = exporter.export_window_rankings(windows=(7, 30, 90), limit=5)
+        for window, rankings in window_rankings.items():
+            top = rankings['top_suggestions']
+            leader = top[0]['display_name'] if top else '-'
+            print(f"   - {window}: 建议数第一 {leader}")
+        print()
         
+        # 5. 导出所有连接（每个AWS账号一个连接）并生成组织级汇总
+        print("5. 并行导出所有连接:")
+        org = exporter.export_all_connections(max_workers=4)
+        for connection_id, filepath in org['connections'].items():
+            print(f"   - 连接 {connection_id}: {filepath}")
+        for connection_id, error in org['failed'].items():
+            print(f"   - 连接 {connection_id} 失败: {error}")
+        print(f"   组织汇总: {org['org_rollup']}")
+        print()
+        
+        # 6. 按月分区导出日常数据（中断后以相同参数重新运行即可续传）
+        print("6. 按月分区导出日常数据:")
+        partitioned = exporter.export_user_daily_data_partitioned('qdev_exports/daily_partitions',
+                                                                  partition='month', max_workers=4)
+        print(f"   导出 {partitioned['exported']} 个分区，跳过 {partitioned['skipped']} 个，"
+              f"共 {partitioned['rows']} 行 (清单: {partitioned['manifest']})")
+        print()
+
+        # 7. 各阶段耗时指标（Prometheus文本格式，可由node_exporter textfile collector采集）
+        print("7. 写出运行指标:")
+        metrics_file = exporter.metrics.write_prometheus('qdev_exports/qdev_export.prom')
+        print(f"   指标已写入: {metrics_file}")
+
         print("\n=== JSON导出完成 ===")
         
     except Exception as e:
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Q Dev指标内存聚合
+在已读取的行上计算聚合指标、日常趋势和排行榜，
+结果的类型与取值与对应的MySQL聚合查询保持一致（SUM/AVG返回Decimal等）
+"""
+
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Dict, Iterable, List
+
+from qdev_rankings import USER_METRICS_RANKINGS, rank_rows
+
+# MySQL div_precision_increment 默认值: 除法与AVG结果在操作数小数位基础上增加4位
+DIV_PRECISION_INCREMENT = 4
+
+
+def _scale(value) -> int:
+    """数值的小数位数（整数为0）"""
+    if isinstance(value, Decimal):
+        return max(-value.as_tuple().exponent, 0)
+    return 0
+
+
+def _quantize(value: Decimal, scale: int) -> Decimal:
+    """按MySQL规则四舍五入到指定小数位"""
+    return value.quantize(Decimal(1).scaleb(-scale), rounding=ROUND_HALF_UP)
+
+
+def sql_sum(values: Iterable):
+    """模拟 SUM(): 忽略NULL；整数/DECIMAL列返回Decimal，浮点列返回float"""
+    values = [v for v in values if v is not None]
+    if not values:
+        return None
+    if any(isinstance(v, float) for v in values):
+        return float(sum(values))
+    return Decimal(sum(Decimal(v) for v in values))
+
+
+def sql_avg(values: Iterable):
+    """模拟 AVG(): 整数/DECIMAL列返回小数位+4的Decimal，浮点列返回float"""
+    values = [v for v in values if v is not None]
+    if not values:
+        return None
+    if any(isinstance(v, float) for v in values):
+        return sum(values) / len(values)
+    scale = max(_scale(v) for v in values) + DIV_PRECISION_INCREMENT
+    return _quantize(sum(Decimal(v) for v in values) / len(values), scale)
+
+
+def sql_div(numerator, denominator):
+    """模拟 `/` 运算: 整数/DECIMAL操作数返回小数位+4的Decimal"""
+    if numerator is None or denominator is None or denominator == 0:
+        return None
+    if isinstance(numerator, float) or isinstance(denominator, float):
+        return numerator / denominator
+    scale = _scale(numerator) + DIV_PRECISION_INCREMENT
+    return _quantize(Decimal(numerator) / Decimal(denominator), scale)
+
+
+def sql_min(values: Iterable):
+    """模拟 MIN(): 忽略NULL"""
+    values = [v for v in values if v is not None]
+    return min(values) if values else None
+
+
+def sql_max(values: Iterable):
+    """模拟 MAX(): 忽略NULL"""
+    values = [v for v in values if v is not None]
+    return max(values) if values else None
+
+
+def aggregate_user_metrics(metrics_rows: List[Dict]) -> Dict:
+    """
+    计算聚合指标
+
+    等价于 QDevJSONExporter.export_aggregated_metrics 的SQL聚合（转换前的原始值）
+
+    Args:
+        metrics_rows: _tool_q_dev_user_metrics 原始行（datetime尚未转换）
+
+    Returns:
+        Dict: 聚合指标
+    """
+    def column(name):
+        return [row.get(name) for row in metrics_rows]
+
+    return {
+        'total_users': len(metrics_rows),
+        'total_suggestions': sql_sum(column('total_inline_suggestions_count')),
+        'total_acceptances': sql_sum(column('total_inline_acceptance_count')),
+        'avg_acceptance_rate': sql_avg(column('acceptance_rate')),
+        'total_ai_code_lines': sql_sum(column('total_inline_ai_code_lines')),
+        'earliest_date': sql_min(column('first_date')),
+        'latest_date': sql_max(column('last_date')),
+        'avg_active_days': sql_avg(column('total_days'))
+    }
+
+
+def compute_daily_trends(daily_rows: Iterable[Dict]) -> List[Dict]:
+    """
+    计算日常趋势
+
+    等价于 QDevJSONExporter.export_daily_trends 的 GROUP BY date 查询
+
+    Args:
+        daily_rows: 已按 date DESC 排序且落在趋势窗口内的 _tool_q_dev_user_data 原始行
+
+    Returns:
+        List[Dict]: 按日期倒序的每日趋势
+    """
+    groups: Dict = {}
+    for row in daily_rows:
+        groups.setdefault(row['date'], []).append(row)
+
+    trends = []
+    for date in sorted(groups, reverse=True):
+        rows = groups[date]
+        rates = []
+        for row in rows:
+            suggestions = row.get('inline_suggestions_count')
+            acceptances = row.get('inline_acceptance_count')
+            if suggestions is not None and suggestions > 0:
+                rate = sql_div(acceptances, suggestions)
+            else:
+                rate = 0
+            # 整数列相除时CASE表达式的类型固定为DECIMAL(?,4)，ELSE 0 同样按4位小数参与AVG
+            if rate is not None and not isinstance(rate, float):
+                rate = _quantize(Decimal(rate), DIV_PRECISION_INCREMENT)
+            rates.append(rate)
+
+        trends.append({
+            'date': date,
+            'active_users': len({row.get('user_id') for row in rows if row.get('user_id') is not None}),
+            'daily_suggestions': sql_sum(row.get('inline_suggestions_count') for row in rows),
+            'daily_acceptances': sql_sum(row.get('inline_acceptance_count') for row in rows),
+            'daily_ai_lines': sql_sum(row.get('inline_ai_code_lines') for row in rows),
+            'daily_chat_messages': sql_sum(row.get('chat_messages_sent') for row in rows),
+            'daily_acceptance_rate': sql_avg(rates)
+        })
+
+    return trends
+
+
+def compute_user_rankings(metrics_rows: List[Dict], limit: int = 10) -> Dict[str, List[Dict]]:
+    """
+    计算用户排行榜
+
+    等价于三个 ORDER BY ... DESC LIMIT 查询（NULL排在最后，相等时保持原有顺序），
+    由排行榜引擎单次遍历完成
+
+    Args:
+        metrics_rows: _tool_q_dev_user_metrics 行
+        limit: 每个排行榜的人数
+
+    Returns:
+        Dict: 各排行榜
+    """
+    return rank_rows(metrics_rows, USER_METRICS_RANKINGS, limit)
+
+
+def merge_daily_trends(trend_lists: Iterable[List[Dict]]) -> List[Dict]:
+    """
+    合并多个连接的日常趋势
+
+    同一日期的人数和各项计数直接相加（不同连接的用户视为不同用户），
+    接受率按各连接当日活跃用户数加权平均
+
+    Args:
+        trend_lists: 各连接 compute_daily_trends / export_daily_trends 的结果
+
+    Returns:
+        List[Dict]: 按日期倒序的合并趋势
+    """
+    sum_columns = ('daily_suggestions', 'daily_acceptances', 'daily_ai_lines', 'daily_chat_messages')
+    merged: Dict = {}
+    weighted_rates: Dict = {}
+
+    for trends in trend_lists:
+        for trend in trends:
+            date = trend['date']
+            if date not in merged:
+                merged[date] = {'date': date, 'active_users': 0}
+                merged[date].update((column, None) for column in sum_columns)
+                weighted_rates[date] = [Decimal(0), 0]
+            target = merged[date]
+            # active_users 来自 COUNT()，保持整数
+            target['active_users'] += trend.get('active_users') or 0
+            for column in sum_columns:
+                target[column] = sql_sum([target[column], trend.get(column)])
+            rate = trend.get('daily_acceptance_rate')
+            users = trend.get('active_users') or 0
+            if rate is not None and users:
+                weighted_rates[date][0] += Decimal(str(rate)) * users
+                weighted_rates[date][1] += users
+
+    trends = []
+    for date in sorted(merged, reverse=True):
+        total, users = weighted_rates[date]
+        merged[date]['daily_acceptance_rate'] = (
+            _quantize(total / users, DIV_PRECISION_INCREMENT) if users else None
+        )
+        trends.append(merged[date])
+    return trends
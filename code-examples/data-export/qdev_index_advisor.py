@@ -0,0 +1,602 @@
+#!/usr/bin/env python3
+"""
+Q Dev数据表索引顾问
+记录导出器（QDevJSONExporter）和数据库访问类（QDevMetricsDB）实际发出的每条查询，
+逐条EXPLAIN并对照现有索引，报告缺失的复合索引；可选择直接在DevLake表上在线创建，
+或在自有的旁路schema中建立带索引的副本（不改动DevLake迁移管理的表），并输出创建前后的查询耗时对比。
+导出按 date DESC, user_id 等混合方向排序，推荐的索引带降序列（需要MySQL 8）；
+创建索引后仍有文件排序的查询在报告中标记为未解决
+
+用法:
+    python qdev_index_advisor.py --host <EC2-PUBLIC-IP> --output index_report.json
+    python qdev_index_advisor.py --apply --covering --output index_report.json
+    python qdev_index_advisor.py --apply --side-schema qdev_side --output index_report.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import re
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import mysql.connector
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'database-access'))
+from qdev_pagination import DAILY_DATA_ORDER, METRIC_ORDER_COLUMNS, metric_order
+
+USER_DATA_TABLE = '_tool_q_dev_user_data'
+USER_METRICS_TABLE = '_tool_q_dev_user_metrics'
+QDEV_TABLES = (USER_DATA_TABLE, USER_METRICS_TABLE)
+
+
+KeyPart = Tuple[str, bool]
+
+
+class IndexSpec:
+    """推荐的复合索引"""
+
+    def __init__(self, table: str, name: str, columns: Sequence, reason: str):
+        """
+        Args:
+            columns: 列名或 (列名, 是否降序)；混合方向的 ORDER BY 只能由方向一致的索引按序读取
+        """
+        self.table = table
+        self.name = name
+        self.key_parts: Tuple[KeyPart, ...] = tuple(
+            (column, False) if isinstance(column, str) else (column[0], bool(column[1])) for column in columns
+        )
+        self.columns = tuple(column for column, _ in self.key_parts)
+        self.reason = reason
+
+    def ddl(self, schema: Optional[str] = None) -> str:
+        """在线加索引语句（InnoDB INPLACE，不阻塞读写）"""
+        table = f"`{schema}`.`{self.table}`" if schema else f"`{self.table}`"
+        columns = ', '.join(f"`{column}` DESC" if descending else f"`{column}`"
+                            for column, descending in self.key_parts)
+        return f"ALTER TABLE {table} ADD INDEX `{self.name}` ({columns}), ALGORITHM=INPLACE, LOCK=NONE"
+
+    def is_covered_by(self, existing: Dict[str, List[KeyPart]]) -> bool:
+        """现有索引以本索引的列（含方向）为前缀时视为已覆盖"""
+        return any(tuple(parts[:len(self.key_parts)]) == self.key_parts for parts in existing.values())
+
+    def to_dict(self) -> Dict:
+        columns = [f"{column} DESC" if descending else column for column, descending in self.key_parts]
+        return {'table': self.table, 'name': self.name, 'columns': columns, 'reason': self.reason}
+
+
+DAILY_DATE_INDEX = IndexSpec(
+    USER_DATA_TABLE, 'idx_qdev_ud_conn_datedesc_user', DAILY_DATA_ORDER.index_columns(('connection_id',)),
+    "按连接和日期范围过滤、按 date DESC, user_id 排序（日常数据导出、键集分页、时间窗口排行、日趋势）"
+)
+DAILY_DATE_COVERING_INDEX = IndexSpec(
+    USER_DATA_TABLE, 'idx_qdev_ud_conn_datedesc_cover',
+    DAILY_DATA_ORDER.index_columns(('connection_id',))
+    + ['inline_suggestions_count', 'inline_acceptance_count', 'inline_ai_code_lines', 'chat_messages_sent'],
+    "同 idx_qdev_ud_conn_datedesc_user，并包含日趋势聚合用到的全部列，日趋势查询只读索引不回表"
+)
+DAILY_USER_INDEX = IndexSpec(
+    USER_DATA_TABLE, 'idx_qdev_ud_conn_user_date', ('connection_id', 'user_id', 'date'),
+    "按用户查询日常数据（get_user_detail）"
+)
+DAILY_UPDATED_INDEX = IndexSpec(
+    USER_DATA_TABLE, 'idx_qdev_ud_conn_updated', ('connection_id', 'updated_at'),
+    "增量导出和本地汇总库同步按 updated_at 水位线过滤"
+)
+METRICS_USER_INDEX = IndexSpec(
+    USER_METRICS_TABLE, 'idx_qdev_um_conn_user', ('connection_id', 'user_id'),
+    "按用户查询聚合指标（get_user_detail）"
+)
+METRICS_UPDATED_INDEX = IndexSpec(
+    USER_METRICS_TABLE, 'idx_qdev_um_conn_updated', ('connection_id', 'updated_at'),
+    "增量导出按 updated_at 水位线过滤"
+)
+
+
+def metric_index(metric: str) -> IndexSpec:
+    """按某一指标倒序排序（排行榜、指标分页）的索引"""
+    return IndexSpec(USER_METRICS_TABLE, f"idx_qdev_um_{metric}_desc",
+                     metric_order(metric).index_columns(('connection_id',)),
+                     f"按 {metric} 倒序、同值按 user_id 排序（用户指标导出和分页）")
+
+
+_FROM_PATTERN = re.compile(r'\bFROM\s+`?(\w+)`?', re.IGNORECASE)
+_DATE_PATTERN = re.compile(r'\bdate\s*(>=|<=|<|>)|ORDER BY date\b|GROUP BY date\b|(MIN|MAX)\(date\)',
+                           re.IGNORECASE)
+_USER_LOOKUP_PATTERN = re.compile(r'\buser_id\s*(=\s*%s|IN\s*\()', re.IGNORECASE)
+_METRIC_ORDER_PATTERN = re.compile(r'ORDER BY\s+(\w+)\s+DESC', re.IGNORECASE)
+
+
+def recommend_indexes(query: str, covering: bool = False) -> List[IndexSpec]:
+    """
+    按查询的过滤、排序条件推荐索引（等值列在前，其次排序列，最后范围列）
+
+    Args:
+        query: SQL语句
+        covering: 日期类查询是否推荐覆盖日趋势聚合列的宽索引
+
+    Returns:
+        List[IndexSpec]: 推荐的索引
+    """
+    match = _FROM_PATTERN.search(query)
+    table = match.group(1) if match else None
+    specs = []
+
+    if table == USER_DATA_TABLE:
+        if _USER_LOOKUP_PATTERN.search(query):
+            specs.append(DAILY_USER_INDEX)
+        elif re.search(r'\bupdated_at\s*>', query, re.IGNORECASE):
+            specs.append(DAILY_UPDATED_INDEX)
+        elif _DATE_PATTERN.search(query):
+            specs.append(DAILY_DATE_COVERING_INDEX if covering else DAILY_DATE_INDEX)
+    elif table == USER_METRICS_TABLE:
+        if _USER_LOOKUP_PATTERN.search(query):
+            specs.append(METRICS_USER_INDEX)
+        elif re.search(r'\bupdated_at\s*>', query, re.IGNORECASE):
+            specs.append(METRICS_UPDATED_INDEX)
+        else:
+            order = _METRIC_ORDER_PATTERN.search(query)
+            if order and order.group(1) in METRIC_ORDER_COLUMNS:
+                specs.append(metric_index(order.group(1)))
+    return specs
+
+
+class _CaptureCursor:
+    """只记录查询、返回空结果的游标"""
+
+    column_names = ()
+    description = None
+    rowcount = 0
+
+    def __init__(self, recorder: 'QueryRecorder'):
+        self._recorder = recorder
+
+    def execute(self, query: str, params: Optional[Sequence] = None):
+        self._recorder.record(query, params)
+
+    def fetchall(self):
+        return []
+
+    def fetchmany(self, size: int = 1):
+        return []
+
+    def fetchone(self):
+        return None
+
+    def __iter__(self):
+        return iter(())
+
+    def close(self):
+        pass
+
+
+class _CaptureConnection:
+    def __init__(self, recorder: 'QueryRecorder'):
+        self._recorder = recorder
+
+    def cursor(self, *args, **kwargs) -> _CaptureCursor:
+        return _CaptureCursor(self._recorder)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class QueryRecorder:
+    """代替连接池，记录导出方法发出的查询（不访问数据库，所有查询结果为空）"""
+
+    def __init__(self):
+        self.operation: Optional[str] = None
+        self.queries: List[Dict] = []
+
+    def get_connection(self) -> _CaptureConnection:
+        return _CaptureConnection(self)
+
+    def record(self, query: str, params: Optional[Sequence]):
+        self.queries.append({'operation': self.operation, 'query': query, 'params': list(params or [])})
+
+
+def _normalize_sql(query: str) -> str:
+    return ' '.join(query.split())
+
+
+def capture_exporter_queries(connection_id: int = 1, days: int = 30,
+                             user_id: str = 'probe-user') -> List[Dict]:
+    """
+    记录导出器和数据库访问类各方法发出的查询（相同语句只保留一次）
+
+    Args:
+        connection_id: 查询参数中的连接ID
+        days: 日期范围类查询的天数
+        user_id: 按用户查询时使用的用户ID
+
+    Returns:
+        List[Dict]: {'operations': [发出该查询的方法], 'query', 'params'} 列表
+    """
+    from json_exporter import QDevJSONExporter
+    from qdev_database_demo import QDevMetricsDB
+
+    recorder = QueryRecorder()
+    exporter = QDevJSONExporter()
+    exporter.pool = recorder
+    metrics_db = QDevMetricsDB(host='localhost')
+    metrics_db.pool = recorder
+
+    today = date.today()
+    start_date = (today - timedelta(days=days)).isoformat()
+    daily_cursor = DAILY_DATA_ORDER.encode_cursor({'date': today, 'user_id': ''}, (connection_id, None, None))
+    metrics_cursor = metric_order().encode_cursor({'total_inline_suggestions_count': 0, 'user_id': ''},
+                                                  (connection_id,))
+
+    probes = [
+        ('export_user_metrics_summary', lambda: exporter.export_user_metrics_summary(connection_id)),
+        ('export_user_daily_data', lambda: exporter.export_user_daily_data(connection_id)),
+        ('export_user_daily_data(日期范围)',
+         lambda: exporter.export_user_daily_data(connection_id, start_date, today.isoformat())),
+        ('export_user_daily_data_page', lambda: exporter.export_user_daily_data_page(connection_id,
+                                                                                     cursor=daily_cursor)),
+        ('export_user_metrics_page', lambda: exporter.export_user_metrics_page(connection_id,
+                                                                               cursor=metrics_cursor)),
+        ('export_aggregated_metrics', lambda: exporter.export_aggregated_metrics(connection_id)),
+        ('export_daily_trends', lambda: exporter.export_daily_trends(connection_id, days)),
+        ('export_window_rankings', lambda: exporter.export_window_rankings(connection_id)),
+        ('export_complete_dataset(single_pass)',
+         lambda: exporter.export_complete_dataset(connection_id, single_pass=True)),
+        ('export_user_daily_data_partitioned', lambda: exporter._user_daily_date_range(connection_id)),
+        ('export_incremental', lambda: (exporter._fetch_user_metrics_rows(connection_id, updated_since=start_date),
+                                        exporter._fetch_user_daily_rows(connection_id, updated_since=start_date))),
+        ('QDevRollupStore.sync', lambda: (list(exporter.iter_user_daily_changes(connection_id, start_date)),
+                                          list(exporter.iter_user_metrics_changes(connection_id, start_date)))),
+        ('discover_connection_ids', exporter.discover_connection_ids),
+        ('QDevMetricsDB.get_user_detail', lambda: metrics_db.get_user_detail(user_id, connection_id)),
+        ('QDevMetricsDB.get_user_details', lambda: metrics_db.get_user_details([user_id], connection_id)),
+        ('QDevMetricsDB.get_metrics_statistics', lambda: metrics_db.get_metrics_statistics(connection_id)),
+        ('QDevMetricsDB.get_user_daily_records',
+         lambda: metrics_db.get_user_daily_records(connection_id, start_date, today.isoformat()))
+    ]
+
+    # 导出方法本身的进度输出不需要
+    with contextlib.redirect_stdout(io.StringIO()):
+        for operation, probe in probes:
+            recorder.operation = operation
+            try:
+                probe()
+            except (TypeError, KeyError, IndexError, ValueError):
+                # 查询已记录；空结果导致的后续处理异常可以忽略
+                pass
+
+    unique: Dict[str, Dict] = {}
+    for item in recorder.queries:
+        key = _normalize_sql(item['query'])
+        if key in unique:
+            if item['operation'] not in unique[key]['operations']:
+                unique[key]['operations'].append(item['operation'])
+        else:
+            unique[key] = {'operations': [item['operation']], 'query': key, 'params': item['params']}
+    return list(unique.values())
+
+
+def has_filesort(plan: List[Dict]) -> bool:
+    """Q Dev表上是否仍有文件排序"""
+    return any(row.get('table') in QDEV_TABLES and 'Using filesort' in (row.get('Extra') or '') for row in plan)
+
+
+def plan_issues(plan: List[Dict]) -> List[str]:
+    """从EXPLAIN结果中找出Q Dev表上的全表扫描、全索引扫描、文件排序和临时表"""
+    issues = []
+    for row in plan:
+        table = row.get('table')
+        if table not in QDEV_TABLES:
+            continue
+        access = (row.get('type') or '').upper()
+        extra = row.get('Extra') or ''
+        if access == 'ALL':
+            issues.append(f"{table}: 全表扫描（约 {row.get('rows')} 行）")
+        elif access == 'INDEX':
+            issues.append(f"{table}: 全索引扫描 {row.get('key')}（约 {row.get('rows')} 行）")
+        if 'Using filesort' in extra:
+            issues.append(f"{table}: 文件排序")
+        if 'Using temporary' in extra:
+            issues.append(f"{table}: 使用临时表")
+    return issues
+
+
+class QDevIndexAdvisor:
+    """索引顾问"""
+
+    def __init__(self, host: str = 'localhost', port: int = 3306,
+                 user: str = 'merico', password: str = 'merico', database: str = 'lake',
+                 connection_id: int = 1, covering: bool = False):
+        """
+        初始化索引顾问
+
+        Args:
+            connection_id: EXPLAIN和基准测试使用的连接ID（应选择数据量有代表性的连接）
+            covering: 日期类查询是否推荐覆盖日趋势聚合列的宽索引
+        """
+        self.config = {
+            'host': host,
+            'port': port,
+            'user': user,
+            'password': password,
+            'database': database
+        }
+        self.connection_id = connection_id
+        self.covering = covering
+        self.queries = capture_exporter_queries(connection_id)
+
+    def get_connection(self, database: Optional[str] = None):
+        """索引顾问的查询和DDL不走共享连接池，使用独立连接"""
+        config = dict(self.config, database=database) if database else self.config
+        return mysql.connector.connect(**config)
+
+    def existing_indexes(self, table: str, database: Optional[str] = None) -> Dict[str, List[KeyPart]]:
+        """现有索引: 索引名 -> (列, 是否降序)（按索引中的顺序）"""
+        conn = self.get_connection(database)
+        try:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(f"SHOW INDEX FROM `{table}`")
+            indexes: Dict[str, List[Tuple[int, KeyPart]]] = {}
+            for row in cursor.fetchall():
+                collation = row.get('Collation')
+                if isinstance(collation, bytes):
+                    collation = collation.decode()
+                indexes.setdefault(row['Key_name'], []).append(
+                    (int(row['Seq_in_index']), (row['Column_name'], collation == 'D'))
+                )
+            return {name: [part for _, part in sorted(parts)] for name, parts in indexes.items()}
+        finally:
+            conn.close()
+
+    def explain(self, database: Optional[str] = None) -> List[Dict]:
+        """逐条EXPLAIN记录到的查询"""
+        results = []
+        conn = self.get_connection(database)
+        try:
+            cursor = conn.cursor(dictionary=True)
+            for item in self.queries:
+                cursor.execute(f"EXPLAIN {item['query']}", item['params'])
+                plan = [{key: (value.decode() if isinstance(value, bytes) else value) for key, value in row.items()}
+                        for row in cursor.fetchall()]
+                results.append({'operations': item['operations'], 'plan': plan, 'issues': plan_issues(plan),
+                                'filesort': has_filesort(plan)})
+        finally:
+            conn.close()
+        return results
+
+    def missing_indexes(self, database: Optional[str] = None) -> List[IndexSpec]:
+        """所有查询推荐的、现有索引尚未覆盖的索引"""
+        existing = {table: self.existing_indexes(table, database) for table in QDEV_TABLES}
+        missing: Dict[str, IndexSpec] = {}
+        for item in self.queries:
+            for spec in recommend_indexes(item['query'], self.covering):
+                if spec.name not in missing and not spec.is_covered_by(existing[spec.table]):
+                    missing[spec.name] = spec
+        return list(missing.values())
+
+    def create_indexes(self, specs: Sequence[IndexSpec], database: Optional[str] = None) -> List[str]:
+        """
+        在线创建索引
+
+        Returns:
+            List[str]: 执行的DDL
+        """
+        executed = []
+        conn = self.get_connection(database)
+        try:
+            cursor = conn.cursor()
+            for spec in specs:
+                ddl = spec.ddl(database)
+                print(f"创建索引: {ddl}")
+                cursor.execute(ddl)
+                executed.append(ddl)
+        finally:
+            conn.close()
+        return executed
+
+    def bootstrap_side_schema(self, side_schema: str, specs: Optional[Sequence[IndexSpec]] = None) -> List[str]:
+        """
+        建立（或刷新）旁路schema: 复制两张Q Dev表的结构和数据，并在副本上创建推荐索引
+
+        DevLake迁移管理的表保持不变；导出器以 database=side_schema 连接即可使用带索引的副本。
+        每次DevLake采集完成后重新调用以刷新数据
+
+        Args:
+            side_schema: 旁路schema名称（字母、数字、下划线）
+            specs: 要创建的索引，默认为全部推荐索引
+
+        Returns:
+            List[str]: 执行的语句
+        """
+        if not re.fullmatch(r'\w+', side_schema):
+            raise ValueError(f"无效的schema名称: {side_schema}")
+        if specs is None:
+            specs = self._all_recommended()
+
+        source = self.config['database']
+        executed = []
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            statements = [f"CREATE DATABASE IF NOT EXISTS `{side_schema}`"]
+            for table in QDEV_TABLES:
+                statements += [
+                    f"CREATE TABLE IF NOT EXISTS `{side_schema}`.`{table}` LIKE `{source}`.`{table}`",
+                    f"TRUNCATE TABLE `{side_schema}`.`{table}`",
+                    f"INSERT INTO `{side_schema}`.`{table}` SELECT * FROM `{source}`.`{table}`"
+                ]
+            for statement in statements:
+                print(f"执行: {statement}")
+                cursor.execute(statement)
+                executed.append(statement)
+            conn.commit()
+        finally:
+            conn.close()
+
+        existing = {table: self.existing_indexes(table, side_schema) for table in QDEV_TABLES}
+        pending = [spec for spec in specs if not spec.is_covered_by(existing[spec.table])]
+        return executed + self.create_indexes(pending, side_schema)
+
+    def _all_recommended(self) -> List[IndexSpec]:
+        specs: Dict[str, IndexSpec] = {}
+        for item in self.queries:
+            for spec in recommend_indexes(item['query'], self.covering):
+                specs.setdefault(spec.name, spec)
+        return list(specs.values())
+
+    def benchmark(self, repeat: int = 3, database: Optional[str] = None) -> List[Dict]:
+        """
+        逐条执行记录到的查询并读取全部结果，耗时取中位数
+
+        Returns:
+            List[Dict]: {'operations', 'seconds', 'rows'} 列表，顺序与 self.queries 一致
+        """
+        results = []
+        conn = self.get_connection(database)
+        try:
+            cursor = conn.cursor()
+            for item in self.queries:
+                timings = []
+                rows = 0
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    cursor.execute(item['query'], item['params'])
+                    rows = len(cursor.fetchall())
+                    timings.append(time.perf_counter() - start)
+                results.append({'operations': item['operations'], 'seconds': round(statistics.median(timings), 4),
+                                'rows': rows})
+        finally:
+            conn.close()
+        return results
+
+    def run(self, apply: bool = False, side_schema: Optional[str] = None,
+            benchmark: bool = True, repeat: int = 3) -> Dict:
+        """
+        完整流程: EXPLAIN -> 缺失索引 ->（可选）创建 -> 再次EXPLAIN，并对比前后耗时
+
+        Args:
+            apply: 是否创建缺失的索引
+            side_schema: 指定时在旁路schema中创建，而不是修改DevLake的表
+            benchmark: 是否执行查询并记录耗时
+            repeat: 每条查询的执行次数
+
+        Returns:
+            Dict: 报告
+        """
+        print(f"记录到 {len(self.queries)} 条不同的查询，执行EXPLAIN...")
+        before_plans = self.explain()
+        missing = self.missing_indexes()
+        before_timings = self.benchmark(repeat) if benchmark else None
+
+        report = {
+            'database': {key: value for key, value in self.config.items() if key != 'password'},
+            'connection_id': self.connection_id,
+            'covering': self.covering,
+            'missing_indexes': [spec.to_dict() for spec in missing],
+            'queries': [],
+            'applied': [],
+            'unresolved': [],
+            'side_schema': side_schema
+        }
+
+        after_plans = after_timings = None
+        if apply or side_schema:
+            if side_schema:
+                report['applied'] = self.bootstrap_side_schema(side_schema)
+            else:
+                report['applied'] = self.create_indexes(missing)
+            after_plans = self.explain(side_schema)
+            after_timings = self.benchmark(repeat, side_schema) if benchmark else None
+
+        for index, item in enumerate(self.queries):
+            entry = {
+                'operations': item['operations'],
+                'query': item['query'],
+                'recommended': [spec.name for spec in recommend_indexes(item['query'], self.covering)],
+                'before': {'plan': before_plans[index]['plan'], 'issues': before_plans[index]['issues']}
+            }
+            if before_timings:
+                entry['before'].update(seconds=before_timings[index]['seconds'], rows=before_timings[index]['rows'])
+            if after_plans:
+                entry['after'] = {'plan': after_plans[index]['plan'], 'issues': after_plans[index]['issues']}
+                # 有推荐索引但创建后仍要文件排序: 索引没有解决排序问题，不计为已修复
+                entry['unresolved'] = bool(entry['recommended']) and after_plans[index]['filesort']
+                if entry['unresolved']:
+                    report['unresolved'].append(entry['operations'])
+                if after_timings:
+                    entry['after'].update(seconds=after_timings[index]['seconds'])
+                    if after_timings[index]['seconds'] > 0:
+                        entry['speedup'] = round(before_timings[index]['seconds'] / after_timings[index]['seconds'], 2)
+            report['queries'].append(entry)
+        return report
+
+
+def print_report(report: Dict):
+    """打印报告摘要"""
+    for entry in report['queries']:
+        print(f"\n{', '.join(entry['operations'])}")
+        issues = entry['before']['issues']
+        print(f"   问题: {'; '.join(issues) if issues else '无'}")
+        if entry['recommended']:
+            print(f"   推荐索引: {', '.join(entry['recommended'])}")
+        if 'seconds' in entry['before']:
+            line = f"   耗时: {entry['before']['seconds']}s"
+            if 'after' in entry and 'seconds' in entry['after']:
+                line += f" -> {entry['after']['seconds']}s"
+                if 'speedup' in entry:
+                    line += f" (x{entry['speedup']})"
+                after_issues = entry['after']['issues']
+                line += f"，创建后问题: {'; '.join(after_issues) if after_issues else '无'}"
+            print(line)
+        if entry.get('unresolved'):
+            print("   未解决: 创建推荐索引后仍有文件排序")
+
+    print(f"\n缺失索引 {len(report['missing_indexes'])} 个:")
+    for spec in report['missing_indexes']:
+        print(f"   - {spec['table']}.{spec['name']} ({', '.join(spec['columns'])}): {spec['reason']}")
+
+    if report['unresolved']:
+        print(f"\n创建索引后仍有文件排序的查询 {len(report['unresolved'])} 条:")
+        for operations in report['unresolved']:
+            print(f"   - {', '.join(operations)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Q Dev数据表索引顾问')
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=3306)
+    parser.add_argument('--user', default='merico')
+    parser.add_argument('--password', default='merico')
+    parser.add_argument('--database', default='lake')
+    parser.add_argument('--connection-id', type=int, default=1, help='EXPLAIN和计时使用的连接ID')
+    parser.add_argument('--covering', action='store_true', help='日期类查询推荐覆盖索引')
+    parser.add_argument('--apply', action='store_true', help='在DevLake表上在线创建缺失的索引')
+    parser.add_argument('--side-schema', help='改为在该旁路schema中建立带索引的表副本')
+    parser.add_argument('--no-benchmark', action='store_true', help='不执行查询计时')
+    parser.add_argument('--repeat', type=int, default=3, help='每条查询的执行次数')
+    parser.add_argument('--output', default='index_report.json', help='报告JSON文件路径')
+    args = parser.parse_args()
+
+    advisor = QDevIndexAdvisor(args.host, args.port, args.user, args.password, args.database,
+                               connection_id=args.connection_id, covering=args.covering)
+    report = advisor.run(apply=args.apply, side_schema=args.side_schema,
+                         benchmark=not args.no_benchmark, repeat=args.repeat)
+    print_report(report)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False, default=str)
+    print(f"\n报告已保存到: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Q Dev日常数据按日期分区导出
+把日期范围切分为日/周/月分区，并在清单文件中记录已完成的分区，
+中断后重新运行时只导出未完成的分区
+"""
+
+import json
+import os
+import threading
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple, Union
+
+PARTITION_GRANULARITIES = ('day', 'week', 'month')
+
+Partition = Tuple[str, date, date]
+
+
+def _to_date(value: Union[str, date]) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(value)
+
+
+def _next_partition_start(current: date, granularity: str) -> date:
+    if granularity == 'day':
+        return current + timedelta(days=1)
+    if granularity == 'week':
+        # 按ISO周（周一开始）对齐
+        return current + timedelta(days=7 - current.weekday())
+    if current.month == 12:
+        return date(current.year + 1, 1, 1)
+    return date(current.year, current.month + 1, 1)
+
+
+def _partition_label(start: date, granularity: str) -> str:
+    if granularity == 'day':
+        return start.isoformat()
+    if granularity == 'week':
+        year, week, _ = start.isocalendar()
+        return f"{year}-W{week:02d}"
+    return start.strftime('%Y-%m')
+
+
+def date_partitions(start_date: Union[str, date], end_date: Union[str, date],
+                    granularity: str = 'month') -> List[Partition]:
+    """
+    把闭区间 [start_date, end_date] 切分为日期分区
+
+    首尾分区按范围截断，中间分区与自然日/ISO周/自然月对齐
+
+    Args:
+        start_date: 开始日期
+        end_date: 结束日期
+        granularity: 'day'、'week' 或 'month'
+
+    Returns:
+        List[Partition]: (分区标签, 分区开始日期, 分区结束日期) 列表
+    """
+    if granularity not in PARTITION_GRANULARITIES:
+        raise ValueError(f"不支持的分区粒度: {granularity}")
+
+    start = _to_date(start_date)
+    end = _to_date(end_date)
+
+    partitions = []
+    current = start
+    while current <= end:
+        next_start = _next_partition_start(current, granularity)
+        partitions.append((_partition_label(current, granularity), current,
+                           min(next_start - timedelta(days=1), end)))
+        current = next_start
+    return partitions
+
+
+class PartitionManifest:
+    """分区导出清单（写入采用临时文件+原子替换，多线程安全）"""
+
+    def __init__(self, path: str):
+        """
+        初始化清单
+
+        Args:
+            path: 清单文件路径
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._data: Dict = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self._data = json.load(f)
+
+    def _save(self) -> None:
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def start(self, params: Dict) -> None:
+        """
+        开始（或继续）一次导出
+
+        清单中已有的导出参数与本次不一致时拒绝继续，避免混入不同范围或格式的分区
+
+        Args:
+            params: 导出参数（连接ID、日期范围、分区粒度、输出格式等）
+        """
+        with self._lock:
+            existing = self._data.get('params')
+            if existing is not None and existing != params:
+                raise ValueError(f"清单 {self.path} 属于另一次导出 ({existing})，"
+                                 f"请更换输出目录或使用 resume=False 重新导出")
+            self._data.setdefault('params', params)
+            self._data.setdefault('partitions', {})
+            self._save()
+
+    def reset(self) -> None:
+        """清除全部已完成记录"""
+        with self._lock:
+            self._data = {}
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+    def completed(self) -> Dict[str, Dict]:
+        """已完成的分区: 标签 -> 记录"""
+        with self._lock:
+            return dict(self._data.get('partitions', {}))
+
+    def mark_completed(self, label: str, filename: str, rows: int,
+                       start_date: date, end_date: date) -> None:
+        """记录分区已完成（分区文件已完整写出后调用）"""
+        with self._lock:
+            self._data.setdefault('partitions', {})[label] = {
+                'filename': filename,
+                'rows': rows,
+                'start_date': start_date.isoformat(),
+                'end_date': end_date.isoformat(),
+                'completed_at': datetime.now().isoformat()
+            }
+            self._save()
+
+    def get_params(self) -> Optional[Dict]:
+        with self._lock:
+            return self._data.get('params')
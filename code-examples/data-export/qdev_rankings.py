@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Q Dev用户排行榜引擎
+单次遍历行数据，为任意数量的排行榜各维护一个容量为N的堆，
+N个排行榜只需一次扫描，而不是N次全表排序
+"""
+
+import heapq
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+class RankingSpec:
+    """排行榜定义"""
+
+    def __init__(self, name: str, keys: Sequence[str], columns: Sequence[str],
+                 where: Optional[Callable[[Dict], bool]] = None):
+        """
+        Args:
+            name: 排行榜名称（结果中的键）
+            keys: 排序字段，依次作为降序排序键和并列时的次级排序键
+            columns: 输出字段
+            where: 行过滤条件
+        """
+        self.name = name
+        self.keys = tuple(keys)
+        self.columns = tuple(columns)
+        self.where = where
+
+    def sort_key(self, row: Dict) -> Tuple:
+        # 与 ORDER BY ... DESC 一致: NULL 排在所有值之后
+        return tuple((row.get(key) is not None, row.get(key) or 0) for key in self.keys)
+
+
+def _has_suggestions(row: Dict) -> bool:
+    value = row.get('total_inline_suggestions_count', row.get('inline_suggestions_count'))
+    return value is not None and value > 0
+
+
+# 与 QDevJSONExporter.export_user_rankings 原有的三个排行榜一致
+USER_METRICS_RANKINGS = [
+    RankingSpec('top_suggestions', ['total_inline_suggestions_count'],
+                ['user_id', 'display_name', 'total_inline_suggestions_count']),
+    RankingSpec('top_acceptance_rate', ['acceptance_rate', 'total_inline_acceptance_count'],
+                ['user_id', 'display_name', 'acceptance_rate', 'total_inline_acceptance_count'],
+                where=_has_suggestions),
+    RankingSpec('top_ai_code_lines', ['total_inline_ai_code_lines'],
+                ['user_id', 'display_name', 'total_inline_ai_code_lines'])
+]
+
+# 基于 _tool_q_dev_user_data 窗口汇总的排行榜
+DAILY_WINDOW_RANKINGS = [
+    RankingSpec('top_suggestions', ['inline_suggestions_count'],
+                ['user_id', 'display_name', 'inline_suggestions_count']),
+    RankingSpec('top_acceptance_rate', ['acceptance_rate', 'inline_acceptance_count'],
+                ['user_id', 'display_name', 'acceptance_rate', 'inline_acceptance_count'],
+                where=_has_suggestions),
+    RankingSpec('top_ai_code_lines', ['inline_ai_code_lines'],
+                ['user_id', 'display_name', 'inline_ai_code_lines']),
+    RankingSpec('top_chat_messages', ['chat_messages_sent'],
+                ['user_id', 'display_name', 'chat_messages_sent']),
+    RankingSpec('top_code_fix', ['code_fix_generation_event_count'],
+                ['user_id', 'display_name', 'code_fix_generation_event_count']),
+    RankingSpec('top_test_generation', ['test_generation_event_count'],
+                ['user_id', 'display_name', 'test_generation_event_count']),
+    RankingSpec('top_doc_generation', ['doc_generation_event_count'],
+                ['user_id', 'display_name', 'doc_generation_event_count'])
+]
+
+# 窗口汇总时累加的日常数据字段
+DAILY_SUM_COLUMNS = (
+    'inline_suggestions_count',
+    'inline_acceptance_count',
+    'inline_ai_code_lines',
+    'chat_messages_sent',
+    'chat_messages_interacted',
+    'code_fix_generation_event_count',
+    'test_generation_event_count',
+    'doc_generation_event_count',
+    'transformation_event_count'
+)
+
+
+class TopNRanker:
+    """多排行榜Top-N选择器"""
+
+    def __init__(self, specs: Sequence[RankingSpec], limit: int = 10):
+        self.specs = list(specs)
+        self.limit = limit
+        # 堆元素: (排序键, -序号, 行)；堆顶是当前最差的一项，并列时后出现的更差
+        self._heaps: Dict[str, List] = {spec.name: [] for spec in self.specs}
+        self._seq = 0
+
+    def add(self, row: Dict):
+        """加入一行"""
+        self._seq += 1
+        for spec in self.specs:
+            if spec.where is not None and not spec.where(row):
+                continue
+            heap = self._heaps[spec.name]
+            item = (spec.sort_key(row), -self._seq, row)
+            if len(heap) < self.limit:
+                heapq.heappush(heap, item)
+            elif item[:2] > heap[0][:2]:
+                heapq.heapreplace(heap, item)
+
+    def add_all(self, rows: Iterable[Dict]) -> 'TopNRanker':
+        for row in rows:
+            self.add(row)
+        return self
+
+    def results(self) -> Dict[str, List[Dict]]:
+        """各排行榜结果（按排名先后，只保留输出字段）"""
+        results = {}
+        for spec in self.specs:
+            ranked = sorted(self._heaps[spec.name], key=lambda item: item[:2], reverse=True)
+            results[spec.name] = [{column: row.get(column) for column in spec.columns}
+                                  for _, _, row in ranked]
+        return results
+
+
+def rank_rows(rows: Iterable[Dict], specs: Sequence[RankingSpec] = USER_METRICS_RANKINGS,
+              limit: int = 10) -> Dict[str, List[Dict]]:
+    """单次遍历计算多个排行榜"""
+    if limit <= 0:
+        return {spec.name: [] for spec in specs}
+    return TopNRanker(specs, limit).add_all(rows).results()
+
+
+def rank_daily_windows(daily_rows: Iterable[Dict], windows: Sequence[int] = (7, 30, 90),
+                       specs: Sequence[RankingSpec] = DAILY_WINDOW_RANKINGS,
+                       limit: int = 10) -> Dict[str, Dict[str, List[Dict]]]:
+    """
+    按时间窗口计算排行榜
+
+    单次遍历日常数据，为每个窗口按用户累加指标，再对每个窗口做Top-N选择
+
+    Args:
+        daily_rows: 日常数据行，需包含 _age_days（距今天数，由数据库计算）
+        windows: 窗口天数
+        specs: 排行榜定义
+        limit: 每个排行榜的人数
+
+    Returns:
+        Dict: 'last_{N}_days' -> 排行榜结果
+    """
+    totals: Dict[int, Dict[str, Dict]] = {window: defaultdict(dict) for window in windows}
+
+    for row in daily_rows:
+        age = row['_age_days']
+        for window in windows:
+            if age is None or age > window:
+                continue
+            user = totals[window][row['user_id']]
+            if not user:
+                user['user_id'] = row['user_id']
+                user['display_name'] = row.get('display_name')
+                for column in DAILY_SUM_COLUMNS:
+                    user[column] = 0
+            for column in DAILY_SUM_COLUMNS:
+                user[column] += row.get(column) or 0
+
+    results = {}
+    for window in windows:
+        users = list(totals[window].values())
+        for user in users:
+            suggestions = user['inline_suggestions_count']
+            user['acceptance_rate'] = (round(user['inline_acceptance_count'] / suggestions, 4)
+                                       if suggestions else None)
+        results[f'last_{window}_days'] = rank_rows(users, specs, limit)
+    return results
+
+
+def merge_rankings(rankings_by_key: Dict, specs: Sequence[RankingSpec] = USER_METRICS_RANKINGS,
+                   limit: int = 10, key_column: str = 'connection_id') -> Dict[str, List[Dict]]:
+    """
+    合并多个连接各自的Top-N排行榜
+
+    全局Top-N一定包含在各连接Top-N的并集中，因此只需对并集再做一次选择，
+    结果中以key_column标注来源
+
+    Args:
+        rankings_by_key: 来源标识（如连接ID） -> 该来源的排行榜结果
+        specs: 排行榜定义（需与各来源使用的一致）
+        limit: 每个排行榜的人数
+        key_column: 来源标识的输出字段名
+
+    Returns:
+        Dict: 合并后的排行榜
+    """
+    merged = {}
+    for spec in specs:
+        # 各来源已按where过滤，排序字段都在输出字段中
+        merged_spec = RankingSpec(spec.name, spec.keys, (key_column,) + spec.columns)
+        entries = (dict(entry, **{key_column: key})
+                   for key, rankings in rankings_by_key.items()
+                   for entry in rankings.get(spec.name, []))
+        merged.update(rank_rows(entries, [merged_spec], limit))
+    return merged
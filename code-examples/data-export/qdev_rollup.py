@@ -0,0 +1,460 @@
+#!/usr/bin/env python3
+"""
+Q Dev指标本地汇总库
+把 _tool_q_dev_user_data / _tool_q_dev_user_metrics 增量同步到本地SQLite，
+维护按日和按用户的预聚合结果，趋势和排行榜查询直接在本地完成，不再占用DevLake的MySQL
+"""
+
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from qdev_aggregates import compute_daily_trends
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS user_daily (
+    connection_id INTEGER NOT NULL,
+    user_id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    display_name TEXT,
+    inline_suggestions_count INTEGER,
+    inline_acceptance_count INTEGER,
+    inline_ai_code_lines INTEGER,
+    chat_messages_sent INTEGER,
+    PRIMARY KEY (connection_id, user_id, date)
+);
+
+CREATE TABLE IF NOT EXISTS daily_rollup (
+    connection_id INTEGER NOT NULL,
+    date TEXT NOT NULL,
+    active_users INTEGER,
+    daily_suggestions INTEGER,
+    daily_acceptances INTEGER,
+    daily_ai_lines INTEGER,
+    daily_chat_messages INTEGER,
+    daily_acceptance_rate TEXT,
+    PRIMARY KEY (connection_id, date)
+);
+
+CREATE TABLE IF NOT EXISTS user_rollup (
+    connection_id INTEGER NOT NULL,
+    user_id TEXT NOT NULL,
+    display_name TEXT,
+    total_inline_suggestions_count INTEGER,
+    total_inline_acceptance_count INTEGER,
+    acceptance_rate REAL,
+    total_inline_ai_code_lines INTEGER,
+    PRIMARY KEY (connection_id, user_id)
+);
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    connection_id INTEGER NOT NULL,
+    table_name TEXT NOT NULL,
+    watermark TEXT,
+    synced_at REAL,
+    PRIMARY KEY (connection_id, table_name)
+);
+"""
+
+# PRAGMA user_version；版本0的 daily_rollup 以REAL保存接受率，打开时由 user_daily 重建
+SCHEMA_VERSION = 1
+
+WATERMARK_FORMAT = '%Y-%m-%d %H:%M:%S.%f'
+
+# SQLite单条语句的参数个数上限以内的分批大小
+_CHUNK_SIZE = 500
+
+_TREND_SUM_COLUMNS = ('daily_suggestions', 'daily_acceptances', 'daily_ai_lines', 'daily_chat_messages')
+
+# sync_state 中记录源库时钟的伪表名：watermark 为同步时源库的 NOW()，synced_at 为同一时刻的本地时间
+SOURCE_CLOCK = '_source_clock'
+
+
+def _to_text(value) -> Optional[str]:
+    """日期时间统一存为ISO字符串，与JSON导出中的格式一致"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+class QDevRollupStore:
+    """本地SQLite汇总库"""
+
+    def __init__(self, path: str = 'qdev_rollup.db', min_sync_interval: float = 300,
+                 watermark_overlap: float = 300, batch_size: int = 5000):
+        """
+        初始化汇总库
+
+        Args:
+            path: SQLite文件路径
+            min_sync_interval: 两次同步之间的最小间隔（秒），间隔内的查询不访问MySQL
+            watermark_overlap: 增量读取时水位线向前回退的秒数，覆盖提交晚于时间戳的行
+            batch_size: 同步时每批从MySQL读取的行数
+        """
+        self.path = path
+        self.min_sync_interval = min_sync_interval
+        self.watermark_overlap = watermark_overlap
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        with closing(self._connect()) as conn:
+            if conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+                self._upgrade_schema(conn)
+            conn.executescript(SCHEMA)
+
+    def _upgrade_schema(self, conn: sqlite3.Connection):
+        """重建旧版本的 daily_rollup（由本地 user_daily 重新计算）"""
+        conn.execute("DROP TABLE IF EXISTS daily_rollup")
+        conn.executescript(SCHEMA)
+        with conn:
+            for row in conn.execute("SELECT DISTINCT connection_id FROM user_daily").fetchall():
+                dates = [r['date'] for r in conn.execute(
+                    "SELECT DISTINCT date FROM user_daily WHERE connection_id = ?", (row['connection_id'],)
+                )]
+                self._refresh_daily_rollup(conn, row['connection_id'], dates)
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _get_state(self, conn: sqlite3.Connection, connection_id: int, table_name: str):
+        row = conn.execute(
+            "SELECT watermark, synced_at FROM sync_state WHERE connection_id = ? AND table_name = ?",
+            (connection_id, table_name)
+        ).fetchone()
+        return (row['watermark'], row['synced_at']) if row else (None, None)
+
+    def _set_state(self, conn: sqlite3.Connection, connection_id: int, table_name: str,
+                   watermark: Optional[str], synced_at: Optional[float] = None):
+        conn.execute(
+            "INSERT OR REPLACE INTO sync_state (connection_id, table_name, watermark, synced_at) "
+            "VALUES (?, ?, ?, ?)",
+            (connection_id, table_name, watermark, time.time() if synced_at is None else synced_at)
+        )
+
+    def _since(self, watermark: Optional[str]) -> Optional[str]:
+        """水位线回退 watermark_overlap 秒后的增量读取起点"""
+        if watermark is None:
+            return None
+        since = datetime.strptime(watermark, WATERMARK_FORMAT) - timedelta(seconds=self.watermark_overlap)
+        return since.strftime(WATERMARK_FORMAT)
+
+    @staticmethod
+    def _read_source_clock(source, connection_id: int):
+        """读取源库两张表当前的最大 updated_at 以及源库的 NOW()"""
+        conn = source.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                SELECT
+                    (SELECT MAX(updated_at) FROM _tool_q_dev_user_data WHERE connection_id = %s),
+                    (SELECT MAX(updated_at) FROM _tool_q_dev_user_metrics WHERE connection_id = %s),
+                    NOW()
+                """,
+                (connection_id, connection_id)
+            )
+            return cursor.fetchone()
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _read_source_daily_keys(source, connection_id: int, dates: List[str]) -> Set[Tuple[str, str]]:
+        """源库中指定日期的全部 (user_id, date)"""
+        keys = set()
+        conn = source.get_connection()
+        try:
+            cursor = conn.cursor()
+            for i in range(0, len(dates), _CHUNK_SIZE):
+                chunk = dates[i:i + _CHUNK_SIZE]
+                cursor.execute(
+                    f"SELECT user_id, date FROM _tool_q_dev_user_data "
+                    f"WHERE connection_id = %s AND date IN ({', '.join(['%s'] * len(chunk))})",
+                    [connection_id] + chunk
+                )
+                keys.update((user_id, _to_text(day)) for user_id, day in cursor.fetchall())
+        finally:
+            conn.close()
+        return keys
+
+    @staticmethod
+    def _read_source_user_ids(source, connection_id: int) -> Set[str]:
+        """源库用户指标表中的全部 user_id"""
+        conn = source.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT user_id FROM _tool_q_dev_user_metrics WHERE connection_id = %s",
+                           (connection_id,))
+            return {user_id for user_id, in cursor.fetchall()}
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _read_source_counts(source, connection_id: int) -> Tuple[Dict[str, int], int]:
+        """源库日常数据每天的行数，以及用户指标的行数"""
+        conn = source.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT date, COUNT(*) FROM _tool_q_dev_user_data WHERE connection_id = %s GROUP BY date",
+                (connection_id,)
+            )
+            daily_counts = {_to_text(day): count for day, count in cursor.fetchall()}
+            cursor.execute("SELECT COUNT(*) FROM _tool_q_dev_user_metrics WHERE connection_id = %s",
+                           (connection_id,))
+            return daily_counts, cursor.fetchone()[0]
+        finally:
+            conn.close()
+
+    def _delete_removed_rows(self, conn: sqlite3.Connection, source, connection_id: int) -> Tuple[List[str], int]:
+        """
+        删除源库中已不存在的行
+
+        同步写入后本地包含源库的全部行，因此某天本地行数多于源库时才说明该天有行被删除，
+        只需对这些日期读取源库的主键比对；用户指标同理
+
+        Returns:
+            Tuple: (删除了日常数据行的日期, 删除的日常数据行数 + 用户指标行数)
+        """
+        source_daily, source_metrics = self._read_source_counts(source, connection_id)
+        local_daily = {row['date']: row['n'] for row in conn.execute(
+            "SELECT date, COUNT(*) AS n FROM user_daily WHERE connection_id = ? GROUP BY date", (connection_id,)
+        )}
+        stale_dates = sorted(day for day, count in local_daily.items() if count > source_daily.get(day, 0))
+
+        deleted = 0
+        if stale_dates:
+            source_keys = self._read_source_daily_keys(source, connection_id, stale_dates)
+            removed = []
+            for i in range(0, len(stale_dates), _CHUNK_SIZE):
+                chunk = stale_dates[i:i + _CHUNK_SIZE]
+                removed += [(row['user_id'], row['date']) for row in conn.execute(
+                    f"SELECT user_id, date FROM user_daily WHERE connection_id = ? "
+                    f"AND date IN ({', '.join('?' * len(chunk))})",
+                    [connection_id] + chunk
+                ) if (row['user_id'], row['date']) not in source_keys]
+            conn.executemany("DELETE FROM user_daily WHERE connection_id = ? AND user_id = ? AND date = ?",
+                             [(connection_id, user_id, day) for user_id, day in removed])
+            deleted += len(removed)
+
+        local_metrics = conn.execute("SELECT COUNT(*) FROM user_rollup WHERE connection_id = ?",
+                                     (connection_id,)).fetchone()[0]
+        if local_metrics > source_metrics:
+            source_users = self._read_source_user_ids(source, connection_id)
+            removed_users = [row['user_id'] for row in conn.execute(
+                "SELECT user_id FROM user_rollup WHERE connection_id = ?", (connection_id,)
+            ) if row['user_id'] not in source_users]
+            conn.executemany("DELETE FROM user_rollup WHERE connection_id = ? AND user_id = ?",
+                             [(connection_id, user_id) for user_id in removed_users])
+            deleted += len(removed_users)
+
+        return stale_dates, deleted
+
+    def reconcile(self, source, connection_id: int = 1) -> Dict[str, int]:
+        """
+        强制增量同步后删除源库中已删除的行，并重算受影响日期的按日汇总
+
+        需要按日期对整个连接的日常数据做一次分组计数，比增量同步重得多，
+        应在低峰时段单独定期调用（例如每天一次），而不是每次同步都执行
+
+        Args:
+            source: QDevJSONExporter 实例
+            connection_id: 连接ID
+
+        Returns:
+            Dict[str, int]: 同 sync
+        """
+        return self.sync(source, connection_id, force=True, reconcile=True)
+
+    def sync(self, source, connection_id: int = 1, force: bool = False,
+             reconcile: bool = False) -> Dict[str, int]:
+        """
+        从DevLake增量同步
+
+        读取 updated_at 不早于上次水位线回退 watermark_overlap 秒的行（重新采集更新的日常数据也会同步），
+        按批次键集分页读取、按主键覆盖写入，并只重算受影响日期的按日汇总。
+        水位线取读取之前源库的最大 updated_at，读取期间提交的行下次同步时会重新读到。
+        增量读取看不到源库中删除的行，这些行会保留在本地，直到调用 reconcile 或传入 reconcile=True
+
+        Args:
+            source: QDevJSONExporter 实例（提供连接池和 iter_user_daily_changes / iter_user_metrics_changes）
+            connection_id: 连接ID
+            force: 忽略 min_sync_interval 强制同步
+            reconcile: 同步后是否执行 reconcile（读取整个连接的按日行数，开销较大）
+
+        Returns:
+            Dict[str, int]: 本次同步的日常数据行数、用户指标行数和删除的行数
+        """
+        result = self._sync(source, connection_id, force)
+        result['deleted_rows'] = self._reconcile(source, connection_id) if reconcile else 0
+        return result
+
+    def _reconcile(self, source, connection_id: int) -> int:
+        """删除源库中已删除的行并重算受影响日期的按日汇总，返回删除的行数"""
+        with self._lock, closing(self._connect()) as conn, conn:
+            stale_dates, deleted = self._delete_removed_rows(conn, source, connection_id)
+            self._refresh_daily_rollup(conn, connection_id, stale_dates)
+        return deleted
+
+    def _sync(self, source, connection_id: int, force: bool) -> Dict[str, int]:
+        """增量同步（不处理删除）"""
+        with self._lock, closing(self._connect()) as conn:
+            daily_watermark, synced_at = self._get_state(conn, connection_id, '_tool_q_dev_user_data')
+            metrics_watermark, _ = self._get_state(conn, connection_id, '_tool_q_dev_user_metrics')
+
+            if not force and synced_at is not None and time.time() - synced_at < self.min_sync_interval:
+                return {'daily_rows': 0, 'metric_rows': 0}
+
+            new_daily, new_metrics, source_now = self._read_source_clock(source, connection_id)
+            clock_read_at = time.time()
+            daily_count = metric_count = 0
+
+            with conn:
+                dates = set()
+                for batch in source.iter_user_daily_changes(connection_id, self._since(daily_watermark),
+                                                            self.batch_size):
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO user_daily (connection_id, user_id, date, display_name, "
+                        "inline_suggestions_count, inline_acceptance_count, inline_ai_code_lines, "
+                        "chat_messages_sent) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        [(connection_id, row['user_id'], _to_text(row['date']), row.get('display_name'),
+                          row.get('inline_suggestions_count'), row.get('inline_acceptance_count'),
+                          row.get('inline_ai_code_lines'), row.get('chat_messages_sent'))
+                         for row in batch]
+                    )
+                    dates.update(_to_text(row['date']) for row in batch)
+                    daily_count += len(batch)
+
+                for batch in source.iter_user_metrics_changes(connection_id, self._since(metrics_watermark),
+                                                              self.batch_size):
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO user_rollup (connection_id, user_id, display_name, "
+                        "total_inline_suggestions_count, total_inline_acceptance_count, acceptance_rate, "
+                        "total_inline_ai_code_lines) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        [(connection_id, row['user_id'], row.get('display_name'),
+                          row.get('total_inline_suggestions_count'), row.get('total_inline_acceptance_count'),
+                          row.get('acceptance_rate'), row.get('total_inline_ai_code_lines'))
+                         for row in batch]
+                    )
+                    metric_count += len(batch)
+
+                self._refresh_daily_rollup(conn, connection_id, sorted(dates))
+
+                self._set_state(conn, connection_id, '_tool_q_dev_user_data',
+                                new_daily.strftime(WATERMARK_FORMAT) if new_daily else daily_watermark)
+                self._set_state(conn, connection_id, '_tool_q_dev_user_metrics',
+                                new_metrics.strftime(WATERMARK_FORMAT) if new_metrics else metrics_watermark)
+                self._set_state(conn, connection_id, SOURCE_CLOCK, source_now.strftime(WATERMARK_FORMAT),
+                                clock_read_at)
+
+            return {'daily_rows': daily_count, 'metric_rows': metric_count}
+
+    def _refresh_daily_rollup(self, conn: sqlite3.Connection, connection_id: int, dates: Iterable[str]):
+        """
+        重算指定日期的按日汇总
+
+        汇总值用 compute_daily_trends 计算（与MySQL的 GROUP BY date 查询取值和类型一致），
+        接受率按Decimal文本保存；已没有行的日期删除汇总
+        """
+        dates = list(dates)
+        for i in range(0, len(dates), _CHUNK_SIZE):
+            chunk = dates[i:i + _CHUNK_SIZE]
+            placeholders = ', '.join('?' * len(chunk))
+            rows = [dict(row) for row in conn.execute(
+                f"""
+                SELECT user_id, date, inline_suggestions_count, inline_acceptance_count,
+                       inline_ai_code_lines, chat_messages_sent
+                FROM user_daily
+                WHERE connection_id = ? AND date IN ({placeholders})
+                ORDER BY date DESC
+                """,
+                [connection_id] + chunk
+            )]
+            conn.execute(f"DELETE FROM daily_rollup WHERE connection_id = ? AND date IN ({placeholders})",
+                         [connection_id] + chunk)
+            conn.executemany(
+                "INSERT INTO daily_rollup VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(connection_id, trend['date'], trend['active_users'],
+                  *(None if trend[name] is None else int(trend[name]) for name in _TREND_SUM_COLUMNS),
+                  None if trend['daily_acceptance_rate'] is None else str(trend['daily_acceptance_rate']))
+                 for trend in compute_daily_trends(rows)]
+            )
+
+    def daily_trends(self, connection_id: int = 1, days: int = 30) -> List[Dict]:
+        """
+        最近days天的日常趋势（字段、取值和类型与 QDevJSONExporter.export_daily_trends 的SQL查询相同:
+        date为date，汇总值为Decimal，活跃用户数为int）
+
+        截止日期按源库时钟计算（与MySQL中的 CURDATE() 一致），尚未同步过时使用本地日期
+        """
+        with closing(self._connect()) as conn:
+            cutoff = (self._source_today(conn, connection_id) - timedelta(days=days)).isoformat()
+            rows = conn.execute(
+                """
+                SELECT date, active_users, daily_suggestions, daily_acceptances,
+                       daily_ai_lines, daily_chat_messages, daily_acceptance_rate
+                FROM daily_rollup
+                WHERE connection_id = ? AND date >= ?
+                ORDER BY date DESC
+                """,
+                (connection_id, cutoff)
+            ).fetchall()
+
+        return [{
+            'date': date.fromisoformat(row['date']),
+            'active_users': row['active_users'],
+            **{name: None if row[name] is None else Decimal(row[name]) for name in _TREND_SUM_COLUMNS},
+            'daily_acceptance_rate': None if row['daily_acceptance_rate'] is None
+            else Decimal(row['daily_acceptance_rate'])
+        } for row in rows]
+
+    def _source_today(self, conn: sqlite3.Connection, connection_id: int) -> date:
+        """按上次同步记录的源库时钟偏差推算源库的当前日期"""
+        source_now, synced_at = self._get_state(conn, connection_id, SOURCE_CLOCK)
+        if source_now is None:
+            return date.today()
+        offset = datetime.strptime(source_now, WATERMARK_FORMAT) - datetime.fromtimestamp(synced_at)
+        return (datetime.now() + offset).date()
+
+    def user_rankings(self, connection_id: int = 1, limit: int = 10) -> Dict[str, List[Dict]]:
+        """用户排行榜（结构与 QDevJSONExporter.export_user_rankings 相同）"""
+        queries = {
+            'top_suggestions': """
+                SELECT user_id, display_name, total_inline_suggestions_count
+                FROM user_rollup
+                WHERE connection_id = ?
+                ORDER BY total_inline_suggestions_count DESC, user_id
+                LIMIT ?
+            """,
+            'top_acceptance_rate': """
+                SELECT user_id, display_name, acceptance_rate, total_inline_acceptance_count
+                FROM user_rollup
+                WHERE connection_id = ? AND total_inline_suggestions_count > 0
+                ORDER BY acceptance_rate DESC, total_inline_acceptance_count DESC, user_id
+                LIMIT ?
+            """,
+            'top_ai_code_lines': """
+                SELECT user_id, display_name, total_inline_ai_code_lines
+                FROM user_rollup
+                WHERE connection_id = ?
+                ORDER BY total_inline_ai_code_lines DESC, user_id
+                LIMIT ?
+            """
+        }
+
+        with closing(self._connect()) as conn:
+            return {
+                name: [dict(row) for row in conn.execute(query, (connection_id, limit)).fetchall()]
+                for name, query in queries.items()
+            }
+
+    def reset(self, connection_id: int):
+        """清空某个连接的本地数据，下次同步时重新全量读取"""
+        with self._lock, closing(self._connect()) as conn, conn:
+            for table in ('user_daily', 'daily_rollup', 'user_rollup', 'sync_state'):
+                conn.execute(f"DELETE FROM {table} WHERE connection_id = ?", (connection_id,))
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Q Dev指标Arrow/Parquet输出
+为 _tool_q_dev_user_metrics 和 _tool_q_dev_user_data 提供带类型的列式输出（依赖pyarrow，可选安装）
+"""
+
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow为可选依赖，仅Parquet输出需要
+    pa = None
+    pq = None
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("Parquet输出需要安装pyarrow: pip install pyarrow")
+
+
+def user_metrics_schema() -> 'pa.Schema':
+    """_tool_q_dev_user_metrics 列类型"""
+    _require_pyarrow()
+    return pa.schema([
+        ('user_id', pa.string()),
+        ('display_name', pa.string()),
+        ('first_date', pa.date32()),
+        ('last_date', pa.date32()),
+        ('total_days', pa.int64()),
+        ('total_inline_suggestions_count', pa.int64()),
+        ('total_inline_acceptance_count', pa.int64()),
+        ('acceptance_rate', pa.float64()),
+        ('total_inline_ai_code_lines', pa.int64()),
+        ('avg_inline_suggestions_count', pa.float64()),
+        ('avg_inline_acceptance_count', pa.float64()),
+        ('total_code_review_findings_count', pa.int64()),
+        ('created_at', pa.timestamp('ms')),
+        ('updated_at', pa.timestamp('ms'))
+    ])
+
+
+def user_daily_data_schema() -> 'pa.Schema':
+    """_tool_q_dev_user_data 列类型"""
+    _require_pyarrow()
+    return pa.schema([
+        ('user_id', pa.string()),
+        ('display_name', pa.string()),
+        ('date', pa.date32()),
+        ('inline_suggestions_count', pa.int64()),
+        ('inline_acceptance_count', pa.int64()),
+        ('inline_ai_code_lines', pa.int64()),
+        ('chat_messages_sent', pa.int64()),
+        ('chat_messages_interacted', pa.int64()),
+        ('code_fix_generation_event_count', pa.int64()),
+        ('test_generation_event_count', pa.int64()),
+        ('doc_generation_event_count', pa.int64()),
+        ('transformation_event_count', pa.int64()),
+        ('created_at', pa.timestamp('ms'))
+    ])
+
+
+def select_schema(schema: 'pa.Schema', columns: Iterable[str]) -> 'pa.Schema':
+    """
+    按实际列裁剪schema（保持columns的顺序），未知列按字符串处理
+
+    Args:
+        schema: 完整schema
+        columns: 结果集中的列名
+
+    Returns:
+        pa.Schema: 裁剪后的schema
+    """
+    fields = []
+    for name in columns:
+        index = schema.get_field_index(name)
+        fields.append(schema.field(index) if index >= 0 else pa.field(name, pa.string()))
+    return pa.schema(fields)
+
+
+def _column_values(rows: List[Dict], field: 'pa.Field') -> List:
+    """按列类型预处理Python值（datetime列写入date32时截断到日期）"""
+    values = [row.get(field.name) for row in rows]
+    if pa.types.is_date(field.type):
+        return [v.date() if isinstance(v, datetime) else v for v in values]
+    if pa.types.is_string(field.type):
+        return [v if v is None or isinstance(v, str) else str(v) for v in values]
+    return values
+
+
+def rows_to_record_batch(rows: List[Dict], schema: 'pa.Schema') -> 'pa.RecordBatch':
+    """把一批字典行转换为带类型的RecordBatch"""
+    _require_pyarrow()
+    arrays = [pa.array(_column_values(rows, field), type=field.type) for field in schema]
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+class ParquetRowWriter:
+    """
+    增量Parquet写入器
+
+    按row_group_size缓冲字典行，每满一个行组写出一次，内存占用与总行数无关
+    """
+
+    def __init__(self, filename: str, schema: 'pa.Schema', compression: str = 'zstd',
+                 compression_level: Optional[int] = None, row_group_size: int = 100000):
+        """
+        初始化写入器
+
+        Args:
+            filename: 输出文件路径
+            schema: 列类型（可用select_schema按结果集裁剪）
+            compression: 压缩算法（zstd、snappy、gzip、none等）
+            compression_level: 压缩级别，None为算法默认值
+            row_group_size: 每个行组的行数
+        """
+        _require_pyarrow()
+        self.schema = schema
+        self.row_group_size = row_group_size
+        self.rows_written = 0
+        self._buffer: List[Dict] = []
+        self._writer = pq.ParquetWriter(filename, schema, compression=compression,
+                                        compression_level=compression_level)
+
+    def write_row(self, row: Dict):
+        """写入一行"""
+        self._buffer.append(row)
+        if len(self._buffer) >= self.row_group_size:
+            self._flush()
+
+    def write_rows(self, rows: Iterable[Dict]):
+        """写入多行"""
+        for row in rows:
+            self.write_row(row)
+
+    def _flush(self):
+        if self._buffer:
+            batch = rows_to_record_batch(self._buffer, self.schema)
+            self._writer.write_table(pa.Table.from_batches([batch]), row_group_size=self.row_group_size)
+            self.rows_written += len(self._buffer)
+            self._buffer = []
+
+    def close(self):
+        """写出剩余数据并关闭文件"""
+        self._flush()
+        self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def write_rows_to_parquet(rows: Iterable[Dict], filename: str, schema: 'pa.Schema',
+                          compression: str = 'zstd', compression_level: Optional[int] = None,
+                          row_group_size: int = 100000) -> int:
+    """
+    把字典行写入Parquet文件
+
+    Returns:
+        int: 写入的行数
+    """
+    with ParquetRowWriter(filename, schema, compression, compression_level, row_group_size) as writer:
+        writer.write_rows(rows)
+    return writer.rows_written
+
+
+def write_dataframe_to_parquet(df, filename: str, schema: 'pa.Schema', compression: str = 'zstd',
+                               compression_level: Optional[int] = None,
+                               row_group_size: int = 100000) -> int:
+    """
+    把pandas DataFrame按指定列类型写入Parquet文件
+
+    Returns:
+        int: 写入的行数
+    """
+    _require_pyarrow()
+    target = select_schema(schema, df.columns)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.cast(target)
+    pq.write_table(table, filename, compression=compression, compression_level=compression_level,
+                   row_group_size=row_group_size)
+    return table.num_rows
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Q Dev导出文件流式压缩
+以文本流的方式打开输出文件，序列化过程中边写边压缩，内存中不保留完整的未压缩文档
+（gzip使用标准库；zstd依赖zstandard，可选安装）
+"""
+
+import gzip
+import io
+from typing import IO, Optional
+
+try:
+    import zstandard
+except ImportError:  # zstandard为可选依赖，仅zstd压缩需要
+    zstandard = None
+
+COMPRESSION_EXTENSIONS = {
+    None: '',
+    'gzip': '.gz',
+    'zstd': '.zst'
+}
+
+# 各算法的默认压缩级别
+DEFAULT_LEVELS = {
+    'gzip': 6,
+    'zstd': 3
+}
+
+
+def _check_compression(compression: Optional[str]):
+    if compression not in COMPRESSION_EXTENSIONS:
+        raise ValueError(f"不支持的压缩算法: {compression}（可选: gzip、zstd）")
+    if compression == 'zstd' and zstandard is None:
+        raise ImportError("zstd压缩需要安装zstandard: pip install zstandard")
+
+
+def output_filename(filename: str, compression: Optional[str] = None) -> str:
+    """按压缩算法补全文件扩展名（已带扩展名时保持不变）"""
+    _check_compression(compression)
+    extension = COMPRESSION_EXTENSIONS[compression]
+    return filename if filename.endswith(extension) else filename + extension
+
+
+def open_output(filename: str, compression: Optional[str] = None,
+                level: Optional[int] = None, encoding: str = 'utf-8') -> IO[str]:
+    """
+    打开文本输出流
+
+    Args:
+        filename: 文件路径（不自动补全扩展名，见 output_filename）
+        compression: None、'gzip' 或 'zstd'
+        level: 压缩级别，None为算法默认值（gzip 6，zstd 3）
+        encoding: 文本编码
+
+    Returns:
+        IO[str]: 可写文本流，关闭时写出压缩尾部并关闭文件
+    """
+    _check_compression(compression)
+    if level is None:
+        level = DEFAULT_LEVELS.get(compression)
+
+    if compression is None:
+        return open(filename, 'w', encoding=encoding)
+
+    if compression == 'gzip':
+        return gzip.open(filename, 'wt', compresslevel=level, encoding=encoding)
+
+    raw = open(filename, 'wb')
+    writer = zstandard.ZstdCompressor(level=level).stream_writer(raw, closefd=True)
+    return io.TextIOWrapper(writer, encoding=encoding)
+
+
+def open_input(filename: str, encoding: str = 'utf-8') -> IO[str]:
+    """按扩展名打开（可能压缩的）文本输入流"""
+    if filename.endswith('.gz'):
+        return gzip.open(filename, 'rt', encoding=encoding)
+    if filename.endswith('.zst'):
+        _check_compression('zstd')
+        reader = zstandard.ZstdDecompressor().stream_reader(open(filename, 'rb'), closefd=True)
+        return io.TextIOWrapper(reader, encoding=encoding)
+    return open(filename, 'r', encoding=encoding)
@@ -7,30 +7,22 @@ Q Dev用户指标数据库直接访问Demo
 import mysql.connector
 import pandas as pd
 import json
+import os
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Sequence
+
+from qdev_db_pool import get_pool
+from qdev_watermark import (WatermarkStore, USER_METRICS_KEY, USER_DAILY_DATA_KEY, drop_seen_rows,
+                            watermark_from_rows)
+from qdev_metrics import MetricsRegistry, instrumented
+from qdev_records import UserMetricsRecord, UserDailyRecord, fetch_records
+from qdev_serializer import get_serializer
+from qdev_arrow import user_metrics_schema, user_daily_data_schema, write_dataframe_to_parquet
 
 class QDevMetricsDB:
     """Q Dev指标数据库访问类"""
     
-    def __init__(self, host='<EC2-PUBLIC-IP>', port=3306, user='merico', password='merico', database='lake'):
-        """初始化数据库连接配置"""
-        self.config = {
-            'host': host,
-            'port': port,
-            'user': user,
-            'password': password,
-            'database': database
-        }
-    
-    def get_connection(self):
-        """获取数据库连接"""
-        return mysql.connector.connect(**self.config)
-    
-    def get_user_metrics_summary(self, connection_id: int = 1) -> pd.DataFrame:
-        """获取用户指标汇总数据"""
-        query = """
-        SELECT 
+    USER_METRICS_COLUMNS = """
             user_id,
             display_name,
             first_date,
@@ -44,25 +36,9 @@ class QDevMetricsDB:
             avg_inline_acceptance_count,
             total_code_review_findings_count,
             created_at,
-            updated_at
-        FROM _tool_q_dev_user_metrics
-        WHERE connection_id = %s
-        ORDER BY total_inline_suggestions_count DESC
-        """
-        
-        conn = self.get_connection()
-        try:
-            df = pd.read_sql(query, conn, params=[connection_id])
-            return df
-        finally:
-            conn.close()
+            updated_at"""
     
-    def get_user_daily_data(self, connection_id: int = 1, 
-                           start_date: Optional[str] = None, 
-                           end_date: Optional[str] = None) -> pd.DataFrame:
-        """获取用户日常数据"""
-        query = """
-        SELECT 
+    USER_DAILY_COLUMNS = """
             user_id,
             display_name,
             date,
@@ -73,7 +49,81 @@ class QDevMetricsDB:
             chat_messages_interacted,
             code_fix_generation_event_count,
             test_generation_event_count,
-            created_at
+            created_at"""
+    
+    # 增量导出时额外选择 updated_at（水位线列）
+    USER_DAILY_CHANGE_COLUMNS = USER_DAILY_COLUMNS + """,
+            updated_at"""
+    
+    def __init__(self, host='<EC2-PUBLIC-IP>', port=3306, user='merico', password='merico', database='lake',
+                 pool_size: int = 5, pool_max_idle_time: float = 300, serializer: Optional[str] = 'auto',
+                 metrics: Optional[MetricsRegistry] = None):
+        """
+        初始化数据库连接配置
+        
+        Args:
+            serializer: JSON序列化后端 'auto'、'orjson' 或 'json'
+            metrics: 指标注册表，默认与连接池共用进程级注册表
+        """
+        self.config = {
+            'host': host,
+            'port': port,
+            'user': user,
+            'password': password,
+            'database': database
+        }
+        self.pool = get_pool(self.config, pool_size=pool_size, max_idle_time=pool_max_idle_time)
+        self.serializer = get_serializer(serializer)
+        self.metrics = metrics or self.pool.metrics
+    
+    def get_connection(self):
+        """从共享连接池获取数据库连接（close()即归还）"""
+        return self.pool.get_connection()
+    
+    def _user_metrics_query(self, connection_id: int = 1, updated_since: Optional[str] = None,
+                            user_ids: Optional[Sequence[str]] = None, columns: Optional[str] = None):
+        """
+        构建用户指标汇总查询语句及参数
+        
+        Args:
+            user_ids: 只查询这些用户，None表示全部用户
+            columns: 查询的列，默认为 USER_METRICS_COLUMNS
+        """
+        query = f"""
+        SELECT {columns or self.USER_METRICS_COLUMNS}
+        FROM _tool_q_dev_user_metrics
+        WHERE connection_id = %s
+        """
+        
+        params = [connection_id]
+        
+        if updated_since:
+            query += " AND updated_at >= %s"
+            params.append(updated_since)
+        
+        if user_ids is not None:
+            query += f" AND user_id IN ({', '.join(['%s'] * len(user_ids))})"
+            params.extend(user_ids)
+        
+        query += " ORDER BY total_inline_suggestions_count DESC"
+        
+        return query, params
+    
+    def _user_daily_query(self, connection_id: int = 1,
+                          start_date: Optional[str] = None,
+                          end_date: Optional[str] = None,
+                          updated_since: Optional[str] = None,
+                          user_ids: Optional[Sequence[str]] = None,
+                          columns: Optional[str] = None):
+        """
+        构建用户日常数据查询语句及参数
+        
+        Args:
+            user_ids: 只查询这些用户，None表示全部用户
+            columns: 查询的列，默认为 USER_DAILY_COLUMNS
+        """
+        query = f"""
+        SELECT {columns or self.USER_DAILY_COLUMNS}
         FROM _tool_q_dev_user_data
         WHERE connection_id = %s
         """
@@ -87,9 +137,30 @@ class QDevMetricsDB:
         if end_date:
             query += " AND date <= %s"
             params.append(end_date)
+        
+        if updated_since:
+            query += " AND updated_at >= %s"
+            params.append(updated_since)
+        
+        if user_ids is not None:
+            query += f" AND user_id IN ({', '.join(['%s'] * len(user_ids))})"
+            params.extend(user_ids)
             
         query += " ORDER BY date DESC, user_id"
         
+        return query, params
+    
+    def _fetch_records(self, query: str, params: List, record_type):
+        """执行查询并直接构造为紧凑行（不经过字典或DataFrame）"""
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            return fetch_records(cursor, record_type)
+        finally:
+            conn.close()
+    
+    def _read_dataframe(self, query: str, params: List) -> pd.DataFrame:
         conn = self.get_connection()
         try:
             df = pd.read_sql(query, conn, params=params)
@@ -97,31 +168,55 @@ class QDevMetricsDB:
         finally:
             conn.close()
     
+    @instrumented()
+    def get_user_metrics_summary(self, connection_id: int = 1,
+                                 updated_since: Optional[str] = None) -> pd.DataFrame:
+        """获取用户指标汇总数据，updated_since用于增量读取"""
+        return self._read_dataframe(*self._user_metrics_query(connection_id, updated_since))
+    
+    @instrumented()
+    def get_user_metrics_records(self, connection_id: int = 1,
+                                 updated_since: Optional[str] = None) -> List[UserMetricsRecord]:
+        """获取用户指标汇总数据（紧凑行，适合导出等不需要DataFrame的场景）"""
+        return self._fetch_records(*self._user_metrics_query(connection_id, updated_since),
+                                   UserMetricsRecord)
+    
+    @instrumented()
+    def get_user_daily_data(self, connection_id: int = 1, 
+                           start_date: Optional[str] = None, 
+                           end_date: Optional[str] = None,
+                           updated_since: Optional[str] = None) -> pd.DataFrame:
+        """获取用户日常数据，updated_since用于增量读取"""
+        return self._read_dataframe(*self._user_daily_query(connection_id, start_date, end_date, updated_since))
+    
+    @instrumented()
+    def get_user_daily_records(self, connection_id: int = 1,
+                               start_date: Optional[str] = None,
+                               end_date: Optional[str] = None,
+                               updated_since: Optional[str] = None) -> List[UserDailyRecord]:
+        """获取用户日常数据（紧凑行，适合导出等不需要DataFrame的场景）"""
+        return self._fetch_records(*self._user_daily_query(connection_id, start_date, end_date, updated_since),
+                                   UserDailyRecord)
+    
+    @instrumented()
     def get_user_detail(self, user_id: str, connection_id: int = 1) -> Dict:
-        """获取特定用户的详细数据"""
+        """获取特定用户的详细数据（全部列，与get_user_details中每个用户的结果相同）"""
         # 获取用户汇总数据
-        summary_query = """
-        SELECT * FROM _tool_q_dev_user_metrics
-        WHERE connection_id = %s AND user_id = %s
-        """
+        summary_query, summary_params = self._user_metrics_query(connection_id, user_ids=[user_id], columns='*')
         
         # 获取用户日常数据
-        daily_query = """
-        SELECT * FROM _tool_q_dev_user_data
-        WHERE connection_id = %s AND user_id = %s
-        ORDER BY date DESC
-        """
+        daily_query, daily_params = self._user_daily_query(connection_id, user_ids=[user_id], columns='*')
         
         conn = self.get_connection()
         try:
             cursor = conn.cursor(dictionary=True)
             
             # 获取汇总数据
-            cursor.execute(summary_query, [connection_id, user_id])
+            cursor.execute(summary_query, summary_params)
             summary = cursor.fetchone()
             
             # 获取日常数据
-            cursor.execute(daily_query, [connection_id, user_id])
+            cursor.execute(daily_query, daily_params)
             daily_data = cursor.fetchall()
             
             return {
@@ -130,7 +225,76 @@ class QDevMetricsDB:
             }
         finally:
             conn.close()
-    
+
+    @instrumented()
+    def get_user_details(self, user_ids: Optional[Sequence[str]] = None, connection_id: int = 1,
+                         chunk_size: int = 500) -> Dict[str, Dict]:
+        """
+        批量获取多个用户的详细数据（代替逐个调用get_user_detail）
+
+        每批用户只发出两条 user_id IN (...) 查询，结果在一次遍历中按用户分组；
+        user_ids为None时先读取连接下有指标或日常数据的全部用户ID，再同样分批查询。
+        查询的列与排序和get_user_detail相同，同一用户通过两个方法得到相同的结果
+
+        Args:
+            user_ids: 用户ID列表，None表示全部用户
+            connection_id: 连接ID
+            chunk_size: 每批查询的用户数（限制IN列表长度和单次结果集大小）
+
+        Returns:
+            Dict[str, Dict]: 用户ID -> {'user_summary', 'daily_data'}；
+            指定的用户没有数据时 user_summary 为 None、daily_data 为空列表
+        """
+        if chunk_size < 1:
+            raise ValueError(f"chunk_size必须大于0: {chunk_size}")
+
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor(dictionary=True)
+            if user_ids is None:
+                cursor.execute("""
+                SELECT user_id FROM _tool_q_dev_user_metrics WHERE connection_id = %s
+                UNION
+                SELECT user_id FROM _tool_q_dev_user_data WHERE connection_id = %s
+                ORDER BY user_id
+                """, (connection_id, connection_id))
+                user_ids = [row['user_id'] for row in cursor.fetchall()]
+            else:
+                user_ids = list(dict.fromkeys(user_ids))
+
+            details: Dict[str, Dict] = {
+                user_id: {'user_summary': None, 'daily_data': []} for user_id in user_ids
+            }
+            for i in range(0, len(user_ids), chunk_size):
+                chunk = user_ids[i:i + chunk_size]
+                metrics_query, metrics_params = self._user_metrics_query(connection_id, user_ids=chunk,
+                                                                         columns='*')
+                daily_query, daily_params = self._user_daily_query(connection_id, user_ids=chunk, columns='*')
+
+                cursor.execute(metrics_query, metrics_params)
+                for row in cursor.fetchall():
+                    detail = details.get(row['user_id'])
+                    if detail is None:
+                        detail = details[row['user_id']] = {'user_summary': None, 'daily_data': []}
+                    detail['user_summary'] = row
+
+                # 日常数据按 date DESC 排序，逐行追加后每个用户的列表保持日期倒序
+                cursor.execute(daily_query, daily_params)
+                while True:
+                    rows = cursor.fetchmany(5000)
+                    if not rows:
+                        break
+                    for row in rows:
+                        detail = details.get(row['user_id'])
+                        if detail is None:
+                            detail = details[row['user_id']] = {'user_summary': None, 'daily_data': []}
+                        detail['daily_data'].append(row)
+
+            return details
+        finally:
+            conn.close()
+
+    @instrumented()
     def get_metrics_statistics(self, connection_id: int = 1) -> Dict:
         """获取指标统计信息"""
         query = """
@@ -154,30 +318,128 @@ class QDevMetricsDB:
         finally:
             conn.close()
     
+    @instrumented()
     def export_to_json(self, output_file: str = 'qdev_metrics_export.json') -> str:
         """导出数据为JSON格式"""
         # 获取所有数据
-        summary_df = self.get_user_metrics_summary()
-        daily_df = self.get_user_daily_data()
+        # 紧凑行在写出时才转换为字典，不再经过DataFrame和to_dict('records')两次复制
+        summary_rows = self.get_user_metrics_records()
+        daily_rows = self.get_user_daily_records()
         statistics = self.get_metrics_statistics()
         
         # 组装导出数据
         export_data = {
             'export_info': {
                 'timestamp': datetime.now().isoformat(),
-                'total_users': len(summary_df),
+                'total_users': len(summary_rows),
                 'data_source': 'DevLake MySQL Database'
             },
             'statistics': statistics,
-            'user_metrics_summary': summary_df.to_dict('records'),
-            'user_daily_data': daily_df.to_dict('records')
+            'user_metrics_summary': summary_rows,
+            'user_daily_data': daily_rows
         }
         
         # 写入JSON文件
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(export_data, f, indent=2, default=str, ensure_ascii=False)
+        with self.metrics.phase('write') as current:
+            with open(output_file, 'w', encoding='utf-8') as f:
+                self.serializer.dump(export_data, f, pretty=True)
+            current.bytes = os.path.getsize(output_file)
         
         return output_file
+    
+    @instrumented()
+    def export_to_parquet(self, output_dir: str = 'qdev_parquet_export', connection_id: int = 1,
+                          compression: str = 'zstd', compression_level: Optional[int] = None,
+                          row_group_size: int = 100000) -> Dict[str, str]:
+        """
+        导出用户指标汇总和日常数据为Parquet文件（需要pyarrow）
+        
+        Args:
+            output_dir: 输出目录
+            connection_id: 连接ID
+            compression: 压缩算法（zstd、snappy、gzip、none等）
+            compression_level: 压缩级别
+            row_group_size: 每个行组的行数
+            
+        Returns:
+            Dict[str, str]: 文件类型 -> 文件路径
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        
+        files = {
+            'user_metrics': os.path.join(output_dir, 'user_metrics.parquet'),
+            'daily_data': os.path.join(output_dir, 'daily_data.parquet')
+        }
+        
+        write_dataframe_to_parquet(self.get_user_metrics_summary(connection_id), files['user_metrics'],
+                                   user_metrics_schema(), compression, compression_level, row_group_size)
+        write_dataframe_to_parquet(self.get_user_daily_data(connection_id), files['daily_data'],
+                                   user_daily_data_schema(), compression, compression_level, row_group_size)
+        
+        return files
+    
+    @instrumented()
+    def export_incremental_to_json(self, output_file: Optional[str] = None, connection_id: int = 1,
+                                   state_file: str = '.qdev_watermarks.json') -> Dict:
+        """
+        增量导出数据为JSON格式
+        
+        只导出不早于上次水位线变更的用户指标和日常数据（均按 updated_at，重新采集的日常数据也会导出），
+        上次已导出的同一时间戳的行按主键去重；文件写入成功后才推进水位线
+        
+        Args:
+            output_file: 增量文件路径，默认按时间戳生成
+            connection_id: 连接ID
+            state_file: 水位线文件路径
+            
+        Returns:
+            Dict: 增量文件路径和变更行数
+        """
+        store = WatermarkStore(state_file)
+        metrics_since = store.get(connection_id, '_tool_q_dev_user_metrics')
+        daily_since = store.get(connection_id, '_tool_q_dev_user_data')
+        
+        summary_rows = drop_seen_rows(self.get_user_metrics_records(connection_id, updated_since=metrics_since),
+                                      'updated_at', metrics_since,
+                                      store.get_boundary_keys(connection_id, '_tool_q_dev_user_metrics'),
+                                      USER_METRICS_KEY)
+        daily_query = self._user_daily_query(connection_id, updated_since=daily_since,
+                                             columns=self.USER_DAILY_CHANGE_COLUMNS)
+        daily_rows = drop_seen_rows(self._fetch_records(*daily_query, UserDailyRecord),
+                                    'updated_at', daily_since,
+                                    store.get_boundary_keys(connection_id, '_tool_q_dev_user_data'),
+                                    USER_DAILY_DATA_KEY)
+        
+        if output_file is None:
+            output_file = f"qdev_metrics_delta_{connection_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        
+        export_data = {
+            'export_info': {
+                'timestamp': datetime.now().isoformat(),
+                'connection_id': connection_id,
+                'user_metrics_updated_since': metrics_since,
+                'user_daily_data_updated_since': daily_since,
+                'data_source': 'DevLake MySQL Database'
+            },
+            'user_metrics_summary': summary_rows,
+            'user_daily_data': daily_rows
+        }
+        
+        with self.metrics.phase('write') as current:
+            with open(output_file, 'w', encoding='utf-8') as f:
+                self.serializer.dump(export_data, f, pretty=True)
+            current.bytes = os.path.getsize(output_file)
+        
+        store.set(connection_id, '_tool_q_dev_user_metrics',
+                  *watermark_from_rows(summary_rows, 'updated_at', USER_METRICS_KEY))
+        store.set(connection_id, '_tool_q_dev_user_data',
+                  *watermark_from_rows(daily_rows, 'updated_at', USER_DAILY_DATA_KEY))
+        
+        return {
+            'output_file': output_file,
+            'changed_user_metrics': len(summary_rows),
+            'changed_daily_records': len(daily_rows)
+        }
 
 def main():
     """Demo主函数"""
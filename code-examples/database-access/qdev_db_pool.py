@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Q Dev数据库连接池
+QDevMetricsDB 与 QDevJSONExporter 共享的进程级连接池，握手开销每个进程只付一次
+"""
+
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import mysql.connector
+
+from qdev_metrics import MetricsRegistry, get_registry
+
+
+class InstrumentedCursor:
+    """
+    记录查询执行和取数耗时的游标代理
+
+    execute 计入 query 阶段，fetch* 计入 fetch 阶段并记录行数，其余属性代理到底层游标
+    """
+
+    def __init__(self, raw_cursor, metrics: MetricsRegistry):
+        self._raw = raw_cursor
+        self._metrics = metrics
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def __iter__(self):
+        return iter(self._raw)
+
+    def execute(self, *args, **kwargs):
+        with self._metrics.phase('query'):
+            return self._raw.execute(*args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        with self._metrics.phase('query'):
+            return self._raw.executemany(*args, **kwargs)
+
+    def fetchall(self):
+        with self._metrics.phase('fetch') as current:
+            rows = self._raw.fetchall()
+            current.rows = len(rows)
+            return rows
+
+    def fetchmany(self, *args, **kwargs):
+        with self._metrics.phase('fetch') as current:
+            rows = self._raw.fetchmany(*args, **kwargs)
+            current.rows = len(rows)
+            return rows
+
+    def fetchone(self):
+        with self._metrics.phase('fetch') as current:
+            row = self._raw.fetchone()
+            current.rows = 0 if row is None else 1
+            return row
+
+
+class PooledConnection:
+    """
+    连接池中借出的连接
+
+    除close()外的属性与方法全部代理到底层mysql连接，
+    close()不会真正断开，而是把连接归还给连接池；cursor()返回记录耗时的游标代理
+    """
+
+    def __init__(self, pool: 'QDevConnectionPool', raw_connection):
+        self._pool = pool
+        self._raw = raw_connection
+        self._released = False
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def cursor(self, *args, **kwargs) -> InstrumentedCursor:
+        return InstrumentedCursor(self._raw.cursor(*args, **kwargs), self._pool.metrics)
+
+    def close(self):
+        """归还连接到连接池"""
+        if not self._released:
+            self._released = True
+            self._pool._release(self._raw)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class QDevConnectionPool:
+    """带借出健康检查和空闲回收的MySQL连接池"""
+
+    def __init__(self, config: Dict, pool_size: int = 5, max_idle_time: float = 300,
+                 checkout_timeout: float = 30, metrics: Optional[MetricsRegistry] = None):
+        """
+        初始化连接池
+
+        Args:
+            config: mysql.connector.connect 连接参数
+            pool_size: 最大连接数（空闲 + 借出）
+            max_idle_time: 空闲连接最长保留时间（秒），超时后关闭回收
+            checkout_timeout: 连接池耗尽时等待可用连接的最长时间（秒）
+            metrics: 指标注册表，默认为进程级注册表
+        """
+        if pool_size < 1:
+            raise ValueError("pool_size 必须大于0")
+
+        self.config = dict(config)
+        self.pool_size = pool_size
+        self.max_idle_time = max_idle_time
+        self.checkout_timeout = checkout_timeout
+        self.metrics = metrics or get_registry()
+
+        # 空闲连接栈: (连接, 归还时间)，后进先出以便冷连接自然过期
+        self._idle: List[Tuple[object, float]] = []
+        self._in_use = 0
+        self._condition = threading.Condition()
+
+    def _create_connection(self):
+        """新建一个物理连接"""
+        with self.metrics.phase('connect'):
+            return mysql.connector.connect(**self.config)
+
+    @staticmethod
+    def _discard(raw_connection):
+        """关闭物理连接并忽略错误"""
+        try:
+            raw_connection.close()
+        except Exception:
+            pass
+
+    @staticmethod
+    def _is_healthy(raw_connection) -> bool:
+        """借出前的健康检查"""
+        try:
+            raw_connection.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    def _evict_idle(self, now: float) -> List[object]:
+        """移出超过空闲时限的连接（需持有锁），返回待关闭的连接"""
+        expired = [raw for raw, released_at in self._idle
+                   if now - released_at > self.max_idle_time]
+        if expired:
+            self._idle = [(raw, released_at) for raw, released_at in self._idle
+                          if now - released_at <= self.max_idle_time]
+        return expired
+
+    def get_connection(self) -> PooledConnection:
+        """从连接池借出一个连接（借出耗时计入 qdev_pool_checkout_seconds，包括等待和新建连接）"""
+        started = time.monotonic()
+        connection = self._checkout(started + self.checkout_timeout)
+        self.metrics.observe('qdev_pool_checkout_seconds', time.monotonic() - started)
+        return connection
+
+    def _checkout(self, deadline: float) -> PooledConnection:
+        """借出连接: 优先复用空闲连接，池满时等待到deadline"""
+        while True:
+            with self._condition:
+                expired = self._evict_idle(time.monotonic())
+
+                while not self._idle and self._in_use >= self.pool_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError(f"等待数据库连接超时（连接池大小: {self.pool_size}）")
+                    self._condition.wait(remaining)
+
+                if self._idle:
+                    raw, _ = self._idle.pop()
+                else:
+                    raw = None
+                self._in_use += 1
+
+            for stale in expired:
+                self._discard(stale)
+
+            if raw is None:
+                try:
+                    raw = self._create_connection()
+                except Exception:
+                    self._return_slot()
+                    raise
+                return PooledConnection(self, raw)
+
+            if self._is_healthy(raw):
+                return PooledConnection(self, raw)
+
+            # 健康检查失败: 丢弃该连接并重新获取
+            self._discard(raw)
+            self._return_slot()
+
+    def _return_slot(self):
+        """释放一个借出名额"""
+        with self._condition:
+            self._in_use -= 1
+            self._condition.notify()
+
+    def _release(self, raw_connection):
+        """归还连接；存在未读结果或事务状态异常的连接直接丢弃"""
+        reusable = True
+        try:
+            if getattr(raw_connection, 'unread_result', False):
+                raw_connection.consume_results()
+            raw_connection.rollback()
+        except Exception:
+            reusable = False
+
+        with self._condition:
+            self._in_use -= 1
+            if reusable:
+                self._idle.append((raw_connection, time.monotonic()))
+            self._condition.notify()
+
+        if not reusable:
+            self._discard(raw_connection)
+
+    def close_all(self):
+        """关闭所有空闲连接"""
+        with self._condition:
+            idle, self._idle = self._idle, []
+        for raw, _ in idle:
+            self._discard(raw)
+
+    def stats(self) -> Dict:
+        """连接池状态"""
+        with self._condition:
+            return {
+                'pool_size': self.pool_size,
+                'idle': len(self._idle),
+                'in_use': self._in_use
+            }
+
+
+_POOLS: Dict[Tuple, QDevConnectionPool] = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def get_pool(config: Dict, pool_size: int = 5, max_idle_time: float = 300,
+             checkout_timeout: float = 30) -> QDevConnectionPool:
+    """
+    获取进程级共享连接池
+
+    相同连接参数的调用方（例如QDevMetricsDB和QDevJSONExporter）共用同一个连接池，
+    池参数以首次创建时为准
+
+    Args:
+        config: mysql.connector.connect 连接参数
+        pool_size: 最大连接数
+        max_idle_time: 空闲连接最长保留时间（秒）
+        checkout_timeout: 等待可用连接的最长时间（秒）
+
+    Returns:
+        QDevConnectionPool: 连接池实例
+    """
+    key = tuple(sorted(config.items()))
+    with _POOLS_LOCK:
+        pool = _POOLS.get(key)
+        if pool is None:
+            pool = QDevConnectionPool(config, pool_size, max_idle_time, checkout_timeout)
+            _POOLS[key] = pool
+        return pool
+
+
+def close_all_pools(pools: Optional[List[QDevConnectionPool]] = None):
+    """关闭所有共享连接池中的空闲连接"""
+    with _POOLS_LOCK:
+        targets = pools if pools is not None else list(_POOLS.values())
+    for pool in targets:
+        pool.close_all()
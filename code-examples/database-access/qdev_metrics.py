@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Q Dev导出与API调用的运行指标
+记录各阶段（连接、查询执行、取数、类型转换、写文件、HTTP请求）的耗时、行数和字节数，
+通过回调钩子、Prometheus文本格式输出或cProfile分析对外提供
+"""
+
+import cProfile
+import functools
+import io
+import os
+import pstats
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+# 耗时直方图的默认桶（秒）
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items() if value is not None))
+
+
+class Histogram:
+    """累积直方图（Prometheus语义: 每个桶统计小于等于上界的观测数）"""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """(桶上界, 累计数) 列表，最后一项为 +Inf"""
+        result = []
+        total = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            result.append(('+Inf' if bound == float('inf') else repr(float(bound)), total))
+        return result
+
+
+class Phase:
+    """一次阶段计时，行数和字节数可在阶段内设置"""
+
+    __slots__ = ('name', 'labels', 'rows', 'bytes', 'seconds', 'error')
+
+    def __init__(self, name: str, labels: Dict):
+        self.name = name
+        self.labels = labels
+        self.rows: Optional[int] = None
+        self.bytes: Optional[int] = None
+        self.seconds = 0.0
+        self.error: Optional[str] = None
+
+
+class MetricsRegistry:
+    """线程安全的指标注册表"""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, LabelKey], float] = {}
+        self._histograms: Dict[Tuple[str, LabelKey], Histogram] = {}
+        self._hooks: List[Callable[[Dict], None]] = []
+        self._local = threading.local()
+
+    def add_hook(self, hook: Callable[[Dict], None]) -> Callable[[Dict], None]:
+        """
+        注册回调；每个阶段结束和每次HTTP请求后以事件字典调用:
+        {'type', 'name', 'seconds', 'rows', 'bytes', 'labels', 'error'}
+        """
+        with self._lock:
+            self._hooks.append(hook)
+        return hook
+
+    def remove_hook(self, hook: Callable[[Dict], None]):
+        with self._lock:
+            if hook in self._hooks:
+                self._hooks.remove(hook)
+
+    def inc(self, name: str, value: float = 1, **labels):
+        """计数器累加"""
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        """直方图记录一次观测"""
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    def emit(self, event: Dict):
+        """调用全部回调（回调异常不影响导出）"""
+        with self._lock:
+            hooks = list(self._hooks)
+        for hook in hooks:
+            try:
+                hook(event)
+            except Exception as e:
+                print(f"指标回调失败: {e}")
+
+    def current_operation(self) -> Optional[str]:
+        """当前线程最外层阶段的名称（用作查询/取数阶段的operation标签）"""
+        stack = getattr(self._local, 'stack', None)
+        return stack[0] if stack else None
+
+    @contextmanager
+    def phase(self, name: str, **labels) -> Iterator[Phase]:
+        """
+        阶段计时
+
+        记录 qdev_phase_duration_seconds 直方图，以及 qdev_phase_rows_total /
+        qdev_phase_bytes_total 计数器（阶段内设置了 rows / bytes 时）
+
+        Args:
+            name: 阶段名称
+            **labels: 额外标签；未指定operation时使用当前线程最外层阶段名称
+        """
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        if 'operation' not in labels and stack:
+            labels['operation'] = stack[0]
+        current = Phase(name, labels)
+        stack.append(name)
+        start = time.perf_counter()
+        try:
+            yield current
+        except BaseException as e:
+            current.error = type(e).__name__
+            raise
+        finally:
+            current.seconds = time.perf_counter() - start
+            stack.pop()
+            self._finish(current)
+
+    def _finish(self, current: Phase):
+        labels = dict(current.labels, phase=current.name)
+        self.observe('qdev_phase_duration_seconds', current.seconds, **labels)
+        if current.rows is not None:
+            self.inc('qdev_phase_rows_total', current.rows, **labels)
+        if current.bytes is not None:
+            self.inc('qdev_phase_bytes_total', current.bytes, **labels)
+        if current.error is not None:
+            self.inc('qdev_phase_errors_total', 1, **labels)
+        self.emit({
+            'type': 'phase',
+            'name': current.name,
+            'seconds': current.seconds,
+            'rows': current.rows,
+            'bytes': current.bytes,
+            'labels': current.labels,
+            'error': current.error
+        })
+
+    def snapshot(self) -> Dict:
+        """当前全部指标（计数器和直方图）"""
+        with self._lock:
+            return {
+                'counters': [{'name': name, 'labels': dict(labels), 'value': value}
+                             for (name, labels), value in sorted(self._counters.items())],
+                'histograms': [{'name': name, 'labels': dict(labels), 'count': h.count, 'sum': h.sum,
+                                'buckets': h.cumulative()}
+                               for (name, labels), h in sorted(self._histograms.items())]
+            }
+
+    def to_prometheus(self) -> str:
+        """Prometheus文本格式输出"""
+        def format_labels(labels: LabelKey, extra: Tuple = ()) -> str:
+            items = list(labels) + list(extra)
+            if not items:
+                return ''
+            escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+                       for _, value in items)
+            return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(items, escaped)) + '}'
+
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((key, (h.cumulative(), h.sum, h.count)) for key, h in self._histograms.items())
+
+        declared = set()
+        for (name, labels), value in counters:
+            if name not in declared:
+                lines.append(f"# TYPE {name} counter")
+                declared.add(name)
+            lines.append(f"{name}{format_labels(labels)} {int(value) if float(value).is_integer() else value}")
+
+        for (name, labels), (buckets, total, count) in histograms:
+            if name not in declared:
+                lines.append(f"# TYPE {name} histogram")
+                declared.add(name)
+            for bound, cumulative in buckets:
+                lines.append(f"{name}_bucket{format_labels(labels, (('le', bound),))} {cumulative}")
+            lines.append(f"{name}_sum{format_labels(labels)} {total:.6f}")
+            lines.append(f"{name}_count{format_labels(labels)} {count}")
+
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path: str) -> str:
+        """
+        写出Prometheus文本文件（临时文件+原子替换，适用于node_exporter textfile collector）
+
+        Returns:
+            str: 文件路径
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
+        return path
+
+    def reset(self):
+        """清空全部指标（回调保留）"""
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+_default_registry = MetricsRegistry()
+
+
+def get_registry() -> MetricsRegistry:
+    """进程级默认注册表（导出器、数据库访问类、API客户端未指定时共用）"""
+    return _default_registry
+
+
+def instrumented(name: Optional[str] = None):
+    """
+    方法装饰器: 以方法名（或name）作为阶段计时，使用实例的 metrics 注册表；
+    返回值为列表时记录行数，为含 rows / bytes 整数项的字典时记录对应值
+    """
+    def decorator(method):
+        phase_name = name or method.__name__
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            registry = getattr(self, 'metrics', None) or _default_registry
+            with registry.phase(phase_name) as current:
+                result = method(self, *args, **kwargs)
+                if isinstance(result, list):
+                    current.rows = len(result)
+                elif isinstance(result, dict):
+                    for key in ('rows', 'bytes'):
+                        if isinstance(result.get(key), int):
+                            setattr(current, key, result[key])
+                return result
+        return wrapper
+    return decorator
+
+
+def print_hook(event: Dict):
+    """打印每个阶段耗时的回调（调试用）"""
+    details = ''.join(f", {key}={event[key]}" for key in ('rows', 'bytes') if event.get(key) is not None)
+    labels = ''.join(f" {key}={value}" for key, value in event['labels'].items())
+    print(f"[metrics] {event['type']} {event['name']}{labels}: {event['seconds'] * 1000:.1f}ms{details}")
+
+
+@contextmanager
+def profiled(output_file: Optional[str] = None, sort: str = 'cumulative', limit: int = 30):
+    """
+    cProfile分析（按需开启）
+
+    Args:
+        output_file: 保存pstats数据的文件（可用snakeviz等工具查看），None时打印前limit项
+        sort: 打印时的排序字段
+        limit: 打印的函数个数
+    """
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        if output_file:
+            profiler.dump_stats(output_file)
+            print(f"性能分析数据已保存到: {output_file}")
+        else:
+            stream = io.StringIO()
+            pstats.Stats(profiler, stream=stream).sort_stats(sort).print_stats(limit)
+            print(stream.getvalue())
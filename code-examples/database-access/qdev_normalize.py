@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Q Dev查询结果按列类型转换
+根据游标描述为每列预先确定一次转换函数（datetime转ISO字符串、浮点数四舍五入），
+只对需要转换的列批量处理，结果与逐单元格isinstance判断完全一致
+"""
+
+from datetime import datetime
+from functools import partial
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from mysql.connector import FieldType
+
+# datetime/timestamp列由驱动返回datetime对象；date列返回date对象，保持原样
+_DATETIME_TYPE_CODES = {FieldType.DATETIME, FieldType.TIMESTAMP}
+_FLOAT_TYPE_CODES = {FieldType.DOUBLE, FieldType.FLOAT}
+
+ColumnPlan = List[Tuple[str, Callable]]
+
+
+def _converter_for_value(value, float_digits: Optional[int]) -> Optional[Callable]:
+    """根据样本值确定转换函数（没有游标描述时使用）"""
+    if isinstance(value, datetime):
+        return datetime.isoformat
+    if float_digits is not None and isinstance(value, float):
+        return partial(round, ndigits=float_digits)
+    return None
+
+
+def _converter_for_type_code(type_code, float_digits: Optional[int]) -> Optional[Callable]:
+    """根据列类型确定转换函数"""
+    if type_code in _DATETIME_TYPE_CODES:
+        return datetime.isoformat
+    if float_digits is not None and type_code in _FLOAT_TYPE_CODES:
+        return partial(round, ndigits=float_digits)
+    return None
+
+
+def build_column_plan(rows: Sequence[Dict], description: Optional[Sequence] = None,
+                      float_digits: Optional[int] = None) -> ColumnPlan:
+    """
+    为结果集生成列转换计划
+
+    Args:
+        rows: 字典行
+        description: cursor.description；缺失或不含类型码时按每列第一个非空值推断
+        float_digits: 浮点列保留的小数位，None表示不做四舍五入
+
+    Returns:
+        ColumnPlan: 需要转换的 (列名, 转换函数) 列表
+    """
+    plan = []
+
+    if description and all(len(column) > 1 and column[1] is not None for column in description):
+        for column in description:
+            converter = _converter_for_type_code(column[1], float_digits)
+            if converter is not None:
+                plan.append((column[0], converter))
+        return plan
+
+    if not rows:
+        return plan
+
+    for name in rows[0]:
+        sample = next((row[name] for row in rows if row.get(name) is not None), None)
+        converter = _converter_for_value(sample, float_digits)
+        if converter is not None:
+            plan.append((name, converter))
+    return plan
+
+
+def apply_column_plan(rows: List[Dict], plan: ColumnPlan) -> List[Dict]:
+    """按列转换计划原地转换各行，返回同一列表"""
+    for name, converter in plan:
+        for row in rows:
+            value = row.get(name)
+            if value is not None:
+                row[name] = converter(value)
+    return rows
+
+
+def normalize_rows(rows: List[Dict], description: Optional[Sequence] = None,
+                   float_digits: Optional[int] = None) -> List[Dict]:
+    """
+    转换查询结果: datetime转为ISO字符串，float_digits不为None时浮点数四舍五入
+
+    Args:
+        rows: 字典行（原地修改）
+        description: cursor.description
+        float_digits: 浮点列保留的小数位
+
+    Returns:
+        List[Dict]: 转换后的行
+    """
+    return apply_column_plan(rows, build_column_plan(rows, description, float_digits))
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Q Dev查询键集分页（seek method）
+按排序键的最后一行值继续查询 (WHERE 排序键在上一页之后 ORDER BY ... LIMIT n)，
+不使用OFFSET，翻页过程中有新数据写入也不会重复或遗漏；分页游标是对排序键值的不透明编码。
+排序方向混合（如 date DESC, user_id）时，只有各列方向与排序一致的索引（MySQL 8 降序索引，
+见 KeysetOrder.index_columns）才能让每页成为从游标位置开始的索引范围扫描；
+全升序索引无法按混合方向顺序读取，每页都要对游标之后的全部行做文件排序
+"""
+
+import base64
+import binascii
+import hashlib
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+# 可作为用户指标分页排序键的列（列名会拼入SQL，只允许白名单中的列）
+METRIC_ORDER_COLUMNS = (
+    'total_inline_suggestions_count',
+    'total_inline_acceptance_count',
+    'acceptance_rate',
+    'total_inline_ai_code_lines',
+    'avg_inline_suggestions_count',
+    'avg_inline_acceptance_count',
+    'total_code_review_findings_count',
+    'total_days',
+    'last_date'
+)
+
+
+def _encode_value(value: Any) -> List:
+    """排序键值编码为 [类型, 文本]，解码后类型不变（float用repr保证精确往返）"""
+    if value is None:
+        return ['z', '']
+    if isinstance(value, bool):
+        return ['i', str(int(value))]
+    if isinstance(value, int):
+        return ['i', str(value)]
+    if isinstance(value, float):
+        return ['f', repr(value)]
+    if isinstance(value, Decimal):
+        return ['n', str(value)]
+    if isinstance(value, datetime):
+        return ['t', value.isoformat()]
+    if isinstance(value, date):
+        return ['d', value.isoformat()]
+    return ['s', str(value)]
+
+
+_DECODERS = {
+    'z': lambda text: None,
+    'i': int,
+    'f': float,
+    'n': Decimal,
+    't': datetime.fromisoformat,
+    'd': date.fromisoformat,
+    's': str
+}
+
+
+class KeysetOrder:
+    """
+    键集分页的排序定义
+
+    最后一列必须在查询范围内唯一（例如同一连接下的 user_id，或 (date, user_id) 组合），
+    保证排序是全序的；NULL 按MySQL规则视为最小值（升序在前、降序在后）。
+    需要以等值条件列开头、随后各列方向与排序一致的索引，见 index_columns
+    """
+
+    def __init__(self, name: str, columns: Sequence[Tuple[str, bool, bool]]):
+        """
+        初始化排序定义
+
+        Args:
+            name: 排序名称（写入游标，防止游标用于其他排序）
+            columns: (列名, 是否降序, 是否可为NULL) 列表
+        """
+        self.name = name
+        self.columns = tuple(columns)
+
+    def index_columns(self, prefix: Sequence[str] = ()) -> List[Tuple[str, bool]]:
+        """
+        支持本排序逐页范围扫描的索引列
+
+        Args:
+            prefix: 查询中的等值条件列（例如 connection_id），放在索引最前面
+
+        Returns:
+            List[Tuple[str, bool]]: (列名, 是否降序) 列表
+        """
+        columns = [(column, False) for column in prefix]
+        columns += [(column, descending) for column, descending, _ in self.columns]
+        return columns
+
+    def order_by_sql(self) -> str:
+        return ', '.join(f"{column} DESC" if descending else column for column, descending, _ in self.columns)
+
+    def key_of(self, row: Mapping) -> Tuple:
+        """行的排序键值"""
+        return tuple(row[column] for column, _, _ in self.columns)
+
+    def seek_clause(self, values: Sequence) -> Tuple[str, List]:
+        """
+        "排序位置在values之后" 的WHERE条件
+
+        展开为 (k1 之后) OR (k1 相等 AND k2 之后) OR ...，各列方向可以不同；
+        首列不可为NULL时额外加上首列的范围条件，便于优化器使用索引范围扫描
+
+        Returns:
+            Tuple[str, List]: (SQL条件, 参数)
+        """
+        terms = []
+        params: List = []
+        for index, (column, descending, nullable) in enumerate(self.columns):
+            after, after_params = self._after(column, descending, nullable, values[index])
+            if after is None:
+                continue
+            equal_terms = []
+            equal_params: List = []
+            for prefix_index in range(index):
+                prefix_column = self.columns[prefix_index][0]
+                if values[prefix_index] is None:
+                    equal_terms.append(f"{prefix_column} IS NULL")
+                else:
+                    equal_terms.append(f"{prefix_column} = %s")
+                    equal_params.append(values[prefix_index])
+            terms.append(' AND '.join(equal_terms + [after]))
+            params.extend(equal_params + after_params)
+
+        if not terms:
+            # 已经是最后一个可能的位置
+            return "1 = 0", []
+
+        clause = '(' + ' OR '.join(f"({term})" for term in terms) + ')'
+        first_column, first_descending, first_nullable = self.columns[0]
+        if not first_nullable:
+            clause = f"{first_column} {'<=' if first_descending else '>='} %s AND {clause}"
+            params.insert(0, values[0])
+        return clause, params
+
+    @staticmethod
+    def _after(column: str, descending: bool, nullable: bool, value) -> Tuple[Optional[str], List]:
+        """单列 "排在value之后" 的条件，None表示不存在这样的值"""
+        if value is None:
+            if descending:
+                return None, []
+            return f"{column} IS NOT NULL", []
+        if descending:
+            if nullable:
+                return f"({column} < %s OR {column} IS NULL)", [value]
+            return f"{column} < %s", [value]
+        return f"{column} > %s", [value]
+
+    def encode_cursor(self, row: Mapping, scope: Sequence = ()) -> str:
+        """
+        以行的排序键值生成分页游标
+
+        Args:
+            row: 当前页最后一行（未做类型转换的原始值）
+            scope: 查询条件（连接ID、日期范围等），游标只能用于相同条件的查询
+        """
+        payload = {
+            'o': self.name,
+            'q': _scope_digest(scope),
+            'k': [_encode_value(value) for value in self.key_of(row)]
+        }
+        raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+    def decode_cursor(self, cursor: str, scope: Sequence = ()) -> Tuple:
+        """
+        解析分页游标为排序键值
+
+        Raises:
+            ValueError: 游标格式无效，或属于其他排序/查询条件
+        """
+        try:
+            raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            payload = json.loads(raw)
+            values = tuple(_DECODERS[kind](text) for kind, text in payload['k'])
+        except (binascii.Error, UnicodeDecodeError, ValueError, KeyError, TypeError) as e:
+            raise ValueError(f"无效的分页游标: {cursor}") from e
+
+        if payload.get('o') != self.name or payload.get('q') != _scope_digest(scope) \
+                or len(values) != len(self.columns):
+            raise ValueError("分页游标与当前查询的排序或查询条件不匹配")
+        return values
+
+
+def _scope_digest(scope: Sequence) -> str:
+    return hashlib.sha1(json.dumps([str(item) for item in scope]).encode('utf-8')).hexdigest()[:12]
+
+
+# 用户日常数据: 日期倒序，同一天按用户ID（需要 (connection_id, date DESC, user_id) 索引）
+DAILY_DATA_ORDER = KeysetOrder('date_user', [('date', True, False), ('user_id', False, False)])
+
+_metric_orders: Dict[str, KeysetOrder] = {}
+
+
+def metric_order(metric: str = 'total_inline_suggestions_count') -> KeysetOrder:
+    """
+    用户指标按某一指标倒序、同值按用户ID排序的分页定义
+
+    每页按索引范围扫描需要 (connection_id, <metric> DESC, user_id) 索引
+
+    Args:
+        metric: METRIC_ORDER_COLUMNS 中的列
+
+    Returns:
+        KeysetOrder: 排序定义
+    """
+    if metric not in METRIC_ORDER_COLUMNS:
+        raise ValueError(f"不支持的排序指标: {metric}（可选: {', '.join(METRIC_ORDER_COLUMNS)}）")
+    order = _metric_orders.get(metric)
+    if order is None:
+        order = _metric_orders[metric] = KeysetOrder(f"metric:{metric}",
+                                                     [(metric, True, True), ('user_id', False, False)])
+    return order
+
+
+def paginate_query(query: str, params: Sequence, order: KeysetOrder,
+                   after: Optional[Sequence] = None, limit: Optional[int] = None) -> Tuple[str, List]:
+    """
+    为已包含WHERE条件的查询追加键集分页条件、ORDER BY 和 LIMIT
+
+    Args:
+        query: 以WHERE条件结尾的查询
+        params: 查询参数
+        order: 排序定义
+        after: 上一页最后一行的排序键值（decode_cursor的结果），None表示第一页
+        limit: 每页行数，None表示不限制
+
+    Returns:
+        Tuple[str, List]: (查询语句, 参数)
+    """
+    params = list(params)
+    if after is not None:
+        clause, seek_params = order.seek_clause(after)
+        query += f" AND {clause}"
+        params.extend(seek_params)
+    query += f" ORDER BY {order.order_by_sql()}"
+    if limit is not None:
+        query += " LIMIT %s"
+        params.append(limit)
+    return query, params
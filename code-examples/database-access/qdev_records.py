@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Q Dev指标紧凑行类型
+_tool_q_dev_user_metrics / _tool_q_dev_user_data 的行使用 __slots__ 对象保存，
+直接由游标返回的元组构造，不再为每一行创建字典；
+对外提供只读映射接口（row['x']、row.get('x')），只在写出JSON时才转换为字典
+"""
+
+from collections.abc import Mapping
+from typing import Iterable, List, Sequence, Tuple, Type, TypeVar
+
+R = TypeVar('R', bound='QDevRecord')
+
+
+class QDevRecord(Mapping):
+    """
+    紧凑行基类
+
+    FIELDS 为可作为映射键访问的列（也是输出列的顺序）；
+    查询中没有选择的列不设置，映射接口中视为不存在
+    """
+
+    __slots__ = ()
+    FIELDS: Tuple[str, ...] = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._field_set = frozenset(cls.FIELDS)
+
+    @classmethod
+    def from_values(cls: Type[R], names: Sequence[str], values: Sequence) -> R:
+        """按列名和值构造一行"""
+        record = cls.__new__(cls)
+        for name, value in zip(names, values):
+            setattr(record, name, value)
+        return record
+
+    @classmethod
+    def from_dict(cls: Type[R], row: dict) -> R:
+        """由字典行构造"""
+        return cls.from_values(list(row), list(row.values()))
+
+    def __getitem__(self, name: str):
+        if name not in self._field_set:
+            raise KeyError(name)
+        try:
+            return getattr(self, name)
+        except AttributeError:
+            raise KeyError(name) from None
+
+    def __setitem__(self, name: str, value):
+        if name not in self._field_set:
+            raise KeyError(name)
+        setattr(self, name, value)
+
+    def __iter__(self):
+        for name in self.FIELDS:
+            if hasattr(self, name):
+                yield name
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def to_dict(self) -> dict:
+        """转换为字典（输出边界使用）"""
+        return {name: getattr(self, name) for name in self}
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class UserMetricsRecord(QDevRecord):
+    """_tool_q_dev_user_metrics 行"""
+
+    __slots__ = FIELDS = (
+        'user_id',
+        'display_name',
+        'first_date',
+        'last_date',
+        'total_days',
+        'total_inline_suggestions_count',
+        'total_inline_acceptance_count',
+        'acceptance_rate',
+        'total_inline_ai_code_lines',
+        'avg_inline_suggestions_count',
+        'avg_inline_acceptance_count',
+        'total_code_review_findings_count',
+        'created_at',
+        'updated_at'
+    )
+
+
+class UserDailyRecord(QDevRecord):
+    """_tool_q_dev_user_data 行"""
+
+    __slots__ = FIELDS = (
+        'user_id',
+        'display_name',
+        'date',
+        'inline_suggestions_count',
+        'inline_acceptance_count',
+        'inline_ai_code_lines',
+        'chat_messages_sent',
+        'chat_messages_interacted',
+        'code_fix_generation_event_count',
+        'test_generation_event_count',
+        'doc_generation_event_count',
+        'transformation_event_count',
+        'created_at',
+        'updated_at'
+    )
+
+
+def fetch_records(cursor, record_type: Type[R], batch_size: int = 10000) -> List[R]:
+    """
+    从已执行查询的非字典游标读取全部行并构造为紧凑行
+
+    按批次fetchmany，元组转换后即可释放，峰值内存不包含整份字典结果集
+
+    Args:
+        cursor: 已execute的游标（dictionary=False）
+        record_type: 行类型
+        batch_size: 每批读取的行数
+
+    Returns:
+        List: 紧凑行列表
+    """
+    names = tuple(cursor.column_names)
+    records = []
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        records.extend(record_type.from_values(names, values) for values in rows)
+    return records
+
+
+def records_to_dicts(records: Iterable) -> List[dict]:
+    """把紧凑行列表转换为字典列表"""
+    return [record.to_dict() if isinstance(record, QDevRecord) else record for record in records]
+
+
+def json_default(value):
+    """json.dump 的 default 参数: 紧凑行转换为字典，其他无法序列化的值转为字符串"""
+    if isinstance(value, QDevRecord):
+        return value.to_dict()
+    return str(value)
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Q Dev导出JSON序列化后端
+统一 save_to_file / export_to_json 的序列化入口：安装了orjson时使用orjson，否则回退到标准库json。
+两种后端解析后的值一致（date、Decimal、datetime、紧凑行的转换规则相同，NaN/Infinity 都输出为 null），
+但不保证逐字节一致: 浮点数的文本形式可能不同（例如标准库输出 1e-05，orjson 输出 0.00001）
+"""
+
+import json
+import json.encoder
+from datetime import datetime
+from decimal import Decimal
+from typing import IO, Any, Dict, Optional
+
+from qdev_records import QDevRecord, json_default
+
+try:
+    import orjson
+except ImportError:  # orjson为可选依赖，未安装时使用标准库
+    orjson = None
+
+
+def _finite_floatstr(value: float, _repr=float.__repr__) -> str:
+    """非有限浮点数输出为 null（与orjson一致），标准JSON中没有 NaN/Infinity"""
+    if value != value or value in (float('inf'), float('-inf')):
+        return 'null'
+    return _repr(value)
+
+
+class _FiniteJSONEncoder(json.JSONEncoder):
+    """把 NaN/Infinity 编码为 null 的 JSONEncoder（需以 allow_nan=False 构造）"""
+
+    def iterencode(self, o, _one_shot=False):
+        if _one_shot and json.encoder.c_make_encoder is not None and self.indent is None:
+            # C编码器不支持自定义浮点数格式: 先按 allow_nan=False 编码，遇到非有限浮点数再走Python实现
+            try:
+                return super().iterencode(o, _one_shot)
+            except ValueError:
+                pass
+        markers = {} if self.check_circular else None
+        encoder = json.encoder.encode_basestring_ascii if self.ensure_ascii else json.encoder.encode_basestring
+        iterencode = json.encoder._make_iterencode(
+            markers, self.default, encoder, self.indent, _finite_floatstr,
+            self.key_separator, self.item_separator, self.sort_keys, self.skipkeys, _one_shot
+        )
+        return iterencode(o, 0)
+
+
+class StdlibJSONSerializer:
+    """标准库json后端"""
+
+    name = 'json'
+
+    def dumps(self, obj: Any, pretty: bool = False) -> str:
+        """序列化单个值"""
+        return json.dumps(obj, indent=2 if pretty else None, ensure_ascii=False, default=json_default,
+                          cls=_FiniteJSONEncoder, allow_nan=False)
+
+    def dump(self, obj: Any, fp: IO[str], pretty: bool = True) -> None:
+        """序列化到文本流（json.dump 本身按块写出）"""
+        json.dump(obj, fp, indent=2 if pretty else None, ensure_ascii=False, default=json_default,
+                  cls=_FiniteJSONEncoder, allow_nan=False)
+
+
+def _orjson_default(value):
+    """orjson 的 default: 与 json_default 一致，datetime 同样按 str() 转换以保持输出一致"""
+    if isinstance(value, QDevRecord):
+        return value.to_dict()
+    if isinstance(value, (datetime, Decimal)):
+        return str(value)
+    return json_default(value)
+
+
+class OrjsonSerializer:
+    """
+    orjson后端
+
+    date、int、float、str在C代码中直接编码；datetime不使用orjson的原生格式（带'T'），
+    而是与标准库后端一样转为str()。顶层两级容器（导出文档 -> 行列表）按元素流式写出，
+    每行单独编码，内存中不保留完整文档
+    """
+
+    name = 'orjson'
+
+    # 流式写出的容器层数（导出文档和其中的行列表）
+    STREAM_DEPTH = 2
+
+    def __init__(self):
+        if orjson is None:
+            raise ImportError("orjson后端需要安装orjson: pip install orjson")
+        self._options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        self._pretty_options = self._options | orjson.OPT_INDENT_2
+
+    def dumps(self, obj: Any, pretty: bool = False) -> str:
+        """序列化单个值"""
+        options = self._pretty_options if pretty else self._options
+        return orjson.dumps(obj, default=_orjson_default, option=options).decode('utf-8')
+
+    def dump(self, obj: Any, fp: IO[str], pretty: bool = True) -> None:
+        """序列化到文本流"""
+        self._write(obj, fp, pretty, 0)
+
+    def _write(self, obj: Any, fp: IO[str], pretty: bool, depth: int) -> None:
+        if depth >= self.STREAM_DEPTH or not isinstance(obj, (dict, list, tuple)) or not obj:
+            text = self.dumps(obj, pretty)
+            # 嵌套值的缩进与 json.dump(indent=2) 保持一致
+            fp.write(text.replace('\n', '\n' + '  ' * depth) if pretty and depth else text)
+            return
+
+        if pretty:
+            indent = '\n' + '  ' * (depth + 1)
+            separator, key_separator, closing = ',' + indent, ': ', '\n' + '  ' * depth
+        else:
+            indent, separator, key_separator, closing = '', ', ', ': ', ''
+
+        if isinstance(obj, dict):
+            fp.write('{' + indent)
+            for index, (key, value) in enumerate(obj.items()):
+                if index:
+                    fp.write(separator)
+                fp.write(self._encode_key(key) + key_separator)
+                self._write(value, fp, pretty, depth + 1)
+            fp.write(closing + '}')
+        else:
+            fp.write('[' + indent)
+            for index, value in enumerate(obj):
+                if index:
+                    fp.write(separator)
+                self._write(value, fp, pretty, depth + 1)
+            fp.write(closing + ']')
+
+    def _encode_key(self, key: Any) -> str:
+        return self.dumps({key: None})[1:-6]
+
+
+SERIALIZERS = {
+    'json': StdlibJSONSerializer,
+    'orjson': OrjsonSerializer
+}
+
+_instances: Dict[str, Any] = {}
+
+
+def get_serializer(name: Optional[str] = 'auto'):
+    """
+    获取序列化后端
+
+    Args:
+        name: 'auto'（有orjson时使用orjson）、'orjson' 或 'json'；None等同于'auto'
+
+    Returns:
+        序列化后端实例（提供 dumps / dump）
+    """
+    if name in (None, 'auto'):
+        name = 'orjson' if orjson is not None else 'json'
+    if name not in SERIALIZERS:
+        raise ValueError(f"不支持的序列化后端: {name}（可选: auto、orjson、json）")
+    if name not in _instances:
+        _instances[name] = SERIALIZERS[name]()
+    return _instances[name]
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Q Dev增量导出水位线存储
+按连接ID和数据表在本地JSON文件中记录上次导出到的时间戳，以及恰好落在该时间戳上的行主键；
+增量查询使用 >= 水位线，已导出的边界行按主键去重，水位线之后才提交的同一时间戳的行不会丢失
+"""
+
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+BOUNDARY_KEYS = '_boundary_keys'
+
+# 边界行去重使用的主键列（同一连接内唯一）
+USER_METRICS_KEY = ('user_id',)
+USER_DAILY_DATA_KEY = ('user_id', 'date')
+
+
+def format_watermark(value) -> str:
+    """datetime转换为水位线字符串（字符串原样返回）"""
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S.%f')
+    return str(value)
+
+
+def _row_key(row, key_columns: Sequence[str]) -> Tuple[str, ...]:
+    return tuple(str(row[column]) for column in key_columns)
+
+
+def drop_seen_rows(rows: List, column: str, watermark: Optional[str], seen_keys: Set[Tuple[str, ...]],
+                   key_columns: Sequence[str]) -> List:
+    """
+    去掉上次已导出的边界行（时间戳等于水位线且主键已记录）
+
+    Args:
+        rows: 按 column >= watermark 查询到的原始行（未做类型转换）
+        column: 水位线列
+        watermark: 上次水位线
+        seen_keys: 上次记录的边界行主键
+        key_columns: 主键列
+
+    Returns:
+        List: 去重后的行
+    """
+    if watermark is None or not seen_keys:
+        return rows
+    return [row for row in rows
+            if not (row.get(column) is not None and format_watermark(row[column]) == watermark
+                    and _row_key(row, key_columns) in seen_keys)]
+
+
+def watermark_from_rows(rows: Iterable, column: str,
+                        key_columns: Sequence[str]) -> Tuple[Optional[str], List[List[str]]]:
+    """
+    本批行的新水位线及落在该时间戳上的行主键
+
+    Returns:
+        Tuple: (水位线字符串, 边界行主键列表)，没有行时为 (None, [])
+    """
+    watermark = None
+    keys: List[List[str]] = []
+    for row in rows:
+        value = row.get(column)
+        if value is None:
+            continue
+        value = format_watermark(value)
+        if watermark is None or value > watermark:
+            watermark = value
+            keys = [list(_row_key(row, key_columns))]
+        elif value == watermark:
+            keys.append(list(_row_key(row, key_columns)))
+    return watermark, keys
+
+
+class WatermarkStore:
+    """本地水位线文件（写入采用临时文件+原子替换，避免中断导致文件损坏）"""
+
+    def __init__(self, path: str = '.qdev_watermarks.json'):
+        """
+        初始化水位线存储
+
+        Args:
+            path: 水位线文件路径
+        """
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict:
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _save(self, data: Dict) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def get(self, connection_id: int, table: str) -> Optional[str]:
+        """
+        获取水位线
+
+        Args:
+            connection_id: 连接ID
+            table: 数据表名
+
+        Returns:
+            Optional[str]: 'YYYY-MM-DD HH:MM:SS[.ffffff]' 格式的时间戳，首次导出时为None
+        """
+        with self._lock:
+            return self._load().get(str(connection_id), {}).get(table)
+
+    def get_boundary_keys(self, connection_id: int, table: str) -> Set[Tuple[str, ...]]:
+        """时间戳等于当前水位线、已经导出过的行主键"""
+        with self._lock:
+            keys = self._load().get(str(connection_id), {}).get(BOUNDARY_KEYS, {}).get(table, [])
+            return {tuple(key) for key in keys}
+
+    def set(self, connection_id: int, table: str, value,
+            boundary_keys: Optional[Iterable[Sequence[str]]] = None) -> None:
+        """
+        更新水位线（只前进不后退）
+
+        Args:
+            connection_id: 连接ID
+            table: 数据表名
+            value: datetime或时间戳字符串
+            boundary_keys: 时间戳等于value的已导出行主键；水位线不变时与已记录的主键合并
+        """
+        if value is None:
+            return
+        value = format_watermark(value)
+        keys = [list(key) for key in boundary_keys or []]
+
+        with self._lock:
+            data = self._load()
+            tables = data.setdefault(str(connection_id), {})
+            current = tables.get(table)
+            if current is not None and current > value:
+                return
+            boundary = tables.setdefault(BOUNDARY_KEYS, {})
+            if current == value:
+                if not keys:
+                    return
+                merged = {tuple(key) for key in boundary.get(table, [])} | {tuple(key) for key in keys}
+                boundary[table] = sorted(list(key) for key in merged)
+            else:
+                tables[table] = value
+                boundary[table] = keys
+            self._save(data)
+
+    def reset(self, connection_id: int) -> None:
+        """清除某个连接的全部水位线，下次导出将重新全量导出"""
+        with self._lock:
+            data = self._load()
+            if data.pop(str(connection_id), None) is None:
+                return
+            self._save(data)